@@ -1,15 +1,18 @@
 from helpers.application import app, api
 from helpers.database import db
 from helpers.CORS import cors
+import helpers.cache_invalidation
+import helpers.query_counter
 
 
 from resources.IndexResource import IndexResource
-from resources.ResponsavelResource import TB_ResponsaveisResource, TB_ResponsavelResource
-from resources.SalaResource import TB_SalasResource, TB_SalaResource
-from resources.ChaveResource import TB_ChavesResource, TB_ChaveResource
+from resources.StatusResource import StatusResource
+from resources.ResponsavelResource import TB_ResponsaveisResource, TB_ResponsavelResource, TB_ResponsaveisLoteResource
+from resources.SalaResource import TB_SalasResource, TB_SalaResource, TB_SalasLoteResource
+from resources.ChaveResource import TB_ChavesResource, TB_ChaveResource, TB_ChavesLoteResource
 from resources.ReservaResource import TB_ReservasResource, TB_ReservaResource
 from resources.RetiradaResource import TB_RetiradasResource, TB_RetiradaResource
-from resources.HistoricoResource import HistoricoResource, HistoricoByIdResource
+from resources.HistoricoResource import HistoricoResource, HistoricoExportResource, HistoricoByIdResource
 
 from resources.AuthResource import AuthResource
 from resources.MeResource import MeResource
@@ -17,17 +20,22 @@ from resources.LogoutResource import LogoutResource
 
 cors.init_app(app)
 api.add_resource(IndexResource, '/')
+api.add_resource(StatusResource, '/status')
 api.add_resource(TB_ResponsaveisResource, '/responsavel')
 api.add_resource(TB_ResponsavelResource, '/responsavel/<int:responsavel_id>')
+api.add_resource(TB_ResponsaveisLoteResource, '/responsavel/bulk')
 api.add_resource(TB_SalasResource, '/salas')
 api.add_resource(TB_SalaResource, '/salas/<int:sala_id>')
+api.add_resource(TB_SalasLoteResource, '/salas/bulk')
 api.add_resource(TB_ChavesResource, '/chaves')
 api.add_resource(TB_ChaveResource, '/chaves/<int:chave_id>')
+api.add_resource(TB_ChavesLoteResource, '/chaves/bulk')
 api.add_resource(TB_ReservasResource, '/reservas')
 api.add_resource(TB_ReservaResource, '/reservas/<int:reserva_id>')
 api.add_resource(TB_RetiradasResource, '/retiradas')
 api.add_resource(TB_RetiradaResource, '/retiradas/<int:retirada_id>')
 api.add_resource(HistoricoResource, '/historico')
+api.add_resource(HistoricoExportResource, '/historico/export')
 api.add_resource(HistoricoByIdResource, '/historico/<int:retirada_id>')
 
 api.add_resource(AuthResource, "/login")
@@ -0,0 +1,240 @@
+"""Planos de consulta antes e depois dos índices parciais/compostos.
+
+Roda EXPLAIN (ANALYZE, BUFFERS) nas consultas mais frequentes da API duas
+vezes: sem os índices da migração 4c2a7e9d1b35 e com eles. Tudo acontece em
+uma única transação que é desfeita no final (inclusive os dados sintéticos
+de --linhas), mas o DROP INDEX bloqueia as tabelas enquanto ela estiver
+aberta: use um banco de desenvolvimento ou homologação.
+
+    python benchmarks/planos_de_consulta.py --linhas 200000
+"""
+import argparse
+import importlib.util
+import os
+import re
+import sys
+from datetime import date, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, text
+from app import app
+from helpers.database import db
+from helpers.auxiliaryFunctionsResources.helpFunctionsForReservaResources import SQL_CONFLITO_RESERVA
+from models.Chave import TB_Chave
+from models.Retirada import TB_Retirada
+
+MIGRACAO = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "migrations",
+    "versions",
+    "4c2a7e9d1b35_adicao_de_indices_parciais_e_compostos.py"
+)
+
+
+def carregar_indices():
+    spec = importlib.util.spec_from_file_location("migracao_indices", MIGRACAO)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo.INDICES
+
+
+# Dados sintéticos: uma sala (com uma chave) a cada 10 linhas, retiradas em
+# sua maioria devolvidas e reservas distribuídas ao longo de dois anos.
+SQL_DADOS_SINTETICOS = [
+    """
+    SELECT setseed(0.42)
+    """,
+    """
+    INSERT INTO tb_responsavel (responsavel_nome, responsavel_cpf, email, senha, funcao, ativo, created_at)
+    SELECT 'Benchmark ' || g, 'b' || lpad(g::text, 13, '0'), 'benchmark' || g || '@benchmark.local',
+           'x', 'responsavel', true, now()
+    FROM generate_series(1, GREATEST(:linhas / 100, 1)) g
+    """,
+    """
+    INSERT INTO tb_sala (sala_nome, disponivel, created_at)
+    SELECT 'Benchmark ' || g, true, now()
+    FROM generate_series(1, GREATEST(:linhas / 10, 1)) g
+    """,
+    """
+    INSERT INTO tb_chave (chave_nome, sala_id, disponivel, created_at)
+    SELECT 'Chave ' || s.sala_nome || ' 01', s.sala_id, true, now()
+    FROM tb_sala s
+    WHERE s.sala_nome LIKE 'Benchmark %'
+    """,
+    """
+    WITH chaves AS (
+        SELECT chave_id, row_number() OVER (ORDER BY chave_id) - 1 AS n
+        FROM tb_chave WHERE chave_nome LIKE 'Chave Benchmark %'
+    ), responsaveis AS (
+        SELECT responsavel_id, row_number() OVER (ORDER BY responsavel_id) - 1 AS n
+        FROM tb_responsavel WHERE responsavel_nome LIKE 'Benchmark %'
+    )
+    INSERT INTO tb_retirada (chave_id, responsavel_id, data_retirada, hora_retirada,
+                             hora_prevista_devolucao, status, created_at, deleted_at)
+    SELECT c.chave_id, r.responsavel_id, DATE '2024-01-01' + (g % 730), TIME '08:00', TIME '10:00',
+           CASE WHEN random() < 0.03 THEN 'retirada' WHEN random() < 0.01 THEN 'atrasada' ELSE 'devolvida' END,
+           now(),
+           CASE WHEN random() < 0.05 THEN now() END
+    FROM generate_series(1, :linhas) g
+    JOIN chaves c ON c.n = g % (SELECT count(*) FROM chaves)
+    JOIN responsaveis r ON r.n = g % (SELECT count(*) FROM responsaveis)
+    """,
+    """
+    WITH salas AS (
+        SELECT sala_id, row_number() OVER (ORDER BY sala_id) - 1 AS n
+        FROM tb_sala WHERE sala_nome LIKE 'Benchmark %'
+    ), responsaveis AS (
+        SELECT responsavel_id, row_number() OVER (ORDER BY responsavel_id) - 1 AS n
+        FROM tb_responsavel WHERE responsavel_nome LIKE 'Benchmark %'
+    )
+    INSERT INTO tb_reserva (sala_id, responsavel_id, hora_inicio, hora_fim, data_inicio, data_fim,
+                            frequencia, status, created_at)
+    SELECT s.sala_id, r.responsavel_id,
+           TIME '08:00' + (g % 10) * INTERVAL '1 hour', TIME '09:00' + (g % 10) * INTERVAL '1 hour',
+           DATE '2024-01-01' + (g % 700), DATE '2024-01-01' + (g % 700) + 30,
+           (ARRAY['semanal', 'mensal', 'única'])[1 + g % 3],
+           CASE WHEN random() < 0.3 THEN 'ativa' ELSE 'cancelada' END,
+           now()
+    FROM generate_series(1, GREATEST(:linhas / 4, 1)) g
+    JOIN salas s ON s.n = g % (SELECT count(*) FROM salas)
+    JOIN responsaveis r ON r.n = g % (SELECT count(*) FROM responsaveis)
+    """,
+    # now() é o instante de início da transação: só pega as reservas acima.
+    """
+    INSERT INTO tb_reserva_dia (reserva_id, dia_semana)
+    SELECT reserva_id, 1 + reserva_id % 7
+    FROM tb_reserva
+    WHERE frequencia = 'semanal' AND created_at = now()
+    """,
+]
+
+
+def consultas(conexao):
+    sala_id = conexao.exec_driver_sql(
+        "SELECT sala_id FROM tb_chave ORDER BY chave_id DESC LIMIT 1"
+    ).scalar() or 1
+    responsavel_id = conexao.exec_driver_sql(
+        "SELECT responsavel_id FROM tb_retirada ORDER BY retirada_id DESC LIMIT 1"
+    ).scalar() or 1
+    data_inicio = date(2025, 3, 10)
+
+    # Mesmas consultas de RetiradaRepository.get_retirada_ativa_da_sala,
+    # existe_conflito_reserva_raw, da listagem paginada por data e do
+    # histórico filtrado por responsável.
+    return {
+        "retirada ativa da sala": select(TB_Retirada)
+            .join(TB_Chave, TB_Retirada.chave_id == TB_Chave.chave_id)
+            .where(
+                TB_Chave.sala_id == sala_id,
+                TB_Retirada.status.in_(["retirada", "atrasada"]),
+                TB_Retirada.deleted_at.is_(None)
+            )
+            .limit(1),
+        "conflito de reserva": SQL_CONFLITO_RESERVA.bindparams(
+            sala_id=sala_id,
+            hora_inicio=time(9),
+            hora_fim=time(10),
+            data_inicio=data_inicio,
+            dia_semana=data_inicio.weekday() + 1,
+            dia_mes=data_inicio.day,
+            reserva_id_excluir=None
+        ),
+        "retiradas por data (keyset)": select(TB_Retirada)
+            .where(
+                TB_Retirada.deleted_at.is_(None),
+                TB_Retirada.data_retirada > date(2025, 6, 1)
+            )
+            .order_by(TB_Retirada.data_retirada, TB_Retirada.retirada_id)
+            .limit(51),
+        "retiradas do responsável": select(TB_Retirada)
+            .where(
+                TB_Retirada.responsavel_id == responsavel_id,
+                TB_Retirada.deleted_at.is_(None)
+            ),
+    }
+
+
+def explicar(conexao, consulta):
+    compilada = consulta.compile(
+        dialect=conexao.dialect,
+        compile_kwargs={"render_postcompile": True}
+    )
+    plano = conexao.exec_driver_sql(
+        f"EXPLAIN (ANALYZE, BUFFERS) {compilada}",
+        compilada.params
+    ).scalars().all()
+
+    tempo = next(
+        (float(m.group(1)) for linha in plano if (m := re.search(r"Execution Time: ([\d.]+) ms", linha))),
+        None
+    )
+
+    return "\n".join(plano), tempo
+
+
+def medir(conexao, titulo):
+    print(f"\n{'=' * 20} {titulo} {'=' * 20}")
+    tempos = {}
+
+    for nome, consulta in consultas(conexao).items():
+        plano, tempo = explicar(conexao, consulta)
+        tempos[nome] = tempo
+        print(f"\n--- {nome} ---\n{plano}")
+
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--linhas",
+        type=int,
+        default=0,
+        help="retiradas sintéticas a inserir antes de medir (desfeitas no final)"
+    )
+    args = parser.parse_args()
+
+    indices = carregar_indices()
+    tabelas = sorted({tabela for _, tabela, _, _ in indices})
+
+    with app.app_context():
+        with db.engine.connect() as conexao:
+            transacao = conexao.begin()
+
+            try:
+                if args.linhas:
+                    print(f"Inserindo dados sintéticos ({args.linhas} retiradas)...")
+                    for sql in SQL_DADOS_SINTETICOS:
+                        conexao.execute(text(sql), {"linhas": args.linhas})
+
+                for tabela in tabelas:
+                    conexao.exec_driver_sql(f"ANALYZE {tabela}")
+
+                ponto = conexao.begin_nested()
+                for nome, _, _, _ in indices:
+                    conexao.exec_driver_sql(f"DROP INDEX IF EXISTS {nome}")
+                antes = medir(conexao, "SEM os índices")
+                ponto.rollback()
+
+                ponto = conexao.begin_nested()
+                for nome, tabela, colunas, predicado in indices:
+                    onde = f" WHERE {predicado}" if predicado else ""
+                    conexao.exec_driver_sql(
+                        f"CREATE INDEX IF NOT EXISTS {nome} ON {tabela} ({', '.join(colunas)}){onde}"
+                    )
+                for tabela in tabelas:
+                    conexao.exec_driver_sql(f"ANALYZE {tabela}")
+                depois = medir(conexao, "COM os índices")
+                ponto.rollback()
+
+            finally:
+                transacao.rollback()
+
+    print(f"\n{'consulta':<32}{'antes (ms)':>12}{'depois (ms)':>14}")
+    for nome in antes:
+        print(f"{nome:<32}{antes[nome] or 0:>12.3f}{depois[nome] or 0:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
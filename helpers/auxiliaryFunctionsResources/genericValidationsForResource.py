@@ -1,11 +1,11 @@
-from helpers.database import db
+from helpers.entity_loader import carregar_entidade
 from helpers.logging import logger, log_exception
 from flask import abort
 
 def salaVerification(id):
     from models.Sala import TB_Sala
 
-    sala = db.session.get(TB_Sala, id)
+    sala = carregar_entidade(TB_Sala, id)
     if not sala:
         logger.info(f"Sala {id} não encontrada")
         abort(404, "Sala não encontrada")
@@ -13,7 +13,7 @@ def salaVerification(id):
 def chaveVerification(id):
     from models.Chave import TB_Chave
 
-    chave = db.session.get(TB_Chave, id)
+    chave = carregar_entidade(TB_Chave, id)
     if not chave:
         logger.info(f"Chave {id} não encontrada")
         abort(404, "Chave não encontrada")
@@ -21,7 +21,7 @@ def chaveVerification(id):
 def chaveIsDisponivel(id):
     from models.Chave import TB_Chave
 
-    chave = db.session.get(TB_Chave, id)
+    chave = carregar_entidade(TB_Chave, id)
     if not chave.disponivel:
         logger.info(f"Chave {id} não está disponivel")
         abort(404, "Chave não está disponivel")
@@ -29,7 +29,7 @@ def chaveIsDisponivel(id):
 def responsavelVerification(id):
     from models.Responsavel import TB_Responsavel
 
-    responsavel = db.session.get(TB_Responsavel, id)
+    responsavel = carregar_entidade(TB_Responsavel, id)
     if not responsavel:
         logger.info(f"Responsavel {id} não encontrado")
         abort(404, "Responsavel não encontrado")
@@ -37,14 +37,14 @@ def responsavelVerification(id):
 def responsavelIsActive(id):
     from models.Responsavel import TB_Responsavel
 
-    responsavel = db.session.get(TB_Responsavel, id)
+    responsavel = carregar_entidade(TB_Responsavel, id)
     if responsavel.ativo == True:
         logger.info(f"Responsavel {id} se encontra Ativo")
         abort(404, "Responsavel Ativo")
 
 def responsavelNotActive(id):
     from models.Responsavel import TB_Responsavel
-    responsavel = db.session.get(TB_Responsavel, id)
+    responsavel = carregar_entidade(TB_Responsavel, id)
     if responsavel.ativo == False:
         logger.info(f"Responsavel {id} se encontra Inativo")
         abort(404, "Responsavel Inativo")
@@ -52,7 +52,7 @@ def responsavelNotActive(id):
 def reservaVerification(id):
     from models.Reserva import TB_Reserva
 
-    reserva = db.session.get(TB_Reserva, id)
+    reserva = carregar_entidade(TB_Reserva, id)
     if not reserva:
         logger.info(f"Reserva {id} não encontrada")
         abort(404, "Reserva não encontrada")
@@ -61,7 +61,7 @@ def reservaVerification(id):
 def reservaStatusIsAtiva(id):
     from models.Reserva import TB_Reserva
 
-    reserva = db.session.get(TB_Reserva, id)
+    reserva = carregar_entidade(TB_Reserva, id)
     if reserva.status != "ativa":
         logger.info(f"Reserva {id} não está ativa")
         abort(404, "Reserva não está ativa")
@@ -70,7 +70,7 @@ def reservaStatusIsAtiva(id):
 def reservaStatusIsAtivaInDelete(id):
     from models.Reserva import TB_Reserva
 
-    reserva = db.session.get(TB_Reserva, id)
+    reserva = carregar_entidade(TB_Reserva, id)
     if reserva.status == "ativa":
         logger.info(f"Reserva {id} está ativa, não pode ser apagada")
         abort(404, "Reserva se encontra ativa, não pode ser apagada")
@@ -78,7 +78,7 @@ def reservaStatusIsAtivaInDelete(id):
 def retiradaVerification(id):
     from models.Retirada import TB_Retirada
 
-    retirada = db.session.get(TB_Retirada, id)
+    retirada = carregar_entidade(TB_Retirada, id)
     if not retirada:
         logger.info(f"Retirada {id} não encontrada")
         abort(404, "Retirada não encontrada")
@@ -86,7 +86,7 @@ def retiradaVerification(id):
 def retiradaStatus(id):
     from models.Retirada import TB_Retirada
 
-    retirada = db.session.get(TB_Retirada, id)
+    retirada = carregar_entidade(TB_Retirada, id)
     if retirada.status == "retirada" or retirada.status == "atrasada":
         logger.info(f"A retirada {id} ainda não foi finalizada, por isso não poderá ser deletada")
         abort(409, "A retirada ainda não foi finalizada, por isso não poderá ser deletada")
\ No newline at end of file
@@ -0,0 +1,111 @@
+from flask import abort
+from marshmallow import ValidationError
+from sqlalchemy import select, or_
+from helpers.database import db
+import os
+
+# Cadastro em lote: o lote inteiro é validado, a unicidade é verificada com uma
+# única consulta e os itens válidos são gravados em um INSERT de várias linhas.
+# Cada item recebe o seu resultado (posição no lote, status e dados ou erros);
+# os inválidos não impedem a gravação dos demais.
+LOTE_MAXIMO_ITENS = int(os.getenv("LOTE_MAXIMO_ITENS", 1000))
+
+def validar_lote(dados, schema):
+    if not isinstance(dados, list) or not dados:
+        abort(400, description="O corpo da requisição deve ser uma lista não vazia.")
+
+    if len(dados) > LOTE_MAXIMO_ITENS:
+        abort(413, description=f"O lote aceita no máximo {LOTE_MAXIMO_ITENS} itens.")
+
+    validos = {}
+    resultados = {}
+
+    for indice, item in enumerate(dados):
+        try:
+            validos[indice] = schema.load(item)
+        except ValidationError as err:
+            resultados[indice] = item_rejeitado(indice, 422, "Dados inválidos", err.messages)
+
+    return validos, resultados
+
+def item_criado(indice, dados):
+    return {
+        "indice": indice,
+        "status": 201,
+        "dados": dados
+    }
+
+def item_rejeitado(indice, status, erro, detalhes=None):
+    resultado = {
+        "indice": indice,
+        "status": status,
+        "erro": erro
+    }
+
+    if detalhes is not None:
+        resultado["detalhes"] = detalhes
+
+    return resultado
+
+def valores_ja_cadastrados(modelo, valores_por_campo, *filtros):
+    # {campo: [valores do lote]} -> {campo: {valores que já existem no banco}}
+    existentes = {campo: set() for campo in valores_por_campo}
+    condicoes = [
+        getattr(modelo, campo).in_(valores)
+        for campo, valores in valores_por_campo.items()
+        if valores
+    ]
+
+    if not condicoes:
+        return existentes
+
+    query = select(*(getattr(modelo, campo) for campo in valores_por_campo)).where(
+        or_(*condicoes),
+        *filtros
+    )
+
+    for linha in db.session.execute(query):
+        for campo, valor in zip(valores_por_campo, linha):
+            if valor is not None and valor in valores_por_campo[campo]:
+                existentes[campo].add(valor)
+
+    return existentes
+
+def rejeitar_duplicados(validos, resultados, existentes, mensagens):
+    # Rejeita (409) os itens que repetem um valor único já cadastrado ou já
+    # usado por um item anterior do mesmo lote.
+    vistos = {campo: set() for campo in mensagens}
+
+    for indice, item in list(validos.items()):
+        conflitos = {
+            campo: [mensagem]
+            for campo, mensagem in mensagens.items()
+            if item.get(campo) is not None
+            and (item[campo] in existentes[campo] or item[campo] in vistos[campo])
+        }
+
+        if conflitos:
+            resultados[indice] = item_rejeitado(indice, 409, "Conflito com dados existentes", conflitos)
+            del validos[indice]
+            continue
+
+        for campo in mensagens:
+            if item.get(campo) is not None:
+                vistos[campo].add(item[campo])
+
+def resposta_do_lote(total, resultados):
+    itens = [resultados[indice] for indice in sorted(resultados)]
+    criados = sum(1 for item in itens if item["status"] == 201)
+
+    if criados == total:
+        status = 201
+    elif criados:
+        status = 207
+    else:
+        status = 422
+
+    return {
+        "criados": criados,
+        "rejeitados": total - criados,
+        "resultados": itens
+    }, status
@@ -1,6 +1,32 @@
 from sqlalchemy import text
 from helpers.database import db
 
+# Também usado por benchmarks/planos_de_consulta.py.
+SQL_CONFLITO_RESERVA = text("""
+    SELECT 1
+    FROM tb_reserva r
+    LEFT JOIN tb_reserva_dia d ON d.reserva_id = r.reserva_id
+    WHERE r.status = 'ativa'
+      AND r.deleted_at IS NULL  
+      AND r.sala_id = :sala_id
+      AND (:hora_inicio < r.hora_fim AND :hora_fim > r.hora_inicio)
+      AND r.data_inicio <= :data_inicio
+      AND (r.data_fim IS NULL OR r.data_fim >= :data_inicio)
+      AND (
+            -- 🔹 semanal
+            (r.frequencia = 'semanal' AND d.dia_semana = :dia_semana)
+
+            -- 🔹 mensal
+            OR (r.frequencia = 'mensal' AND EXTRACT(DAY FROM r.data_inicio) = :dia_mes)
+
+            -- 🔹 única
+            OR (r.frequencia = 'única' AND r.data_inicio = :data_inicio)
+      )
+      AND (:reserva_id_excluir IS NULL OR r.reserva_id <> :reserva_id_excluir)
+    LIMIT 1
+""")
+
+
 def existe_conflito_reserva_raw(
     sala_id,
     hora_inicio,
@@ -12,29 +38,7 @@ def existe_conflito_reserva_raw(
     dia_semana = data_inicio.weekday() + 1
     dia_mes = data_inicio.day
 
-    sql = text("""
-        SELECT 1
-        FROM tb_reserva r
-        LEFT JOIN tb_reserva_dia d ON d.reserva_id = r.reserva_id
-        WHERE r.status = 'ativa'
-          AND r.deleted_at IS NULL  
-          AND r.sala_id = :sala_id
-          AND (:hora_inicio < r.hora_fim AND :hora_fim > r.hora_inicio)
-          AND r.data_inicio <= :data_inicio
-          AND (r.data_fim IS NULL OR r.data_fim >= :data_inicio)
-          AND (
-                -- 🔹 semanal
-                (r.frequencia = 'semanal' AND d.dia_semana = :dia_semana)
-
-                -- 🔹 mensal
-                OR (r.frequencia = 'mensal' AND EXTRACT(DAY FROM r.data_inicio) = :dia_mes)
-
-                -- 🔹 única
-                OR (r.frequencia = 'única' AND r.data_inicio = :data_inicio)
-          )
-          AND (:reserva_id_excluir IS NULL OR r.reserva_id <> :reserva_id_excluir)
-        LIMIT 1
-    """)
+    sql = SQL_CONFLITO_RESERVA
 
     params = {
         "sala_id": sala_id,
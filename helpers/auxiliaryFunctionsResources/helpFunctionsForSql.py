@@ -1,53 +1,116 @@
-from flask import request
+from flask import request, abort
+from sqlalchemy import and_, or_
+from datetime import date, datetime, time
+import base64
+import binascii
+import json
+import operator
+import os
 
-def aplicar_ordenacao(query, campos, padrao):
-    sort = request.args.get("sort", "id")
-    order = request.args.get("order", "asc")
+# Paginação por cursor (keyset): é ativada quando a requisição traz "limit" ou
+# "cursor", e sempre nas listagens das tabelas que só crescem (retiradas,
+# reservas, histórico). Nas demais, sem esses parâmetros, a resposta continua
+# sendo a lista simples, por compatibilidade, limitada a LIMITE_SEM_PAGINACAO
+# linhas. A montagem da consulta fica em helpers.query_spec.
+FILTROS_PAGINACAO = ("limit", "cursor")
+LIMITE_PADRAO_PAGINA = int(os.getenv("PAGINACAO_LIMITE_PADRAO", 50))
+LIMITE_MAXIMO_PAGINA = int(os.getenv("PAGINACAO_LIMITE_MAXIMO", 500))
+LIMITE_SEM_PAGINACAO = int(os.getenv("PAGINACAO_LIMITE_SEM_PAGINACAO", 1000))
 
-    if order.lower() not in ("asc", "desc"):
-        order = "asc"
+def _valor_para_cursor(valor):
+    if isinstance(valor, (date, datetime, time)):
+        return valor.isoformat()
 
-    coluna = campos.get(sort, campos[padrao])
+    return valor
 
-    if order == "desc":
-        return query.order_by(coluna.desc())
 
-    return query.order_by(coluna.asc())
+# O valor do cursor precisa ter o tipo da coluna de ordenação: um cursor bem
+# formado com valor de outro tipo falharia no fromisoformat ou no banco.
+def valor_do_cursor(coluna, valor):
+    if valor is None:
+        return None
 
+    try:
+        tipo = coluna.type.python_type
+    except NotImplementedError:
+        return valor
 
-def aplicar_ordenacao_historico(sql):
-    sort = request.args.get("sort", "id")
-    order = request.args.get("order", "asc")
+    # datetime é subclasse de date, por isso vem primeiro.
+    for classe in (datetime, date, time):
+        if issubclass(tipo, classe):
+            if not isinstance(valor, str):
+                abort(400, description="Cursor inválido.")
 
-    campos = {
-        "id": "r.retirada_id",
-        "data": "r.data_retirada",
-        "sala": "s.sala_nome",
-        "responsavel": "resp.responsavel_nome",
-        "chave": "c.chave_nome"
-    }
+            try:
+                return classe.fromisoformat(valor)
+            except ValueError:
+                abort(400, description="Cursor inválido.")
 
-    coluna = campos.get(sort, campos["id"])
+    if tipo is float and isinstance(valor, int) and not isinstance(valor, bool):
+        return float(valor)
 
-    if order.lower() == "asc":
-        sql += f" ORDER BY {coluna} ASC"
-    else:
-        sql += f" ORDER BY {coluna} DESC"
+    # bool é subclasse de int: só vale para colunas booleanas.
+    if not isinstance(valor, tipo) or (isinstance(valor, bool) and tipo is not bool):
+        abort(400, description="Cursor inválido.")
 
-    return sql
+    return valor
 
 
-def aplicar_filtros_historico(sql, params):
-    if request.args.get("sala_id"):
-        sql += " AND s.sala_id = :sala_id"
-        params["sala_id"] = request.args.get("sala_id")
+def codificar_cursor(sort, order, valor, chave):
+    conteudo = json.dumps([sort, order, _valor_para_cursor(valor), chave], separators=(",", ":"))
+    return base64.urlsafe_b64encode(conteudo.encode()).decode().rstrip("=")
 
-    if request.args.get("responsavel_id"):
-        sql += " AND resp.responsavel_id = :responsavel_id"
-        params["responsavel_id"] = request.args.get("responsavel_id")
 
-    if request.args.get("responsavel_nome"):
-        sql += " AND LOWER(resp.responsavel_nome) LIKE :responsavel_nome"
-        params["responsavel_nome"] = f"%{request.args.get('responsavel_nome').lower()}%"
+def decodificar_cursor(cursor, sort, order):
+    try:
+        preenchimento = "=" * (-len(cursor) % 4)
+        cursor_sort, cursor_order, valor, chave = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        abort(400, description="Cursor inválido.")
+
+    # O cursor só vale para a ordenação em que foi gerado.
+    if (cursor_sort, cursor_order) != (sort, order):
+        abort(400, description="Cursor não corresponde à ordenação solicitada.")
+
+    # A chave de desempate é sempre a chave primária inteira.
+    if not isinstance(chave, int) or isinstance(chave, bool):
+        abort(400, description="Cursor inválido.")
+
+    return valor, chave
+
+
+def ler_limite():
+    limite = request.args.get("limit")
+
+    if limite is None or limite.strip() == "":
+        return LIMITE_PADRAO_PAGINA
+
+    try:
+        limite = int(limite)
+    except ValueError:
+        abort(400, description="O parâmetro limit deve ser um número inteiro.")
+
+    if not 1 <= limite <= LIMITE_MAXIMO_PAGINA:
+        abort(400, description=f"O parâmetro limit deve estar entre 1 e {LIMITE_MAXIMO_PAGINA}.")
+
+    return limite
+
+
+def condicao_apos_cursor(coluna, chave_primaria, order, valor, chave):
+    depois = operator.lt if order == "desc" else operator.gt
+    desempate = depois(chave_primaria, chave)
+
+    if coluna is chave_primaria:
+        return desempate
+
+    # NULLs ficam sempre no fim da ordenação (ver helpers.query_spec).
+    if valor is None:
+        return and_(coluna.is_(None), desempate)
+
+    condicao = or_(depois(coluna, valor), and_(coluna == valor, desempate))
+
+    if coluna.expression.nullable:
+        condicao = or_(condicao, coluna.is_(None))
+
+    return condicao
 
-    return sql, params
\ No newline at end of file
@@ -1,23 +1,312 @@
-from helpers.redis_cache import redis_client
-from helpers.logging import logger, log_exception
-from flask import request, abort
+from helpers.redis_cache import redis_client, redis_binary_client, run_guarded, redis_available, INDISPONIVEL, namespace_version, namespace_modified
+from helpers.local_cache import local_cache
+from helpers.cache_policy import politica_da_chave, COMPRESSAO_MINIMA_PADRAO
+from helpers.logging import logger
+from flask import request, abort, Response
+from werkzeug.http import http_date
+from datetime import datetime, timezone
+from functools import wraps
+from uuid import uuid4
+import hashlib
 import json
+import math
+import time
+import zlib
+
+# Todo acesso ao Redis passa por run_guarded (circuit breaker): com o Redis
+# indisponível as chaves de cache são None, as leituras viram "miss" e as
+# gravações são ignoradas, e a resposta sai direto do banco.
+#
+# Single-flight: quando a chave expira, apenas o worker que obtiver o lock
+# recalcula a listagem. Os demais devolvem a cópia "stale" (que vive mais que
+# o TTL normal, se a política do namespace permitir) ou aguardam brevemente o
+# novo valor.
+LOCK_TTL_MS = 5000
+ESPERA_MAXIMA = 2.0
+INTERVALO_ESPERA = 0.05
+
+# O cache guarda o corpo JSON final da resposta. Acima do limite da política
+# ele é comprimido com zlib e, se o cliente aceitar "deflate", é enviado como
+# está. O primeiro byte indica o formato: b"j" (JSON puro), b"z" (zlib) ou
+# b"n", marca de "não encontrado" cujo corpo é a resposta 404 a devolver.
+MARCADOR_AUSENTE = b"n"
+
+_liberarLock = redis_client.register_script("""
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+""")
+
+# Grava uma variante de listagem respeitando o limite de variantes por
+# geração do namespace. KEYS: conjunto de variantes, chave, chave stale.
+# ARGV: resumo da variante, limite, ttl, payload, ttl stale (0 = sem stale).
+_gravarVariante = redis_binary_client.register_script("""
+    if redis.call('SISMEMBER', KEYS[1], ARGV[1]) == 0 then
+        if redis.call('SCARD', KEYS[1]) >= tonumber(ARGV[2]) then
+            return 0
+        end
+        redis.call('SADD', KEYS[1], ARGV[1])
+        redis.call('EXPIRE', KEYS[1], tonumber(ARGV[5]) > 0 and ARGV[5] or ARGV[3])
+    end
+    redis.call('SETEX', KEYS[2], ARGV[3], ARGV[4])
+    if tonumber(ARGV[5]) > 0 then
+        redis.call('SETEX', KEYS[3], ARGV[5], ARGV[4])
+    end
+    return 1
+""")
+
+# Chave canônica de listagem: ordenação e filtros relevantes são normalizados
+# (valores padrão preenchidos, parâmetros desconhecidos ignorados) e resumidos
+# em um hash curto, para que cada variante da listagem tenha sua própria chave.
+# A ordenação vem da própria especificação que será executada, já normalizada.
+def montarChaveDeListagem(namespace, spec=None, filtros=(), projecao=None):
+    parametros = {}
+
+    if spec is not None:
+        parametros["sort"], parametros["order"] = spec.sort, spec.order
+
+    # Campos serializados, já validados e na ordem canônica (?fields=).
+    if projecao is not None:
+        parametros["fields"] = list(projecao)
+
+    for nome in filtros:
+        valor = request.args.get(nome)
+
+        if valor is not None and valor.strip() != "":
+            parametros[nome] = valor.strip()
+
+    # Tamanho de página efetivo (inclusive o padrão, sem ?limit=).
+    if spec is not None:
+        parametros["limit"] = spec.limit
+
+    canonico = json.dumps(parametros, sort_keys=True, separators=(",", ":"))
+    resumo = hashlib.sha1(canonico.encode()).hexdigest()[:16]
+
+    return redis_client.versioned_key(namespace, f"lista:{resumo}")
+
+def serializarResposta(resultado, compressao_minima=COMPRESSAO_MINIMA_PADRAO):
+    corpo = json.dumps(resultado, default=str, ensure_ascii=False, separators=(",", ":")).encode()
+
+    if len(corpo) >= compressao_minima:
+        return b"z" + zlib.compress(corpo)
+
+    return b"j" + corpo
+
+def respostaDoCache(payload, status=200):
+    formato, corpo = payload[:1], payload[1:]
+
+    if formato == MARCADOR_AUSENTE:
+        status = 404
+
+    resposta = Response(status=status, mimetype="application/json")
+    resposta.vary.add("Accept-Encoding")
+
+    if formato == b"z":
+        if request.accept_encodings["deflate"]:
+            resposta.headers["Content-Encoding"] = "deflate"
+        else:
+            corpo = zlib.decompress(corpo)
+
+    resposta.set_data(corpo)
+    return resposta
 
 def verificarRedisCache(nomeDoCampo,cacheKey):
-    try:
-        cache = redis_client.get(cacheKey)
-        logger.info(f"Verificando dados de {nomeDoCampo} no Redis Cache")
+    if cacheKey is None:
+        logger.info(f"Redis indisponível, buscando {nomeDoCampo} sem cache")
+        return None
+
+    cache = local_cache.get(cacheKey)
+
+    if cache is not None:
+        logger.info(f"Dados de {nomeDoCampo} encontrados no cache local")
         return cache
-        
-    except Exception:
-        log_exception(f"Erro ao acessar Redis de {nomeDoCampo}")
-        abort(500, f"Erro ao acessar Redis Cache de {nomeDoCampo}")
+
+    logger.info(f"Verificando dados de {nomeDoCampo} no Redis Cache")
+    cache = run_guarded(lambda: redis_binary_client.get(cacheKey), None)
+
+    if cache:
+        local_cache.set(cacheKey, cache, politica_da_chave(cacheKey).ttl)
+
+    return cache
 
 def preencherRedisCache(cacheKey, resultado):
-    redis_client.setex(
+    if cacheKey is None:
+        return serializarResposta(resultado)
+
+    politica = politica_da_chave(cacheKey)
+    payload = serializarResposta(resultado, politica.compressao_minima)
+
+    if run_guarded(lambda: redis_binary_client.setex(
             cacheKey,
-            10,
-            json.dumps(resultado, default=str)
-        )
+            politica.ttl,
+            payload
+        )) is not INDISPONIVEL:
+        local_cache.set(cacheKey, payload, politica.ttl)
+
+    return payload
+
+def registrarAusenciaNoCache(cacheKey, resposta):
+    # Cache negativo: ids inexistentes ou removidos respondem 404 do cache
+    # por um tempo curto. A marca é sobrescrita pelo write-through na criação.
+    if cacheKey is None:
+        return
+
+    politica = politica_da_chave(cacheKey)
+    payload = MARCADOR_AUSENTE + json.dumps(resposta, ensure_ascii=False).encode()
+
+    if run_guarded(lambda: redis_binary_client.setex(cacheKey, politica.ttl_negativo, payload)) is not INDISPONIVEL:
+        local_cache.set(cacheKey, payload, politica.ttl_negativo)
+
+def abortarNaoEncontrado(cacheKey, descricao):
+    registrarAusenciaNoCache(cacheKey, {"message": descricao})
+    abort(404, description=descricao)
+
+def gravarVarianteDeListagem(cacheKey, payload, politica):
+    prefixo, _, resumo = cacheKey.rpartition(":lista:")
+    ttlStale = politica.ttl * 2 if politica.stale_while_revalidate else 0
+
+    gravado = run_guarded(lambda: _gravarVariante(
+        keys=[f"{prefixo}:variantes", cacheKey, f"stale:{cacheKey}"],
+        args=[resumo, politica.max_variantes, politica.ttl, payload, ttlStale]
+    ))
+
+    if gravado is INDISPONIVEL:
+        return
+
+    if gravado:
+        local_cache.set(cacheKey, payload, politica.ttl)
+    else:
+        logger.info(f"Limite de variantes atingido para {prefixo}, resposta não cacheada")
+
+def buscarComSingleFlight(nomeDoCampo, cacheKey, consultar):
+    cache = verificarRedisCache(nomeDoCampo, cacheKey)
+
+    if cache:
+        logger.info(f"Retornando {nomeDoCampo} do Redis.")
+        return respostaDoCache(cache)
+
+    if cacheKey is None or not redis_available():
+        return respostaDoCache(serializarResposta(consultar()))
+
+    politica = politica_da_chave(cacheKey)
+    lockKey = f"lock:{cacheKey}"
+    token = uuid4().hex
+
+    adquirido = run_guarded(lambda: redis_client.set(lockKey, token, nx=True, px=LOCK_TTL_MS))
+
+    if adquirido is INDISPONIVEL:
+        return respostaDoCache(serializarResposta(consultar(), politica.compressao_minima))
+
+    if adquirido:
+        try:
+            payload = serializarResposta(consultar(), politica.compressao_minima)
+            gravarVarianteDeListagem(cacheKey, payload, politica)
+
+            return respostaDoCache(payload)
+        finally:
+            run_guarded(lambda: _liberarLock(keys=[lockKey], args=[token]))
+
+    if politica.stale_while_revalidate:
+        stale = run_guarded(lambda: redis_binary_client.get(f"stale:{cacheKey}"), None)
+
+        if stale:
+            logger.info(f"Retornando {nomeDoCampo} (stale) do Redis enquanto outro worker recalcula.")
+            return respostaDoCache(stale)
+
+    prazo = time.monotonic() + ESPERA_MAXIMA
+
+    while time.monotonic() < prazo and redis_available():
+        time.sleep(INTERVALO_ESPERA)
+        cache = run_guarded(lambda: redis_binary_client.get(cacheKey), None)
+
+        if cache:
+            logger.info(f"Retornando {nomeDoCampo} do Redis após aguardar o recálculo.")
+            return respostaDoCache(cache)
+
+    logger.info(f"Tempo de espera esgotado, consultando {nomeDoCampo} diretamente.")
+    return respostaDoCache(serializarResposta(consultar(), politica.compressao_minima))
+
+# GET condicional: o ETag é formado pelas gerações dos namespaces de que a
+# resposta depende, então um If-None-Match igual responde 304 sem consultar o
+# banco nem ler o payload do cache. Com o Redis indisponível não há
+# validadores e a resposta segue normalmente.
+def validadoresDosNamespaces(*namespaces):
+    versoes = []
+    modificado = None
+
+    for namespace in namespaces:
+        versao = namespace_version(namespace)
+
+        if versao is None:
+            return None, None
+
+        versoes.append(f"{namespace}.v{versao}")
+        instante = namespace_modified(namespace)
+
+        if instante is not None and (modificado is None or instante > modificado):
+            modificado = instante
+
+    # O Last-Modified tem resolução de segundos: arredonda para cima, para que
+    # ele nunca seja anterior à última escrita.
+    if modificado is not None:
+        modificado = datetime.fromtimestamp(math.ceil(modificado), timezone.utc)
+
+    return "-".join(versoes), modificado
+
+def naoModificado(etag, modificado):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+
+    return (
+        modificado is not None
+        and request.if_modified_since is not None
+        and modificado <= request.if_modified_since
+    )
+
+def cabecalhosDeValidacao(etag, modificado):
+    cabecalhos = {
+        "ETag": f'W/"{etag}"',
+        "Cache-Control": "no-cache"
+    }
+
+    # Enquanto o segundo do Last-Modified não termina, uma nova escrita nele
+    # teria o mesmo valor e o If-Modified-Since daria um 304 indevido: nesse
+    # intervalo só o ETag é enviado.
+    if modificado is not None and modificado.timestamp() <= time.time():
+        cabecalhos["Last-Modified"] = http_date(modificado)
+
+    return cabecalhos
+
+def validacaoCondicional(*namespaces):
+
+    def decorator(get):
+
+        @wraps(get)
+        def wrapper(*args, **kwargs):
+            etag, modificado = validadoresDosNamespaces(*namespaces)
+
+            if etag is None:
+                return get(*args, **kwargs)
+
+            cabecalhos = cabecalhosDeValidacao(etag, modificado)
+
+            if naoModificado(etag, modificado):
+                logger.info(f"Cliente já possui a versão atual de {', '.join(namespaces)}, retornando 304")
+                return Response(status=304, headers=cabecalhos)
+
+            resposta = get(*args, **kwargs)
+
+            if isinstance(resposta, Response):
+                if resposta.status_code == 200:
+                    resposta.headers.extend(cabecalhos)
+                return resposta
+
+            if isinstance(resposta, tuple) and len(resposta) == 2 and resposta[1] == 200:
+                return resposta[0], 200, cabecalhos
+
+            return resposta
+
+        return wrapper
 
-    
\ No newline at end of file
+    return decorator
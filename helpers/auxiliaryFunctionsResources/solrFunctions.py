@@ -39,38 +39,55 @@ def solrVerificationSala(text):
         log_exception("Erro ao buscar no Solr")
         abort(500, "Erro ao Buscar no Solr")
 
+def documentoResponsavel(responsavel):
+    return {
+        "id": str(responsavel.responsavel_id),
+        "responsavel_id": responsavel.responsavel_id,
+        "responsavel_nome": responsavel.responsavel_nome,
+        "responsavel_siap": responsavel.responsavel_siap,
+        "responsavel_matricula": responsavel.responsavel_matricula,
+        "responsavel_cpf": responsavel.responsavel_cpf,
+        "responsavel_data_nascimento": str(responsavel.responsavel_data_nascimento) if responsavel.responsavel_data_nascimento else None,
+        "email":responsavel.email,
+        "funcao":responsavel.funcao,
+        "ativo": responsavel.ativo
+    }
+
+def documentoSala(sala):
+    return {
+        "id": f"sala_{sala.sala_id}",
+        "sala_id": sala.sala_id,
+        "sala_nome": sala.sala_nome,
+        "disponivel": sala.disponivel
+    }
+
 def adicionarResponsavel(novo_responsavel):
     try:
-        doc_solr = {
-            "id": str(novo_responsavel.responsavel_id),
-            "responsavel_id": novo_responsavel.responsavel_id,
-            "responsavel_nome": novo_responsavel.responsavel_nome,
-            "responsavel_siap": novo_responsavel.responsavel_siap,
-            "responsavel_matricula": novo_responsavel.responsavel_matricula,
-            "responsavel_cpf": novo_responsavel.responsavel_cpf,
-            "responsavel_data_nascimento": str(novo_responsavel.responsavel_data_nascimento) if novo_responsavel.responsavel_data_nascimento else None,
-            "email":novo_responsavel.email,
-            "funcao":novo_responsavel.funcao,
-            "ativo": novo_responsavel.ativo
-        }
-        solr_client.add([doc_solr])
+        solr_client.add([documentoResponsavel(novo_responsavel)])
         logger.info(f"Responsável {novo_responsavel.responsavel_id} indexado no Solr.")
     except Exception:
         log_exception(f"Falha ao indexar no Solr. Id: {novo_responsavel.responsavel_id}") 
 
 def adicionarSala(nova_sala):
     try:
-        doc_solr = {
-            "id": f"sala_{nova_sala.sala_id}",
-            "sala_id": nova_sala.sala_id,
-            "sala_nome": nova_sala.sala_nome,
-            "disponivel": nova_sala.disponivel
-        }
-        solr_client.add([doc_solr])
+        solr_client.add([documentoSala(nova_sala)])
         logger.info(f"Sala {nova_sala.sala_id} indexado no Solr.")
     except Exception:
         log_exception(f"Falha ao indexar no Solr. Id: {nova_sala.sala_id}")
 
+# Lotes: um único add (e um único commit) para todos os documentos. Os
+# documentos são montados antes do commit no banco, enquanto os objetos ainda
+# estão carregados, e enviados depois dele.
+def adicionarDocumentos(documentos, descricao):
+    if not documentos:
+        return
+
+    try:
+        solr_client.add(documentos)
+        logger.info(f"{len(documentos)} {descricao} indexados no Solr.")
+    except Exception:
+        log_exception(f"Falha ao indexar lote de {len(documentos)} {descricao} no Solr")
+
 def deletarResponsavel(responsavel_id):
     try:
         solr_client.delete(id=str(responsavel_id))
@@ -1,127 +1,194 @@
-from helpers.redis_cache import redis_client
 from helpers.logging import logger, log_exception
-from flask import request, abort
+from flask import abort, Response, stream_with_context
 from helpers.database import db
-from sqlalchemy import text
-from helpers.auxiliaryFunctionsResources.helpFunctionsForSql import aplicar_ordenacao_historico, aplicar_filtros_historico
-
-def sqlRequisicaoGetAll():
+from helpers.database_pool import CONFIGURACAO_DA_CONEXAO
+from sqlalchemy import func, select, text
+from werkzeug.exceptions import HTTPException
+from helpers.query_spec import EspecificacaoDeConsulta, ESCOPO_TODOS
+from models.HistoricoRetiradas import TB_HistoricoRetirada
+from datetime import date, time
+import csv
+import io
+import json
+import os
+
+# O histórico é lido de tb_historico_retirada, já materializada com os nomes de
+# sala, chave e responsável (mantida pelos triggers do banco): cada listagem é
+# uma varredura de índice em uma única tabela, sem JOIN.
+COLUNAS_HISTORICO = (
+    TB_HistoricoRetirada.retirada_id,
+    TB_HistoricoRetirada.data_retirada,
+    TB_HistoricoRetirada.hora_retirada,
+    TB_HistoricoRetirada.hora_prevista_devolucao,
+    TB_HistoricoRetirada.data_devolucao,
+    TB_HistoricoRetirada.hora_devolucao,
+    TB_HistoricoRetirada.status,
+    TB_HistoricoRetirada.sala_id,
+    TB_HistoricoRetirada.sala_nome,
+    TB_HistoricoRetirada.chave_id,
+    TB_HistoricoRetirada.chave_nome,
+    TB_HistoricoRetirada.responsavel_id,
+    TB_HistoricoRetirada.responsavel_nome,
+)
+
+# Campos que podem ser pedidos em ?fields=.
+CAMPOS_HISTORICO = {coluna.key: coluna for coluna in COLUNAS_HISTORICO}
+
+CAMPOS_ORDENACAO_HISTORICO = {
+    "id": TB_HistoricoRetirada.retirada_id,
+    "data": TB_HistoricoRetirada.data_retirada,
+    "sala": TB_HistoricoRetirada.sala_nome,
+    "responsavel": TB_HistoricoRetirada.responsavel_nome,
+    "chave": TB_HistoricoRetirada.chave_nome
+}
+
+# responsavel_nome busca por trecho do nome, atendida pelo índice de trigramas
+# sobre lower(responsavel_nome).
+FILTROS_HISTORICO = {
+    "sala_id": TB_HistoricoRetirada.sala_id,
+    "responsavel_id": TB_HistoricoRetirada.responsavel_id,
+    "responsavel_nome": lambda nome: func.lower(TB_HistoricoRetirada.responsavel_nome).like(
+        f"%{nome.lower()}%"
+    ),
+    "data_inicio": lambda valor: TB_HistoricoRetirada.data_retirada >= date.fromisoformat(valor),
+    "data_fim": lambda valor: TB_HistoricoRetirada.data_retirada <= date.fromisoformat(valor)
+}
+
+# Exportação: linhas lidas do cursor do servidor em lotes deste tamanho, cada
+# lote serializado e enviado antes de buscar o próximo.
+HISTORICO_EXPORT_LOTE = int(os.getenv("HISTORICO_EXPORT_LOTE", 1000))
+
+# Entre um lote e outro a transação da exportação fica parada esperando o
+# cliente ler a resposta. Este é o idle_in_transaction_session_timeout (ms)
+# dela: maior que o DB_IDLE_IN_TRANSACTION_TIMEOUT_MS das requisições comuns,
+# mas finito, para que um cliente parado não segure a conexão indefinidamente.
+HISTORICO_EXPORT_IDLE_TIMEOUT_MS = int(os.getenv("HISTORICO_EXPORT_IDLE_TIMEOUT_MS", 300000))
+
+FORMATOS_EXPORTACAO = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson"
+}
+
+def _valorSerializado(valor):
+    if isinstance(valor, (date, time)):
+        return valor.isoformat()
+
+    return valor
+
+def especificacaoDoHistorico(campos=CAMPOS_HISTORICO):
+    return EspecificacaoDeConsulta.da_requisicao(
+        TB_HistoricoRetirada,
+        TB_HistoricoRetirada.retirada_id,
+        CAMPOS_ORDENACAO_HISTORICO,
+        filtros=FILTROS_HISTORICO,
+        escopo=ESCOPO_TODOS,
+        sempre_paginada=True
+    ).projetar(*campos.values())
+
+def sqlRequisicaoGetAll(spec, campos=CAMPOS_HISTORICO):
     try:
-        sql = """
-            SELECT
-                r.retirada_id,
-                r.data_retirada,
-                r.hora_retirada,
-                r.hora_prevista_devolucao,
-                r.data_devolucao,
-                r.hora_devolucao,
-                r.status,
-
-                s.sala_id,
-                s.sala_nome,
-
-                c.chave_id,
-                c.chave_nome,
-
-                resp.responsavel_id,
-                resp.responsavel_nome
-
-            FROM tb_retirada r
-
-            JOIN tb_chave c
-                ON c.chave_id = r.chave_id
-                AND c.deleted_at IS NULL
-
-            JOIN tb_sala s
-                ON s.sala_id = c.sala_id
-                AND s.deleted_at IS NULL
-
-            JOIN tb_responsavel resp
-                ON resp.responsavel_id = r.responsavel_id
-                AND resp.deleted_at IS NULL
-
-            WHERE r.deleted_at IS NULL
-        """
-
-        params = {}
-
-        if request.args.get("sala_id"):
-            sql += " AND s.sala_id = :sala_id"
-            params["sala_id"] = request.args.get("sala_id")
-
-        if request.args.get("responsavel_id"):
-            sql += " AND resp.responsavel_id = :responsavel_id"
-            params["responsavel_id"] = request.args.get("responsavel_id")
+        resultado = spec.executar(db.session)
 
-        if request.args.get("responsavel_nome"):
-            sql += " AND LOWER(resp.responsavel_nome) LIKE :responsavel_nome"
-            params["responsavel_nome"] = f"%{request.args.get('responsavel_nome').lower()}%"
+        def serializar(linhas):
+            return [
+                {nome: _valorSerializado(row[nome]) for nome in campos}
+            for row in linhas]
 
-        sql = aplicar_ordenacao_historico(sql)
+        return spec.montar_pagina(resultado, serializar)
 
-        resultado = db.session.execute(text(sql), params).mappings().all()
-
-        resultado = [
-            {
-                **dict(row),
-                "data_retirada": row["data_retirada"].isoformat() if row["data_retirada"] else None,
-                "hora_retirada": row["hora_retirada"].isoformat() if row["hora_retirada"] else None,
-                "data_devolucao": row["data_devolucao"].isoformat() if row["data_devolucao"] else None,
-                "hora_prevista_devolucao": row["hora_prevista_devolucao"].isoformat() if row["hora_prevista_devolucao"] else None,
-                "hora_devolucao": row["hora_devolucao"].isoformat() if row["hora_devolucao"] else None,
-            }
-        for row in resultado]
-
-        return resultado
+    except HTTPException:
+        raise
 
     except Exception:
         log_exception("Erro ao buscar Historico de Retiradas")
         abort(500, "Erro ao buscar Historico de Retiradas")
 
+# As linhas trazem os campos pedidos, na ordem de nomes, seguidos das colunas
+# que a ordenação acrescenta ao SELECT (descartadas aqui).
+def _serializarLoteCsv(nomes, linhas):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+
+    for linha in linhas:
+        escritor.writerow([_valorSerializado(valor) for valor in linha[:len(nomes)]])
+
+    return buffer.getvalue()
+
+def _serializarLoteNdjson(nomes, linhas):
+    return "".join(
+        json.dumps(
+            {nome: _valorSerializado(valor) for nome, valor in zip(nomes, linha)},
+            ensure_ascii=False
+        ) + "\n"
+        for linha in linhas
+    )
+
+def sqlRequisicaoExport(formato):
+    # Sem cache nem lista em memória: o SELECT é lido por um cursor do servidor
+    # (yield_per) e cada lote vai para o cliente assim que é serializado.
+    if formato not in FORMATOS_EXPORTACAO:
+        abort(400, description=f"Formato inválido. Use: {', '.join(FORMATOS_EXPORTACAO)}.")
+
+    campos = EspecificacaoDeConsulta.campos_da_requisicao(CAMPOS_HISTORICO)
+    nomes = list(campos)
+
+    spec = especificacaoDoHistorico(campos)
+
+    # A exportação é sempre completa: limit e cursor são ignorados.
+    query = spec.completa().compilar()
+    serializar = _serializarLoteCsv if formato == "csv" else _serializarLoteNdjson
+
+    def gerar():
+        if formato == "csv":
+            yield _serializarLoteCsv(nomes, [nomes])
+
+        resultado = None
+
+        try:
+            if db.session.get_bind().dialect.name == "postgresql":
+                db.session.execute(
+                    text(f"SET LOCAL idle_in_transaction_session_timeout = {HISTORICO_EXPORT_IDLE_TIMEOUT_MS}"),
+                    execution_options={CONFIGURACAO_DA_CONEXAO: True}
+                )
+
+            resultado = db.session.execute(
+                query,
+                execution_options={"yield_per": HISTORICO_EXPORT_LOTE}
+            )
+
+            for linhas in resultado.partitions():
+                yield serializar(nomes, linhas)
+
+        except Exception:
+            # O status já foi enviado: a resposta é interrompida sem o
+            # encerramento do corpo, e o cliente a recebe como incompleta.
+            log_exception("Erro ao exportar Historico de Retiradas")
+            raise
+
+        finally:
+            # Também no GeneratorExit (cliente desconectou ou a resposta foi
+            # fechada no meio): fecha o cursor do servidor e devolve a conexão
+            # ao pool sem esperar o fim da requisição.
+            if resultado is not None:
+                resultado.close()
+
+            db.session.rollback()
+
+    return Response(
+        stream_with_context(gerar()),
+        mimetype=FORMATOS_EXPORTACAO[formato],
+        headers={
+            "Content-Disposition": f"attachment; filename=historico.{formato}"
+        }
+    )
+
 def sqlRequisicaoGetById(retirada_id):
     try:
-        sql = """
-            SELECT
-                r.retirada_id,
-                r.data_retirada,
-                r.hora_retirada,
-                r.hora_prevista_devolucao,
-                r.data_devolucao,
-                r.hora_devolucao,
-                r.status,
-
-                s.sala_id,
-                s.sala_nome,
-
-                c.chave_id,
-                c.chave_nome,
-
-                resp.responsavel_id,
-                resp.responsavel_nome
-
-            FROM tb_retirada r
-
-            JOIN tb_chave c
-                ON c.chave_id = r.chave_id
-                AND c.deleted_at IS NULL
-
-            JOIN tb_sala s
-                ON s.sala_id = c.sala_id
-                AND s.deleted_at IS NULL
-
-            JOIN tb_responsavel resp
-                ON resp.responsavel_id = r.responsavel_id
-                AND resp.deleted_at IS NULL
-
-            WHERE
-                r.deleted_at IS NULL
-                AND r.retirada_id = :retirada_id
-        """
+        query = select(*COLUNAS_HISTORICO).where(
+            TB_HistoricoRetirada.retirada_id == retirada_id
+        )
 
-        row = db.session.execute(
-            text(sql),
-            {"retirada_id": retirada_id}
-        ).mappings().first()
+        row = db.session.execute(query).mappings().first()
 
         if not row:
             return {"erro": "Histórico não encontrado"}, 404
@@ -147,4 +214,4 @@ def sqlRequisicaoGetById(retirada_id):
 
     except Exception:
         log_exception(f"Erro ao buscar histórico por ID")
-        abort(500, "Erro ao buscar histórico")
\ No newline at end of file
+        abort(500, "Erro ao buscar histórico")
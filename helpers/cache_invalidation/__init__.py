@@ -0,0 +1,210 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from helpers.database import db
+from helpers.logging import logger, log_exception
+from helpers.redis_cache import redis_client, entity_key, entity_namespace
+from helpers.auxiliaryFunctionsResources.redisCacheFunctions import serializarResposta
+from helpers.cache_policy import politica_do_namespace
+
+# Grafo de invalidação: para cada tabela, os namespaces de cache cujo
+# conteúdo depende dela. O histórico junta retirada, chave, sala e
+# responsável, por isso é invalidado por qualquer uma delas.
+DEPENDENCIAS_DO_CACHE = {
+    "tb_sala": ("salas", "historico"),
+    "tb_chave": ("chaves", "historico"),
+    "tb_responsavel": ("responsaveis", "historico"),
+    "tb_retirada": ("retiradas", "historico"),
+    "tb_reserva": ("reservas",),
+    "tb_reserva_dia": ("reservas",),
+}
+
+# Tabelas cujas linhas também são cacheadas individualmente ({namespace}:{id}).
+NAMESPACE_DAS_ENTIDADES = {
+    "tb_sala": "salas",
+    "tb_chave": "chaves",
+    "tb_responsavel": "responsaveis",
+    "tb_retirada": "retiradas",
+    "tb_reserva": "reservas",
+}
+
+# Write-through: tabela -> função que monta a resposta da entidade.
+# Registrado pelos services, que conhecem o formato das respostas.
+ESCRITA_DIRETA = {}
+
+CHAVE_PENDENTES = "cache_namespaces_pendentes"
+CHAVE_ENTIDADES = "cache_entidades_pendentes"
+
+# Opção de execução dos INSERT em lote com RETURNING cujas entidades são
+# registradas pelo chamador (registrar_entidades): os ids são conhecidos, então
+# o namespace das entidades não precisa ser descartado inteiro.
+ENTIDADES_REGISTRADAS = "cache_entidades_registradas"
+
+# Opção de execução das escritas em colunas que nenhuma resposta da API
+# serializa (contadores internos): não invalidam cache algum.
+SEM_INVALIDACAO = "cache_sem_invalidacao"
+
+
+def registrar_escrita_direta(modelo, serializar):
+    ESCRITA_DIRETA[modelo.__tablename__] = serializar
+
+
+def _pendentes(session):
+    return session.info.setdefault(CHAVE_PENDENTES, set())
+
+
+def _entidades(session):
+    return session.info.setdefault(CHAVE_ENTIDADES, {})
+
+
+def registrar_invalidacao(*tabelas, session=None):
+    # Para escritas que não passam pelo flush do ORM (SQL textual).
+    session = session or db.session()
+    for tabela in tabelas:
+        _pendentes(session).update(DEPENDENCIAS_DO_CACHE.get(tabela, ()))
+
+
+def _registrar_entidade(session, obj, removida=False):
+    tabela = obj.__tablename__
+    atributo_id = obj.__mapper__.primary_key[0].key
+    chave = (NAMESPACE_DAS_ENTIDADES[tabela], getattr(obj, atributo_id))
+
+    # Aqui (possivelmente dentro do flush) só a identidade é anotada: a
+    # resposta é montada no before_commit, quando o serializador pode carregar
+    # relações sem emitir SQL no meio do flush. Sem serializador registrado,
+    # a entidade apenas sai do cache.
+    if tabela not in ESCRITA_DIRETA or removida:
+        _entidades(session)[chave] = None
+    else:
+        _entidades(session)[chave] = obj
+
+
+def _serializar_entidade(obj):
+    if getattr(obj, "deleted_at", None) is not None:
+        return None
+
+    tabela = obj.__tablename__
+    politica = politica_do_namespace(NAMESPACE_DAS_ENTIDADES[tabela])
+
+    return (
+        serializarResposta(ESCRITA_DIRETA[tabela](obj), politica.compressao_minima),
+        politica.ttl
+    )
+
+
+def registrar_entidades(*objs, session=None):
+    session = session or db.session()
+
+    for obj in objs:
+        tabela = obj.__tablename__
+        _pendentes(session).update(DEPENDENCIAS_DO_CACHE.get(tabela, ()))
+
+        if tabela in NAMESPACE_DAS_ENTIDADES:
+            _registrar_entidade(session, obj)
+
+
+def descartar_entidades(modelo, *ids, session=None):
+    # Para UPDATEs em SQL Core (fora do ORM) com ids conhecidos: invalida as
+    # listagens da tabela e tira só essas entidades do cache.
+    session = session or db.session()
+    tabela = modelo.__tablename__
+    registrar_invalidacao(tabela, session=session)
+
+    for entidade_id in ids:
+        _entidades(session)[(NAMESPACE_DAS_ENTIDADES[tabela], entidade_id)] = None
+
+
+@event.listens_for(Session, "after_flush")
+def _coletar_namespaces(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        tabela = getattr(obj, "__tablename__", None)
+
+        if tabela in DEPENDENCIAS_DO_CACHE:
+            registrar_invalidacao(tabela, session=session)
+
+        if tabela in NAMESPACE_DAS_ENTIDADES:
+            _registrar_entidade(session, obj, removida=obj in session.deleted)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _coletar_namespaces_em_lote(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+
+    if orm_execute_state.execution_options.get(SEM_INVALIDACAO):
+        return
+
+    tabela = getattr(orm_execute_state.statement, "table", None)
+
+    if tabela is None:
+        return
+
+    registrar_invalidacao(tabela.name, session=orm_execute_state.session)
+
+    if orm_execute_state.execution_options.get(ENTIDADES_REGISTRADAS):
+        return
+
+    # Os ids alterados por uma escrita em lote não são conhecidos: descarta
+    # todas as entidades do namespace (inclusive marcas de "não encontrado").
+    if tabela.name in NAMESPACE_DAS_ENTIDADES:
+        _pendentes(orm_execute_state.session).add(
+            entity_namespace(NAMESPACE_DAS_ENTIDADES[tabela.name])
+        )
+
+
+@event.listens_for(Session, "before_commit")
+def _serializar_entidades(session):
+    # O commit ainda faria este flush; adiantá-lo anota as entidades ainda
+    # pendentes e garante que a serialização (com as cargas de relação que
+    # ela fizer) roda fora dele, na mesma transação.
+    session.flush()
+
+    entidades = session.info.get(CHAVE_ENTIDADES)
+
+    if not entidades:
+        return
+
+    for chave, obj in list(entidades.items()):
+        if obj is None or isinstance(obj, tuple):
+            continue
+
+        try:
+            entidades[chave] = _serializar_entidade(obj)
+        except Exception:
+            log_exception(f"Falha ao serializar {chave[0]} {chave[1]} para o cache")
+            entidades[chave] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_namespaces(session):
+    namespaces = session.info.pop(CHAVE_PENDENTES, None)
+    entidades = session.info.pop(CHAVE_ENTIDADES, None)
+
+    if not namespaces and not entidades:
+        return
+
+    namespaces = set(namespaces or ())
+    chaves_das_entidades = {}
+
+    for (namespace, entidade_id), payload in (entidades or {}).items():
+        chave = entity_key(namespace, entidade_id)
+
+        # Época desconhecida (Redis fora do ar): descarta o namespace inteiro.
+        if chave is None:
+            namespaces.add(entity_namespace(namespace))
+        # Anotada depois do before_commit (não serializada): só sai do cache.
+        elif not isinstance(payload, tuple):
+            chaves_das_entidades[chave] = None
+        else:
+            chaves_das_entidades[chave] = payload
+
+    try:
+        if redis_client.invalidate_namespace(*sorted(namespaces), entities=chaves_das_entidades):
+            logger.info(f"Cache invalidado para: {', '.join(sorted(namespaces))}")
+    except Exception:
+        log_exception("Falha ao invalidar o cache após o commit")
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _descartar_namespaces(session, previous_transaction):
+    session.info.pop(CHAVE_PENDENTES, None)
+    session.info.pop(CHAVE_ENTIDADES, None)
@@ -0,0 +1,82 @@
+import os
+
+TTL_PADRAO = int(os.getenv("CACHE_TTL_PADRAO", 300))
+TTL_NEGATIVO_PADRAO = int(os.getenv("CACHE_TTL_NEGATIVO", 30))
+COMPRESSAO_MINIMA_PADRAO = int(os.getenv("CACHE_COMPRESSAO_MINIMA", 1024))
+
+
+class PoliticaDeCache:
+
+    def __init__(self, ttl, ttl_negativo, max_variantes, compressao_minima, stale_while_revalidate):
+        self.ttl = ttl
+        self.ttl_negativo = ttl_negativo
+        self.max_variantes = max_variantes
+        self.compressao_minima = compressao_minima
+        self.stale_while_revalidate = stale_while_revalidate
+
+    def __repr__(self):
+        return (
+            f"PoliticaDeCache(ttl={self.ttl}, ttl_negativo={self.ttl_negativo}, "
+            f"max_variantes={self.max_variantes}, "
+            f"compressao_minima={self.compressao_minima}, "
+            f"stale_while_revalidate={self.stale_while_revalidate})"
+        )
+
+
+# Valores padrão por namespace. Cada um pode ser sobrescrito por variáveis de
+# ambiente: CACHE_<NAMESPACE>_TTL, CACHE_<NAMESPACE>_TTL_NEGATIVO (tempo de
+# vida das marcas de "não encontrado"), CACHE_<NAMESPACE>_MAX_VARIANTES,
+# CACHE_<NAMESPACE>_COMPRESSAO_MINIMA e CACHE_<NAMESPACE>_STALE (true/false).
+# max_variantes limita quantas combinações de ordenação/filtros de listagem
+# ficam no cache por geração do namespace.
+POLITICAS_PADRAO = {
+    "salas": dict(ttl=900, max_variantes=16, stale_while_revalidate=True),
+    "responsaveis": dict(ttl=900, max_variantes=16, stale_while_revalidate=True),
+    "chaves": dict(ttl=300, max_variantes=16, stale_while_revalidate=True),
+    "reservas": dict(ttl=300, max_variantes=16, stale_while_revalidate=True),
+    "retiradas": dict(ttl=60, max_variantes=16, stale_while_revalidate=False),
+    "historico": dict(ttl=300, max_variantes=64, stale_while_revalidate=True),
+}
+
+
+def _env(namespace, nome, padrao, converter=int):
+    valor = os.getenv(f"CACHE_{namespace.upper()}_{nome}")
+
+    if valor is None or valor.strip() == "":
+        return padrao
+
+    return converter(valor)
+
+
+def _bool(valor):
+    return valor.strip().lower() in ("1", "true", "sim", "yes")
+
+
+def _montar_politica(namespace):
+    padrao = POLITICAS_PADRAO.get(namespace, {})
+
+    return PoliticaDeCache(
+        ttl=_env(namespace, "TTL", padrao.get("ttl", TTL_PADRAO)),
+        ttl_negativo=_env(namespace, "TTL_NEGATIVO", padrao.get("ttl_negativo", TTL_NEGATIVO_PADRAO)),
+        max_variantes=_env(namespace, "MAX_VARIANTES", padrao.get("max_variantes", 16)),
+        compressao_minima=_env(namespace, "COMPRESSAO_MINIMA", padrao.get("compressao_minima", COMPRESSAO_MINIMA_PADRAO)),
+        stale_while_revalidate=_env(namespace, "STALE", padrao.get("stale_while_revalidate", True), _bool),
+    )
+
+
+POLITICAS = {
+    namespace: _montar_politica(namespace)
+    for namespace in POLITICAS_PADRAO
+}
+
+
+def politica_do_namespace(namespace):
+    if namespace not in POLITICAS:
+        POLITICAS[namespace] = _montar_politica(namespace)
+
+    return POLITICAS[namespace]
+
+
+def politica_da_chave(cache_key):
+    # As chaves de cache sempre começam pelo namespace: "salas:v3:...".
+    return politica_do_namespace(cache_key.split(":", 1)[0])
@@ -1,12 +1,111 @@
+from flask import g, has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from sqlalchemy.orm import DeclarativeBase
 from helpers.application import app
 from flask_migrate import Migrate
+from helpers.database_pool import configurar_engine, binds_das_replicas, DB_REPLICA_JANELA_PRIMARIO
+from helpers.redis_cache import namespace_modified
+from functools import wraps
+import random
+import time
+
+# Cookie com o instante até o qual as leituras do cliente ficam no primário
+# (read-your-writes): gravado em toda escrita bem-sucedida.
+COOKIE_PRIMARIO = "kc_ler_primario"
+
+REPLICAS = tuple(binds_das_replicas())
 
 
 class Base(DeclarativeBase):
     pass
 
-db = SQLAlchemy(model_class=Base)
+
+# Sessão com roteamento de leitura: nas requisições marcadas com
+# @leitura_em_replica, toda consulta (ORM ou SQL textual) vai para uma réplica
+# sorteada uma vez por requisição. O flush e o restante continuam no primário.
+class SessaoComReplicas(Session):
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing:
+            replica = replica_da_requisicao()
+
+            if replica is not None:
+                return replica
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(model_class=Base, session_options={"class_": SessaoComReplicas})
 db.init_app(app)
-migrate = Migrate(app, db)
\ No newline at end of file
+
+with app.app_context():
+    configurar_engine(db.engine)
+
+    for replica in REPLICAS:
+        configurar_engine(db.engines[replica], replica)
+
+migrate = Migrate(app, db)
+
+
+def _cliente_fixado_no_primario():
+    try:
+        return float(request.cookies.get(COOKIE_PRIMARIO, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def _namespace_recem_modificado(namespaces):
+    # Uma réplica atrasada não pode preencher o cache compartilhado com dados
+    # anteriores à última escrita do namespace.
+    agora = time.time()
+
+    for namespace in namespaces:
+        modificado = namespace_modified(namespace)
+
+        if modificado is not None and agora - modificado < DB_REPLICA_JANELA_PRIMARIO:
+            return True
+
+    return False
+
+
+def replica_da_requisicao():
+    if not REPLICAS or not has_request_context() or not g.get("leitura_em_replica"):
+        return None
+
+    if "replica" not in g:
+        g.replica = db.engines[random.choice(REPLICAS)]
+
+    return g.replica
+
+
+def leitura_em_replica(*namespaces):
+
+    def decorator(view):
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            g.leitura_em_replica = bool(REPLICAS) and not (
+                _cliente_fixado_no_primario()
+                or _namespace_recem_modificado(namespaces)
+            )
+
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@app.after_request
+def _fixar_leituras_no_primario(resposta):
+    if REPLICAS and request.method not in ("GET", "HEAD", "OPTIONS") and resposta.status_code < 400:
+        resposta.set_cookie(
+            COOKIE_PRIMARIO,
+            str(time.time() + DB_REPLICA_JANELA_PRIMARIO),
+            max_age=int(DB_REPLICA_JANELA_PRIMARIO) + 1,
+            httponly=True,
+            samesite="Lax"
+        )
+
+    return resposta
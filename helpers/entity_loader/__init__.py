@@ -0,0 +1,122 @@
+from collections import defaultdict
+from flask import g, has_app_context
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.util import identity_key
+from helpers.database import db
+
+# Relações carregadas junto de cada modelo (selectinload), registradas pelos
+# repositórios. Guardadas pelo nome: as opções só são montadas na consulta,
+# depois que todos os mappers foram configurados.
+RELACOES_CARREGADAS = {}
+
+
+def registrar_relacoes_carregadas(modelo, *relacoes):
+    RELACOES_CARREGADAS[modelo] = relacoes
+
+
+# Carregador de entidades por requisição, no estilo DataLoader: memoriza cada
+# (modelo, id) já buscado (inclusive os inexistentes) e agrupa os ids
+# agendados de um mesmo modelo em um único SELECT ... WHERE id IN (...).
+# Entidades com deleted_at preenchido são tratadas como inexistentes.
+class CarregadorDeEntidades:
+
+    def __init__(self, session):
+        self.session = session
+        self._entidades = {}
+        self._pendentes = defaultdict(set)
+
+    def agendar(self, modelo, *ids):
+        for entidade_id in ids:
+            if entidade_id is not None and (modelo, entidade_id) not in self._entidades:
+                self._pendentes[modelo].add(entidade_id)
+
+    def carregar(self, modelo, entidade_id):
+        if entidade_id is None:
+            return None
+
+        if (modelo, entidade_id) not in self._entidades:
+            self.agendar(modelo, entidade_id)
+            self._buscar_pendentes(modelo)
+
+        return self._ativa(self._entidades[(modelo, entidade_id)])
+
+    def carregar_varios(self, modelo, ids):
+        self.agendar(modelo, *ids)
+        self._buscar_pendentes(modelo)
+
+        return {
+            entidade_id: self._ativa(self._entidades.get((modelo, entidade_id)))
+            for entidade_id in ids
+        }
+
+    def descartar(self):
+        self._entidades.clear()
+        self._pendentes.clear()
+
+    def _buscar_pendentes(self, modelo):
+        ids = self._pendentes.pop(modelo, set())
+        faltantes = []
+
+        # O que já está no identity map da sessão não volta ao banco.
+        for entidade_id in ids:
+            entidade = self.session.identity_map.get(identity_key(modelo, entidade_id))
+
+            if entidade is None:
+                faltantes.append(entidade_id)
+            else:
+                self._entidades[(modelo, entidade_id)] = entidade
+
+        if not faltantes:
+            return
+
+        chave_primaria = modelo.__mapper__.primary_key[0]
+        query = (
+            select(modelo)
+            .options(*(
+                selectinload(getattr(modelo, relacao))
+                for relacao in RELACOES_CARREGADAS.get(modelo, ())
+            ))
+            .where(chave_primaria.in_(faltantes))
+        )
+
+        encontradas = {
+            getattr(entidade, chave_primaria.key): entidade
+            for entidade in self.session.execute(query).scalars()
+        }
+
+        for entidade_id in faltantes:
+            self._entidades[(modelo, entidade_id)] = encontradas.get(entidade_id)
+
+    @staticmethod
+    def _ativa(entidade):
+        if entidade is None or getattr(entidade, "deleted_at", None) is not None:
+            return None
+
+        return entidade
+
+
+def carregador_da_requisicao():
+    if not has_app_context():
+        return CarregadorDeEntidades(db.session)
+
+    if "carregador_de_entidades" not in g:
+        g.carregador_de_entidades = CarregadorDeEntidades(db.session)
+
+    return g.carregador_de_entidades
+
+
+def carregar_entidade(modelo, entidade_id):
+    return carregador_da_requisicao().carregar(modelo, entidade_id)
+
+
+def carregar_entidades(modelo, ids):
+    return carregador_da_requisicao().carregar_varios(modelo, ids)
+
+
+# Após um rollback as entidades novas saem da sessão: a memória do
+# carregador deixa de valer.
+@event.listens_for(Session, "after_soft_rollback")
+def _descartar_carregador(session, previous_transaction):
+    if has_app_context() and "carregador_de_entidades" in g:
+        g.carregador_de_entidades.descartar()
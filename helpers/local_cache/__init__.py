@@ -0,0 +1,60 @@
+from collections import OrderedDict
+import os
+import threading
+import time
+
+LOCAL_CACHE_MAX_ITENS = int(os.getenv("LOCAL_CACHE_MAX_ITENS", 512))
+LOCAL_CACHE_TTL = float(os.getenv("LOCAL_CACHE_TTL", 5))
+
+# Cache L1 por processo (cada worker do uWSGI tem o seu). É limitado em número
+# de itens (LRU) e cada item expira pelo próprio TTL, que serve de rede de
+# segurança caso alguma mensagem de invalidação via pub/sub se perca.
+class LocalCache:
+
+    def __init__(self, max_itens, ttl):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._itens.get(key)
+
+            if item is None:
+                return None
+
+            expira_em, value = item
+
+            if expira_em < time.monotonic():
+                del self._itens[key]
+                return None
+
+            self._itens.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+
+        with self._lock:
+            self._itens[key] = (time.monotonic() + ttl, value)
+            self._itens.move_to_end(key)
+
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._itens.pop(key, None)
+
+    def invalidate_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._itens if k.startswith(prefix)]:
+                del self._itens[key]
+
+    def clear(self):
+        with self._lock:
+            self._itens.clear()
+
+
+local_cache = LocalCache(LOCAL_CACHE_MAX_ITENS, LOCAL_CACHE_TTL)
@@ -0,0 +1,72 @@
+from flask import g, has_request_context, request, jsonify
+from functools import wraps
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from helpers.application import app
+from helpers.database_pool import CONFIGURACAO_DA_CONEXAO
+from helpers.logging import logger
+import os
+
+# Contagem de comandos SQL por requisição, para flagrar N+1:
+#   SQL_CONTAGEM_MODO=desligado (padrão) não conta nada;
+#   SQL_CONTAGEM_MODO=log devolve o total no cabeçalho X-Consultas-SQL e
+#     registra um aviso quando o limite da rota é ultrapassado;
+#   SQL_CONTAGEM_MODO=assert faz a requisição falhar com 500 nesse caso
+#     (para desenvolvimento e testes).
+# O limite é declarado nas rotas com @limite_de_consultas(n).
+MODO = os.getenv("SQL_CONTAGEM_MODO", "desligado").strip().lower()
+
+MODOS = ("desligado", "log", "assert")
+
+if MODO not in MODOS:
+    raise ValueError(f"SQL_CONTAGEM_MODO deve ser um de: {', '.join(MODOS)}")
+
+
+def limite_de_consultas(limite):
+
+    def decorator(view):
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            g.limite_consultas_sql = limite
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+if MODO != "desligado":
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _contar_consulta(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and context.execution_options.get(CONFIGURACAO_DA_CONEXAO):
+            return
+
+        if has_request_context():
+            g.consultas_sql = g.get("consultas_sql", 0) + 1
+
+    @app.after_request
+    def _verificar_consultas(resposta):
+        total = g.get("consultas_sql", 0)
+        limite = g.get("limite_consultas_sql")
+
+        resposta.headers["X-Consultas-SQL"] = str(total)
+
+        if limite is None or total <= limite:
+            return resposta
+
+        mensagem = (
+            f"{request.method} {request.path} executou {total} consultas SQL "
+            f"(limite da rota: {limite})"
+        )
+
+        if MODO == "log":
+            logger.warning(mensagem)
+            return resposta
+
+        logger.error(mensagem)
+        erro = jsonify({"message": mensagem})
+        erro.status_code = 500
+        erro.headers["X-Consultas-SQL"] = str(total)
+        return erro
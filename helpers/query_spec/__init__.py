@@ -0,0 +1,279 @@
+from collections.abc import Mapping
+from datetime import date, datetime, time
+from flask import request, abort
+from sqlalchemy import select
+from sqlalchemy.orm import QueryableAttribute, ColumnProperty
+from helpers.auxiliaryFunctionsResources.helpFunctionsForSql import (
+    FILTROS_PAGINACAO,
+    codificar_cursor,
+    decodificar_cursor,
+    ler_limite,
+    LIMITE_SEM_PAGINACAO,
+    condicao_apos_cursor,
+    valor_do_cursor
+)
+from helpers.logging import logger
+import operator
+
+# Escopos de soft delete aceitos pela especificação.
+ESCOPO_ATIVOS = "ativos"
+ESCOPO_REMOVIDOS = "removidos"
+ESCOPO_TODOS = "todos"
+
+# Parâmetro com a lista de campos pedidos (?fields=a,b), que reduz tanto o
+# SELECT quanto a serialização.
+PARAMETRO_CAMPOS = "fields"
+
+
+def _converter_filtro(coluna, valor):
+    try:
+        tipo = coluna.type.python_type
+    except NotImplementedError:
+        return valor
+
+    if tipo is bool:
+        if valor.lower() in ("1", "true", "sim"):
+            return True
+        if valor.lower() in ("0", "false", "nao", "não"):
+            return False
+        raise ValueError(valor)
+
+    # datetime é subclasse de date, por isso vem primeiro.
+    for classe in (datetime, date, time):
+        if issubclass(tipo, classe):
+            return classe.fromisoformat(valor)
+
+    return tipo(valor)
+
+
+def _valor_da_linha(linha, coluna):
+    if isinstance(linha, Mapping):
+        return linha[coluna.key]
+
+    return getattr(linha, coluna.key)
+
+
+# Especificação de consulta: filtros, ordenação, projeção, paginação e escopo
+# de soft delete descritos em um objeto que os repositórios compilam em um
+# único SELECT. Os services montam a especificação a partir da requisição
+# (da_requisicao) e a repassam para o get_all do repositório.
+class EspecificacaoDeConsulta:
+
+    def __init__(self, modelo, chave_primaria, escopo=ESCOPO_ATIVOS):
+        self.modelo = modelo
+        self.chave_primaria = chave_primaria
+        self.escopo = escopo
+        self.filtros = []
+        self.projecao = None
+        self.sort = None
+        self.order = "asc"
+        self.coluna_ordenacao = chave_primaria
+        self.limit = None
+        self.posicao = None
+        self.teto = None
+        self.opcoes = []
+
+    def filtrar(self, *condicoes):
+        self.filtros.extend(condicoes)
+        return self
+
+    def ordenar(self, coluna, order="asc", sort=None):
+        self.coluna_ordenacao = coluna
+        self.order = order
+        self.sort = sort
+        return self
+
+    def projetar(self, *colunas):
+        self.projecao = list(colunas) or None
+        return self
+
+    def projetar_campos(self, campos):
+        # Seleciona só as colunas dos campos serializados ({nome: campo} do
+        # marshal). Se algum campo não é coluna do modelo (relação, campo
+        # calculado), a entidade completa continua sendo carregada.
+        colunas = []
+
+        for nome, campo in campos.items():
+            atributo = getattr(self.modelo, getattr(campo, "attribute", None) or nome, None)
+
+            if not isinstance(atributo, QueryableAttribute) or not isinstance(atributo.property, ColumnProperty):
+                return self
+
+            colunas.append(atributo)
+
+        return self.projetar(*colunas)
+
+    def carregar(self, *opcoes):
+        # Estratégias de carregamento (selectinload, ...) das relações que
+        # serão serializadas, evitando uma consulta por linha.
+        self.opcoes.extend(opcoes)
+        return self
+
+    def paginar(self, limit, posicao=None):
+        self.limit = limit
+        self.posicao = posicao
+        return self
+
+    def completa(self):
+        # Todas as linhas, sem página nem teto (exportação).
+        self.limit = None
+        self.posicao = None
+        self.teto = None
+        return self
+
+    @property
+    def paginada(self):
+        return self.limit is not None
+
+    @classmethod
+    def da_requisicao(cls, modelo, chave_primaria, campos_ordenacao, padrao="id", filtros=None, escopo=ESCOPO_ATIVOS, sempre_paginada=False):
+        # filtros: {parâmetro: coluna} para igualdade, ou {parâmetro: função}
+        # que recebe o valor bruto e devolve a condição SQL.
+        # sempre_paginada: sem limit nem cursor, devolve a primeira página
+        # (LIMITE_PADRAO_PAGINA) em vez da lista simples.
+        spec = cls(modelo, chave_primaria, escopo)
+        spec.teto = LIMITE_SEM_PAGINACAO
+
+        for nome, filtro in (filtros or {}).items():
+            valor = request.args.get(nome)
+
+            if valor is None or valor.strip() == "":
+                continue
+
+            try:
+                if isinstance(filtro, QueryableAttribute):
+                    spec.filtrar(filtro == _converter_filtro(filtro, valor.strip()))
+                else:
+                    spec.filtrar(filtro(valor.strip()))
+            except ValueError:
+                abort(400, description=f"Valor inválido para o filtro {nome}.")
+
+        sort = request.args.get("sort", padrao)
+        order = request.args.get("order", "asc").lower()
+
+        if sort not in campos_ordenacao:
+            sort = padrao
+
+        if order not in ("asc", "desc"):
+            order = "asc"
+
+        spec.ordenar(campos_ordenacao[sort], order, sort)
+
+        cursor = request.args.get("cursor")
+
+        if sempre_paginada or request.args.get("limit") is not None or cursor:
+            posicao = None
+
+            if cursor:
+                valor, chave = decodificar_cursor(cursor, sort, order)
+                posicao = (valor_do_cursor(spec.coluna_ordenacao, valor), chave)
+
+            spec.paginar(ler_limite(), posicao)
+
+        return spec
+
+    @staticmethod
+    def campos_da_requisicao(campos):
+        # Subconjunto de {nome: campo} pedido em ?fields=, na ordem de campos.
+        valor = request.args.get(PARAMETRO_CAMPOS)
+
+        if valor is None or valor.strip() == "":
+            return campos
+
+        nomes = {nome.strip() for nome in valor.split(",") if nome.strip()}
+        desconhecidos = sorted(nomes - set(campos))
+
+        if desconhecidos:
+            abort(400, description=f"Campos inválidos: {', '.join(desconhecidos)}.")
+
+        if not nomes:
+            abort(400, description="Informe ao menos um campo em fields.")
+
+        return {nome: campo for nome, campo in campos.items() if nome in nomes}
+
+    @staticmethod
+    def parametros(filtros=None):
+        # Parâmetros da requisição que alteram o resultado (para a chave de cache).
+        return (*FILTROS_PAGINACAO, *(filtros or {}))
+
+    def compilar(self):
+        if self.projecao is None:
+            query = select(self.modelo).options(*self.opcoes)
+        else:
+            colunas = list(self.projecao)
+
+            # A paginação precisa da coluna de ordenação e da chave primária.
+            for coluna in (self.coluna_ordenacao, self.chave_primaria):
+                if not any(coluna is projetada for projetada in colunas):
+                    colunas.append(coluna)
+
+            query = select(*colunas)
+
+        if self.escopo == ESCOPO_ATIVOS:
+            query = query.where(self.modelo.deleted_at.is_(None))
+        elif self.escopo == ESCOPO_REMOVIDOS:
+            query = query.where(self.modelo.deleted_at.is_not(None))
+
+        if self.filtros:
+            query = query.where(*self.filtros)
+
+        # Ordena pela coluna pedida com a chave primária como desempate, o que
+        # torna a ordem estável e permite continuar a partir da última linha
+        # devolvida (WHERE (coluna, id) > (:valor, :id)) em vez de usar OFFSET.
+        coluna = self.coluna_ordenacao
+        direcao = operator.methodcaller(self.order)
+
+        if coluna is self.chave_primaria:
+            query = query.order_by(direcao(coluna))
+        elif coluna.expression.nullable:
+            query = query.order_by(direcao(coluna).nulls_last(), direcao(self.chave_primaria))
+        else:
+            query = query.order_by(direcao(coluna), direcao(self.chave_primaria))
+
+        # A lista simples traz uma linha além do teto para detectar o corte.
+        if not self.paginada:
+            return query if self.teto is None else query.limit(self.teto + 1)
+
+        if self.posicao is not None:
+            query = query.where(
+                condicao_apos_cursor(coluna, self.chave_primaria, self.order, *self.posicao)
+            )
+
+        # Uma linha a mais indica se existe próxima página.
+        return query.limit(self.limit + 1)
+
+    def executar(self, session):
+        resultado = session.execute(self.compilar())
+
+        if self.projecao is None:
+            return resultado.scalars().all()
+
+        return resultado.mappings().all()
+
+    def montar_pagina(self, linhas, serializar):
+        if not self.paginada:
+            if self.teto is not None and len(linhas) > self.teto:
+                logger.warning(
+                    f"Listagem de {self.modelo.__tablename__} sem paginação cortada em "
+                    f"{self.teto} linhas; use limit e cursor para o restante"
+                )
+                linhas = linhas[:self.teto]
+
+            return serializar(linhas)
+
+        proximo_cursor = None
+
+        if len(linhas) > self.limit:
+            linhas = linhas[:self.limit]
+            ultima = linhas[-1]
+            proximo_cursor = codificar_cursor(
+                self.sort,
+                self.order,
+                _valor_da_linha(ultima, self.coluna_ordenacao),
+                _valor_da_linha(ultima, self.chave_primaria)
+            )
+
+        return {
+            "itens": serializar(linhas),
+            "next_cursor": proximo_cursor
+        }
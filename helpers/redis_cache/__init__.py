@@ -1,31 +1,335 @@
 from redis import Redis
-import json
+from redis.exceptions import RedisError
+from helpers.local_cache import local_cache
+from helpers.logging import logger, log_exception
 import os
+import threading
+import time
 
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 
+CANAL_INVALIDACAO = os.getenv("REDIS_CANAL_INVALIDACAO", "cache:invalidacao")
+
+# Timeouts curtos: com o Redis fora do ar, a primeira chamada falha rápido e
+# as seguintes nem chegam ao socket enquanto o circuito estiver aberto.
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 0.2))
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", 0.2))
+REDIS_FALHAS_PARA_ABRIR = int(os.getenv("REDIS_FALHAS_PARA_ABRIR", 3))
+REDIS_INTERVALO_SONDAGEM = float(os.getenv("REDIS_INTERVALO_SONDAGEM", 2))
+
 redis_client = Redis(
     host=REDIS_HOST,
     port=REDIS_PORT,
     db=0,
-    decode_responses=True
+    decode_responses=True,
+    socket_timeout=REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=REDIS_CONNECT_TIMEOUT
+)
+
+# Cliente para payloads já serializados (e possivelmente comprimidos), que
+# precisam sair do Redis como bytes, sem decodificação.
+redis_binary_client = Redis(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    db=0,
+    decode_responses=False,
+    socket_timeout=REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=REDIS_CONNECT_TIMEOUT
 )
 
-def cache_get(key: str):
-    value = redis_client.get(key)
-    return json.loads(value) if value else None
+# O pub/sub fica bloqueado lendo o socket à espera de mensagens, então não
+# pode usar o timeout de leitura curto dos demais clientes.
+redis_pubsub_client = Redis(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    db=0,
+    decode_responses=True,
+    socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+    socket_keepalive=True,
+    health_check_interval=30
+)
+
+
+# Circuit breaker: após REDIS_FALHAS_PARA_ABRIR falhas seguidas o circuito
+# abre e toda operação no Redis é pulada (o chamador segue direto para o
+# banco). Uma thread sonda o Redis a cada REDIS_INTERVALO_SONDAGEM segundos e
+# fecha o circuito quando ele volta a responder.
+class CircuitBreaker:
+
+    FECHADO = "fechado"
+    ABERTO = "aberto"
+
+    def __init__(self, nome, limite_falhas, intervalo_sondagem, sondar):
+        self.nome = nome
+        self.limite_falhas = limite_falhas
+        self.intervalo_sondagem = intervalo_sondagem
+        self._sondar = sondar
+        self._lock = threading.Lock()
+        self._ao_fechar = []
+
+        self.estado = self.FECHADO
+        self.falhas_consecutivas = 0
+        self.aberto_desde = None
+        self.ultimo_erro = None
+        self.aberturas = 0
+
+    def disponivel(self):
+        return self.estado == self.FECHADO
+
+    def ao_fechar(self, callback):
+        self._ao_fechar.append(callback)
+        return callback
+
+    def registrar_sucesso(self):
+        if self.falhas_consecutivas:
+            with self._lock:
+                self.falhas_consecutivas = 0
+
+    def registrar_falha(self, erro):
+        with self._lock:
+            self.falhas_consecutivas += 1
+            self.ultimo_erro = f"{type(erro).__name__}: {erro}"
+
+            if self.estado == self.ABERTO or self.falhas_consecutivas < self.limite_falhas:
+                return
+
+            self.estado = self.ABERTO
+            self.aberto_desde = time.time()
+            self.aberturas += 1
+
+        logger.warning(f"Circuito do {self.nome} aberto após {self.falhas_consecutivas} falhas: {self.ultimo_erro}")
+
+        threading.Thread(
+            target=self._sondar_ate_recuperar,
+            name=f"sondagem-{self.nome}",
+            daemon=True
+        ).start()
+
+    def _sondar_ate_recuperar(self):
+        while True:
+            time.sleep(self.intervalo_sondagem)
+
+            try:
+                self._sondar()
+            except Exception as erro:
+                self.ultimo_erro = f"{type(erro).__name__}: {erro}"
+                continue
+
+            with self._lock:
+                self.estado = self.FECHADO
+                self.falhas_consecutivas = 0
+                self.aberto_desde = None
+
+            logger.info(f"Circuito do {self.nome} fechado, conexão restabelecida")
+
+            for callback in self._ao_fechar:
+                try:
+                    callback()
+                except Exception:
+                    log_exception(f"Erro ao executar recuperação do {self.nome}")
+            return
+
+    def status(self):
+        return {
+            "estado": self.estado,
+            "falhas_consecutivas": self.falhas_consecutivas,
+            "aberto_desde": self.aberto_desde,
+            "ultimo_erro": self.ultimo_erro,
+            "aberturas": self.aberturas,
+            "limite_falhas": self.limite_falhas,
+            "intervalo_sondagem": self.intervalo_sondagem
+        }
+
+
+circuit_breaker = CircuitBreaker(
+    "Redis",
+    REDIS_FALHAS_PARA_ABRIR,
+    REDIS_INTERVALO_SONDAGEM,
+    redis_client.ping
+)
+
+# Valor devolvido por run_guarded quando o Redis não pôde ser consultado,
+# distinto de None (chave inexistente).
+INDISPONIVEL = object()
+
+def redis_available():
+    return circuit_breaker.disponivel()
+
+def run_guarded(operation, default=INDISPONIVEL):
+    if not circuit_breaker.disponivel():
+        return default
+
+    try:
+        result = operation()
+    except RedisError as erro:
+        circuit_breaker.registrar_falha(erro)
+        logger.warning(f"Falha ao acessar o Redis, seguindo sem cache: {erro}")
+        return default
+
+    circuit_breaker.registrar_sucesso()
+    return result
+
+# Cada namespace (salas, chaves, ...) possui um contador de geração que faz
+# parte das chaves de cache. Invalidar o namespace é um único INCR: as chaves
+# da geração anterior deixam de ser lidas e expiram sozinhas pelo TTL.
+def generation_key(namespace: str):
+    return f"geracao:{namespace}"
+
+# Junto da geração fica o instante da última invalidação do namespace, usado
+# como Last-Modified nas respostas (None se ele nunca foi invalidado).
+def modified_key(namespace: str):
+    return f"{generation_key(namespace)}:modificado"
+
+# Sem o Redis a geração não é conhecida: namespace_version devolve None e as
+# chaves derivadas também, o que faz os chamadores pularem o cache.
+def _generation(namespace: str):
+    start_invalidation_listener()
+
+    key = generation_key(namespace)
+    generation = local_cache.get(key)
+
+    if generation is None:
+        values = run_guarded(lambda: redis_client.mget(key, modified_key(namespace)))
+
+        if values is INDISPONIVEL:
+            return None, None
+
+        version, modified = values
+        generation = (int(version) if version else 0, float(modified) if modified else None)
+        local_cache.set(key, generation)
+
+    return generation
+
+def namespace_version(namespace: str):
+    return _generation(namespace)[0]
+
+def namespace_modified(namespace: str):
+    return _generation(namespace)[1]
+
+def versioned_key(namespace: str, suffix):
+    version = namespace_version(namespace)
+
+    if version is None:
+        return None
+
+    return f"{namespace}:v{version}:{suffix}"
+
+# Entidades individuais (salas:{id}, chaves:{id}, ...) não usam a geração das
+# listagens: são sobrescritas ou removidas uma a uma após cada escrita, e só
+# são descartadas em bloco (pela "época" do namespace) quando um UPDATE em
+# lote altera linhas cujos ids não são conhecidos.
+def entity_namespace(namespace: str):
+    return f"{namespace}:entidades"
+
+def entity_key(namespace: str, entity_id):
+    return versioned_key(entity_namespace(namespace), entity_id)
+
+def forget_local_namespace(namespace: str):
+    local_cache.delete(generation_key(namespace))
+    local_cache.invalidate_prefix(f"{namespace}:")
+
+# Invalidações que não chegaram ao Redis. São reaplicadas quando o circuito
+# fecha; como as entidades afetadas não podem mais ser gravadas uma a uma, a
+# época inteira do namespace de entidades é descartada.
+_pending_invalidations = set()
+_pending_lock = threading.Lock()
+
+def invalidate_namespace(*namespaces: str, entities=None):
+    # entities: {chave: (payload, ttl)} gravados (write-through) ou, quando o
+    # valor é None, removidos no mesmo pipeline da invalidação.
+    def execute():
+        pipe = redis_binary_client.pipeline(transaction=False)
+        modified = time.time()
+        for namespace in namespaces:
+            pipe.incr(generation_key(namespace))
+            pipe.set(modified_key(namespace), modified)
+        for key, value in (entities or {}).items():
+            if value is None:
+                pipe.delete(key)
+            else:
+                payload, ttl = value
+                pipe.setex(key, ttl, payload)
+        if namespaces:
+            pipe.publish(CANAL_INVALIDACAO, ",".join(namespaces))
+        return pipe.execute()
+
+    executed = run_guarded(execute) is not INDISPONIVEL
+
+    for namespace in namespaces:
+        forget_local_namespace(namespace)
+
+    if not executed:
+        with _pending_lock:
+            _pending_invalidations.update(namespaces)
+            _pending_invalidations.update(key.rsplit(":v", 1)[0] for key in (entities or {}))
+
+        logger.warning(f"Redis indisponível, invalidação adiada: {', '.join(namespaces)}")
+
+    return executed
+
+@circuit_breaker.ao_fechar
+def _replay_pending_invalidations():
+    # Mensagens de outros processos podem ter se perdido durante a queda.
+    local_cache.clear()
+
+    with _pending_lock:
+        namespaces = sorted(_pending_invalidations)
+        _pending_invalidations.clear()
+
+    if namespaces and invalidate_namespace(*namespaces):
+        logger.info(f"Invalidações adiadas reaplicadas: {', '.join(namespaces)}")
+
+
+# O listener é iniciado sob demanda e por PID: o uWSGI carrega a aplicação no
+# master e faz fork dos workers, e threads não sobrevivem ao fork.
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+def _listen_invalidations():
+    while True:
+        if not circuit_breaker.disponivel():
+            local_cache.clear()
+            time.sleep(REDIS_INTERVALO_SONDAGEM)
+            continue
+
+        try:
+            pubsub = redis_pubsub_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(CANAL_INVALIDACAO)
+
+            for message in pubsub.listen():
+                for namespace in message["data"].split(","):
+                    forget_local_namespace(namespace)
+
+        except Exception:
+            log_exception("Conexão de invalidação do cache local perdida")
+
+        # Mensagens podem ter sido perdidas enquanto desconectado.
+        local_cache.clear()
+        time.sleep(1)
+
+def start_invalidation_listener():
+    global _listener_pid
+
+    if _listener_pid == os.getpid():
+        return
 
-def cache_set(key, value, expire_seconds=10):
-    redis_client.set(key, json.dumps(value), ex=expire_seconds)
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
 
-def delete_pattern(pattern: str):
-    keys = redis_client.keys(pattern)
-    for k in keys:
-        redis_client.delete(k)
+        local_cache.clear()
+        threading.Thread(
+            target=_listen_invalidations,
+            name="cache-invalidacao",
+            daemon=True
+        ).start()
+        _listener_pid = os.getpid()
+        logger.info(f"Listener de invalidação do cache local iniciado (pid {_listener_pid})")
 
 
 redis_client = redis_client
-redis_client.get_cache = cache_get
-redis_client.set_cache = cache_set
-redis_client.delete_pattern = delete_pattern
\ No newline at end of file
+redis_client.versioned_key = versioned_key
+redis_client.entity_key = entity_key
+redis_client.invalidate_namespace = invalidate_namespace
+redis_client.circuit_breaker = circuit_breaker
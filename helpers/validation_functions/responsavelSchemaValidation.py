@@ -2,32 +2,41 @@ from marshmallow import ValidationError
 from helpers.database import db
 from datetime import date
 
+# Também usadas pelo cadastro em lote, que verifica a unicidade de todos os
+# itens em uma única consulta.
+MENSAGENS_UNICIDADE_RESPONSAVEL = {
+    "responsavel_cpf": "Já existe um Responsavel cadastrado com esse CPF.",
+    "responsavel_siap": "Já existe um Responsavel cadastrado com esse SIAPE.",
+    "responsavel_matricula": "Já existe um Responsavel cadastrado com essa Matricula.",
+    "email": "Já existe um Responsavel cadastrado com essa Email."
+}
+
 def validar_unique_cpf(value):
     from models.Responsavel import TB_Responsavel
     if db.session.query(TB_Responsavel).filter_by(responsavel_cpf=value).first():
         raise ValidationError(
-            "Já existe um Responsavel cadastrado com esse CPF."
+            MENSAGENS_UNICIDADE_RESPONSAVEL["responsavel_cpf"]
         )
 
 def validar_unique_siap(value):
     from models.Responsavel import TB_Responsavel
     if db.session.query(TB_Responsavel).filter_by(responsavel_siap=value).first():
         raise ValidationError(
-            "Já existe um Responsavel cadastrado com esse SIAPE."
+            MENSAGENS_UNICIDADE_RESPONSAVEL["responsavel_siap"]
         )
     
 def validar_unique_matricula(value):
     from models.Responsavel import TB_Responsavel
     if db.session.query(TB_Responsavel).filter_by(responsavel_matricula=value).first():
         raise ValidationError(
-            "Já existe um Responsavel cadastrado com essa Matricula."
+            MENSAGENS_UNICIDADE_RESPONSAVEL["responsavel_matricula"]
         )
     
 def validar_unique_email(value):
     from models.Responsavel import TB_Responsavel
     if db.session.query(TB_Responsavel).filter_by(email=value).first():
         raise ValidationError(
-            "Já existe um Responsavel cadastrado com essa Email."
+            MENSAGENS_UNICIDADE_RESPONSAVEL["email"]
         )
     
 
@@ -0,0 +1,88 @@
+"""adicao de indices parciais e compostos
+
+Revision ID: 4c2a7e9d1b35
+Revises: dc5b850fea9c
+Create Date: 2026-10-17 09:12:41.530218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c2a7e9d1b35'
+down_revision = 'dc5b850fea9c'
+branch_labels = None
+depends_on = None
+
+
+# (nome, tabela, colunas, predicado do índice parcial ou None)
+# Também lido por benchmarks/planos_de_consulta.py.
+INDICES = [
+    (
+        "ix_tb_retirada_chave_ativa",
+        "tb_retirada",
+        ["chave_id"],
+        "status IN ('retirada', 'atrasada') AND deleted_at IS NULL"
+    ),
+    (
+        "ix_tb_retirada_data",
+        "tb_retirada",
+        ["data_retirada", "retirada_id"],
+        "deleted_at IS NULL"
+    ),
+    (
+        "ix_tb_retirada_responsavel",
+        "tb_retirada",
+        ["responsavel_id"],
+        "deleted_at IS NULL"
+    ),
+    (
+        "ix_tb_chave_sala",
+        "tb_chave",
+        ["sala_id"],
+        None
+    ),
+    (
+        "ix_tb_reserva_sala_periodo_ativa",
+        "tb_reserva",
+        ["sala_id", "data_inicio", "data_fim"],
+        "status = 'ativa' AND deleted_at IS NULL"
+    ),
+    (
+        "ix_tb_reserva_dia_reserva_dia",
+        "tb_reserva_dia",
+        ["reserva_id", "dia_semana"],
+        None
+    ),
+]
+
+
+def upgrade():
+    # CONCURRENTLY não bloqueia escritas durante a criação, mas não pode
+    # rodar dentro de uma transação.
+    with op.get_context().autocommit_block():
+        for nome, tabela, colunas, predicado in INDICES:
+            op.create_index(
+                nome,
+                tabela,
+                colunas,
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(predicado) if predicado else None
+            )
+
+    for tabela in sorted({tabela for _, tabela, _, _ in INDICES}):
+        op.execute(f"ANALYZE {tabela}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for nome, tabela, _, _ in reversed(INDICES):
+            op.drop_index(
+                nome,
+                table_name=tabela,
+                if_exists=True,
+                postgresql_concurrently=True
+            )
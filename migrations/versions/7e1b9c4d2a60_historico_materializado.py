@@ -0,0 +1,253 @@
+"""historico materializado
+
+Revision ID: 7e1b9c4d2a60
+Revises: 4c2a7e9d1b35
+Create Date: 2026-10-17 10:41:07.284913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e1b9c4d2a60'
+down_revision = '4c2a7e9d1b35'
+branch_labels = None
+depends_on = None
+
+
+# (nome, colunas) dos índices da tabela de histórico.
+INDICES_HISTORICO = [
+    ("ix_tb_historico_retirada_data", ["data_retirada", "retirada_id"]),
+    ("ix_tb_historico_retirada_sala", ["sala_id", "retirada_id"]),
+    ("ix_tb_historico_retirada_responsavel", ["responsavel_id", "retirada_id"]),
+    ("ix_tb_historico_retirada_sala_nome", ["sala_nome", "retirada_id"]),
+    ("ix_tb_historico_retirada_chave_nome", ["chave_nome", "retirada_id"]),
+    ("ix_tb_historico_retirada_responsavel_nome", ["responsavel_nome", "retirada_id"]),
+]
+
+# Recalcula as linhas do histórico das retiradas informadas a partir das
+# tabelas de origem: a linha existe apenas enquanto retirada, chave, sala e
+# responsável estiverem ativos (mesmo critério do antigo JOIN da API). Usa
+# upsert em vez de DELETE + INSERT para que dois recálculos concorrentes da
+# mesma retirada não colidam na chave primária.
+SQL_RECALCULAR = """
+    CREATE OR REPLACE FUNCTION historico_recalcular(ids integer[]) RETURNS void AS $$
+    BEGIN
+        IF ids IS NULL OR cardinality(ids) = 0 THEN
+            RETURN;
+        END IF;
+
+        WITH atuais AS (
+            SELECT
+                r.retirada_id, r.data_retirada, r.hora_retirada, r.hora_prevista_devolucao,
+                r.data_devolucao, r.hora_devolucao, r.status,
+                s.sala_id, s.sala_nome, c.chave_id, c.chave_nome, resp.responsavel_id, resp.responsavel_nome
+            FROM tb_retirada r
+            JOIN tb_chave c
+                ON c.chave_id = r.chave_id
+                AND c.deleted_at IS NULL
+            JOIN tb_sala s
+                ON s.sala_id = c.sala_id
+                AND s.deleted_at IS NULL
+            JOIN tb_responsavel resp
+                ON resp.responsavel_id = r.responsavel_id
+                AND resp.deleted_at IS NULL
+            WHERE r.retirada_id = ANY(ids)
+                AND r.deleted_at IS NULL
+        ), removidas AS (
+            DELETE FROM tb_historico_retirada h
+            WHERE h.retirada_id = ANY(ids)
+                AND NOT EXISTS (SELECT 1 FROM atuais a WHERE a.retirada_id = h.retirada_id)
+        )
+        INSERT INTO tb_historico_retirada AS h (
+            retirada_id, data_retirada, hora_retirada, hora_prevista_devolucao,
+            data_devolucao, hora_devolucao, status,
+            sala_id, sala_nome, chave_id, chave_nome, responsavel_id, responsavel_nome
+        )
+        SELECT * FROM atuais
+        ON CONFLICT (retirada_id) DO UPDATE SET
+            data_retirada = EXCLUDED.data_retirada,
+            hora_retirada = EXCLUDED.hora_retirada,
+            hora_prevista_devolucao = EXCLUDED.hora_prevista_devolucao,
+            data_devolucao = EXCLUDED.data_devolucao,
+            hora_devolucao = EXCLUDED.hora_devolucao,
+            status = EXCLUDED.status,
+            sala_id = EXCLUDED.sala_id,
+            sala_nome = EXCLUDED.sala_nome,
+            chave_id = EXCLUDED.chave_id,
+            chave_nome = EXCLUDED.chave_nome,
+            responsavel_id = EXCLUDED.responsavel_id,
+            responsavel_nome = EXCLUDED.responsavel_nome
+        WHERE h IS DISTINCT FROM EXCLUDED;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+# Triggers por comando (FOR EACH STATEMENT) com tabelas de transição: um
+# UPDATE em lote recalcula todas as retiradas afetadas de uma vez. Nas
+# tabelas de chave, sala e responsável só contam as linhas em que mudou
+# alguma coluna copiada para o histórico (ou o deleted_at).
+SQL_FUNCOES_DOS_TRIGGERS = [
+    """
+    CREATE OR REPLACE FUNCTION tg_historico_retirada() RETURNS trigger AS $$
+    BEGIN
+        PERFORM historico_recalcular(ARRAY(SELECT retirada_id FROM novas));
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION tg_historico_chave() RETURNS trigger AS $$
+    BEGIN
+        PERFORM historico_recalcular(ARRAY(
+            SELECT r.retirada_id
+            FROM novas n
+            JOIN antigas a ON a.chave_id = n.chave_id
+            JOIN tb_retirada r ON r.chave_id = n.chave_id AND r.deleted_at IS NULL
+            WHERE (n.chave_nome, n.sala_id, n.deleted_at)
+                IS DISTINCT FROM (a.chave_nome, a.sala_id, a.deleted_at)
+        ));
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION tg_historico_sala() RETURNS trigger AS $$
+    BEGIN
+        PERFORM historico_recalcular(ARRAY(
+            SELECT r.retirada_id
+            FROM novas n
+            JOIN antigas a ON a.sala_id = n.sala_id
+            JOIN tb_chave c ON c.sala_id = n.sala_id
+            JOIN tb_retirada r ON r.chave_id = c.chave_id AND r.deleted_at IS NULL
+            WHERE (n.sala_nome, n.deleted_at) IS DISTINCT FROM (a.sala_nome, a.deleted_at)
+        ));
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION tg_historico_responsavel() RETURNS trigger AS $$
+    BEGIN
+        PERFORM historico_recalcular(ARRAY(
+            SELECT r.retirada_id
+            FROM novas n
+            JOIN antigas a ON a.responsavel_id = n.responsavel_id
+            JOIN tb_retirada r ON r.responsavel_id = n.responsavel_id AND r.deleted_at IS NULL
+            WHERE (n.responsavel_nome, n.deleted_at)
+                IS DISTINCT FROM (a.responsavel_nome, a.deleted_at)
+        ));
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+]
+
+# (nome, tabela, evento, função)
+TRIGGERS = [
+    ("tr_historico_retirada_insert", "tb_retirada", "INSERT", "tg_historico_retirada"),
+    ("tr_historico_retirada_update", "tb_retirada", "UPDATE", "tg_historico_retirada"),
+    ("tr_historico_chave_update", "tb_chave", "UPDATE", "tg_historico_chave"),
+    ("tr_historico_sala_update", "tb_sala", "UPDATE", "tg_historico_sala"),
+    ("tr_historico_responsavel_update", "tb_responsavel", "UPDATE", "tg_historico_responsavel"),
+]
+
+SQL_VIEW_ANTIGA = """
+    CREATE OR REPLACE VIEW vw_historico_retiradas AS
+    SELECT
+        r.retirada_id,
+        r.data_retirada,
+        r.hora_retirada,
+        r.hora_prevista_devolucao,
+        r.hora_devolucao,
+        r.status,
+
+        s.sala_id,
+        s.sala_nome,
+
+        c.chave_id,
+        c.chave_nome,
+
+        resp.responsavel_id,
+        resp.responsavel_nome
+    FROM tb_retirada r
+    JOIN tb_chave c ON c.chave_id = r.chave_id
+    JOIN tb_sala s ON s.sala_id = c.sala_id
+    JOIN tb_responsavel resp ON resp.responsavel_id = r.responsavel_id
+    WHERE r.status = 'finalizada';
+"""
+
+
+def upgrade():
+    # A view filtrava um status ('finalizada') que nenhuma retirada tem.
+    op.execute("DROP VIEW IF EXISTS vw_historico_retiradas")
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.create_table(
+        'tb_historico_retirada',
+        sa.Column('retirada_id', sa.Integer(), nullable=False),
+        sa.Column('data_retirada', sa.Date(), nullable=False),
+        sa.Column('hora_retirada', sa.Time(), nullable=False),
+        sa.Column('hora_prevista_devolucao', sa.Time(), nullable=False),
+        sa.Column('data_devolucao', sa.Date(), nullable=True),
+        sa.Column('hora_devolucao', sa.Time(), nullable=True),
+        sa.Column('status', sa.String(length=9), nullable=False),
+        sa.Column('sala_id', sa.Integer(), nullable=False),
+        sa.Column('sala_nome', sa.String(length=255), nullable=False),
+        sa.Column('chave_id', sa.Integer(), nullable=False),
+        sa.Column('chave_nome', sa.String(length=255), nullable=False),
+        sa.Column('responsavel_id', sa.Integer(), nullable=False),
+        sa.Column('responsavel_nome', sa.String(length=255), nullable=False),
+        sa.ForeignKeyConstraint(['retirada_id'], ['tb_retirada.retirada_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('retirada_id')
+    )
+
+    # Usado pelo trigger de chave e sala para achar as retiradas de uma chave.
+    op.create_index(
+        'ix_tb_retirada_chave',
+        'tb_retirada',
+        ['chave_id'],
+        unique=False,
+        postgresql_where=sa.text("deleted_at IS NULL")
+    )
+
+    op.execute(SQL_RECALCULAR)
+
+    for funcao in SQL_FUNCOES_DOS_TRIGGERS:
+        op.execute(funcao)
+
+    for nome, tabela, evento, funcao in TRIGGERS:
+        transicao = "NEW TABLE AS novas" if evento == "INSERT" else "OLD TABLE AS antigas NEW TABLE AS novas"
+        op.execute(
+            f"CREATE TRIGGER {nome} AFTER {evento} ON {tabela} "
+            f"REFERENCING {transicao} FOR EACH STATEMENT EXECUTE FUNCTION {funcao}()"
+        )
+
+    # Carga inicial, antes dos índices (mais rápido do que mantê-los linha a linha).
+    op.execute("SELECT historico_recalcular(ARRAY(SELECT retirada_id FROM tb_retirada))")
+
+    for nome, colunas in INDICES_HISTORICO:
+        op.create_index(nome, 'tb_historico_retirada', colunas, unique=False)
+
+    op.execute(
+        "CREATE INDEX ix_tb_historico_retirada_responsavel_nome_trgm "
+        "ON tb_historico_retirada USING gin (lower(responsavel_nome) gin_trgm_ops)"
+    )
+
+    op.execute("ANALYZE tb_historico_retirada")
+
+
+def downgrade():
+    for nome, tabela, _, _ in reversed(TRIGGERS):
+        op.execute(f"DROP TRIGGER IF EXISTS {nome} ON {tabela}")
+
+    for funcao in ("tg_historico_responsavel", "tg_historico_sala", "tg_historico_chave", "tg_historico_retirada"):
+        op.execute(f"DROP FUNCTION IF EXISTS {funcao}()")
+
+    op.execute("DROP FUNCTION IF EXISTS historico_recalcular(integer[])")
+
+    op.drop_index('ix_tb_retirada_chave', table_name='tb_retirada')
+    op.drop_table('tb_historico_retirada')
+
+    op.execute(SQL_VIEW_ANTIGA)
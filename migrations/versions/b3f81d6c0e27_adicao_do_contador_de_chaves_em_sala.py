@@ -0,0 +1,41 @@
+"""Adicao do contador de chaves em sala
+
+Revision ID: b3f81d6c0e27
+Revises: 7e1b9c4d2a60
+Create Date: 2026-10-17 11:52:40.731266
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f81d6c0e27'
+down_revision = '7e1b9c4d2a60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tb_sala', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('contador_chaves', sa.Integer(), server_default='0', nullable=False))
+
+    # Parte do total de chaves já criadas (inclusive removidas), a mesma conta
+    # que numerava as chaves até aqui.
+    op.execute(
+        """
+        UPDATE tb_sala s
+        SET contador_chaves = c.total
+        FROM (
+            SELECT sala_id, count(*) AS total
+            FROM tb_chave
+            GROUP BY sala_id
+        ) c
+        WHERE c.sala_id = s.sala_id
+        """
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('tb_sala', schema=None) as batch_op:
+        batch_op.drop_column('contador_chaves')
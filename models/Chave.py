@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, Boolean, ForeignKey, DateTime, func
+from sqlalchemy import String, Integer, Boolean, ForeignKey, DateTime, Index, func
 from helpers.database import db
 from marshmallow import Schema, fields
 from flask_restful import fields as flaskFields
@@ -15,6 +15,9 @@ tb_chave_fields = {
 
 class TB_Chave(db.Model):
     __tablename__ = "tb_chave"
+    __table_args__ = (
+        Index("ix_tb_chave_sala", "sala_id"),
+    )
 
     chave_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     chave_nome: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -1,23 +1,50 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, Date, Time, String, ForeignKey, Index, func
 from helpers.database import db
 
-class VW_HistoricoRetiradas(db.Model):
-    __tablename__ = "vw_historico_retiradas"
-    __table_args__ = {"info": {"is_view": True}}
+# Histórico materializado: uma linha por retirada ativa (retirada, chave,
+# sala e responsável sem deleted_at), com os nomes já resolvidos. Mantida
+# pelos triggers da migração 7e1b9c4d2a60 a cada escrita nas quatro tabelas
+# de origem; a API só lê.
+class TB_HistoricoRetirada(db.Model):
+    __tablename__ = "tb_historico_retirada"
+    __table_args__ = (
+        Index("ix_tb_historico_retirada_data", "data_retirada", "retirada_id"),
+        Index("ix_tb_historico_retirada_sala", "sala_id", "retirada_id"),
+        Index("ix_tb_historico_retirada_responsavel", "responsavel_id", "retirada_id"),
+        Index("ix_tb_historico_retirada_sala_nome", "sala_nome", "retirada_id"),
+        Index("ix_tb_historico_retirada_chave_nome", "chave_nome", "retirada_id"),
+        Index("ix_tb_historico_retirada_responsavel_nome", "responsavel_nome", "retirada_id"),
+    )
 
-    retirada_id = db.Column(db.Integer, primary_key=True)
+    retirada_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("tb_retirada.retirada_id", ondelete="CASCADE"),
+        primary_key=True,
+        autoincrement=False
+    )
 
-    data_retirada = db.Column(db.Date)
-    hora_retirada = db.Column(db.Time)
-    hora_prevista_devolucao = db.Column(db.Time)
-    hora_devolucao = db.Column(db.Time)
+    data_retirada: Mapped[Date] = mapped_column(Date, nullable=False)
+    hora_retirada: Mapped[Time] = mapped_column(Time, nullable=False)
+    hora_prevista_devolucao: Mapped[Time] = mapped_column(Time, nullable=False)
+    data_devolucao: Mapped[Date] = mapped_column(Date, nullable=True)
+    hora_devolucao: Mapped[Time] = mapped_column(Time, nullable=True)
+    status: Mapped[String] = mapped_column(String(9), nullable=False)
 
-    status = db.Column(db.String)
+    sala_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    sala_nome: Mapped[str] = mapped_column(String(255), nullable=False)
 
-    sala_id = db.Column(db.Integer)
-    sala_nome = db.Column(db.String)
+    chave_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    chave_nome: Mapped[str] = mapped_column(String(255), nullable=False)
 
-    chave_id = db.Column(db.Integer)
-    chave_nome = db.Column(db.String)
+    responsavel_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    responsavel_nome: Mapped[str] = mapped_column(String(255), nullable=False)
 
-    responsavel_id = db.Column(db.Integer)
-    responsavel_nome = db.Column(db.String)
+
+# Busca por trecho do nome (LIKE '%x%'), atendida pelo índice de trigramas.
+Index(
+    "ix_tb_historico_retirada_responsavel_nome_trgm",
+    func.lower(TB_HistoricoRetirada.responsavel_nome).label("responsavel_nome_minusculo"),
+    postgresql_using="gin",
+    postgresql_ops={"responsavel_nome_minusculo": "gin_trgm_ops"}
+)
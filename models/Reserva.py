@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, Date, Time, String, ForeignKey, DateTime, func
+from sqlalchemy import Integer, Date, Time, String, ForeignKey, DateTime, Index, func, text
 from helpers.database import db
 from helpers.validation_functions.genericValidations import TimeFormat, DateFormat, DiasReservaField, validate_positive, montarDicionarioDeMensagemDeErro
 from helpers.validation_functions.reservaSchemaValidation import validateReservaRules
@@ -22,6 +22,15 @@ tb_reserva_fields = {
 
 class TB_Reserva(db.Model):
     __tablename__ = "tb_reserva"
+    __table_args__ = (
+        Index(
+            "ix_tb_reserva_sala_periodo_ativa",
+            "sala_id",
+            "data_inicio",
+            "data_fim",
+            postgresql_where=text("status = 'ativa' AND deleted_at IS NULL")
+        ),
+    )
 
     reserva_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     sala_id: Mapped[int] = mapped_column(Integer, ForeignKey("tb_sala.sala_id"), nullable=False)
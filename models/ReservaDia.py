@@ -1,11 +1,14 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer
+from sqlalchemy import Integer, Index
 from helpers.database import db
 from marshmallow import Schema, fields, validate
 from helpers.validation_functions.genericValidations import validate_positive, montarDicionarioDeMensagemDeErro
 
 class TB_ReservaDia(db.Model):
     __tablename__ = "tb_reserva_dia"
+    __table_args__ = (
+        Index("ix_tb_reserva_dia_reserva_dia", "reserva_id", "dia_semana"),
+    )
 
     reserva_dia_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     reserva_id: Mapped[int] = mapped_column(Integer, db.ForeignKey("tb_reserva.reserva_id", ondelete="CASCADE"), nullable=False)
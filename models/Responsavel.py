@@ -77,7 +77,8 @@ class TB_Responsavel(db.Model):
             return False
 
 
-class TB_ResponsavelSchema(Schema):
+# Campos e validações de formato, sem consultas ao banco.
+class TB_ResponsavelCamposSchema(Schema):
     responsavel_id = fields.Int(dump_only=True) 
 
     responsavel_nome = fields.Str(
@@ -133,6 +134,12 @@ class TB_ResponsavelSchema(Schema):
         required=False
     )
 
+
+# Unicidade de CPF, SIAPE, matrícula e email, verificada com uma consulta por
+# campo. O cadastro em lote não usa este mixin: verifica o lote inteiro de uma
+# vez no service.
+class ValidacaoDeUnicidadeDoResponsavel:
+
     @validates("responsavel_cpf")
     def validate_unique_cpf(self, value, **kwargs):
         validar_unique_cpf(value)
@@ -148,3 +155,11 @@ class TB_ResponsavelSchema(Schema):
     @validates("email")
     def validate_unique_email(self, value, **kwargs):
         validar_unique_email(value)
+
+
+class TB_ResponsavelSchema(ValidacaoDeUnicidadeDoResponsavel, TB_ResponsavelCamposSchema):
+    pass
+
+
+class TB_ResponsavelLoteSchema(TB_ResponsavelCamposSchema):
+    pass
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, Date, Time, String, ForeignKey, DateTime, func
+from sqlalchemy import Integer, Date, Time, String, ForeignKey, DateTime, Index, func, text
 from helpers.database import db
 from marshmallow import Schema, fields, validate, ValidationError, validates, validates_schema
 from flask_restful import fields as flaskFields
@@ -24,6 +24,29 @@ tb_retirada_fields = {
     
 class TB_Retirada(db.Model):
     __tablename__ = "tb_retirada"
+    __table_args__ = (
+        Index(
+            "ix_tb_retirada_chave_ativa",
+            "chave_id",
+            postgresql_where=text("status IN ('retirada', 'atrasada') AND deleted_at IS NULL")
+        ),
+        Index(
+            "ix_tb_retirada_data",
+            "data_retirada",
+            "retirada_id",
+            postgresql_where=text("deleted_at IS NULL")
+        ),
+        Index(
+            "ix_tb_retirada_chave",
+            "chave_id",
+            postgresql_where=text("deleted_at IS NULL")
+        ),
+        Index(
+            "ix_tb_retirada_responsavel",
+            "responsavel_id",
+            postgresql_where=text("deleted_at IS NULL")
+        ),
+    )
 
     retirada_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     chave_id: Mapped[int] = mapped_column(Integer, ForeignKey("tb_chave.chave_id"), nullable=False)
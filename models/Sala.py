@@ -18,6 +18,8 @@ class TB_Sala(db.Model):
     sala_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     sala_nome: Mapped[str] = mapped_column(String(255), nullable=False)
     disponivel: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    # Último número usado no nome das chaves da sala (Chave <sala> NN).
+    contador_chaves: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
     created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(UTC), nullable=False)
     deleted_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
     deleted_by: Mapped[int] = mapped_column(Integer, ForeignKey('tb_responsavel.responsavel_id'), nullable=True)
@@ -0,0 +1,14 @@
+#!/bin/sh
+set -e
+
+# Executado pelo entrypoint do postgres na primeira inicialização do primário:
+# cria o usuário de replicação e libera a conexão de replicação da réplica.
+echo "Criando usuário de replicação..."
+
+psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" <<-SQL
+  CREATE ROLE replicador WITH REPLICATION LOGIN PASSWORD '$POSTGRES_REPLICATION_PASSWORD';
+SQL
+
+echo "host replication replicador all scram-sha-256" >> "$PGDATA/pg_hba.conf"
+
+echo "Primário pronto para replicação!"
@@ -1,27 +1,21 @@
 from helpers.database import db
+from helpers.entity_loader import carregar_entidade
 
 from models.Chave import TB_Chave
-from sqlalchemy import select
+from sqlalchemy import select, insert
+from helpers.cache_invalidation import registrar_entidades, ENTIDADES_REGISTRADAS
 from datetime import datetime, UTC
 
 class ChaveRepository:
 
     @staticmethod
-    def get_all(query):
-        query = (db.select(TB_Chave).where(TB_Chave.deleted_at.is_(None)))
-        return db.session.execute(query).scalars().all()
+    def get_all(spec):
+        return spec.executar(db.session)
 
 
     @staticmethod
     def get_by_id(chave_id: int):
-        query = (
-            db.select(TB_Chave)
-            .where(
-                TB_Chave.chave_id == chave_id,
-                TB_Chave.deleted_at.is_(None)
-            )
-        )
-        return db.session.execute(query).scalar_one_or_none()
+        return carregar_entidade(TB_Chave, chave_id)
 
 
     @staticmethod
@@ -32,6 +26,20 @@ class ChaveRepository:
         return chave
 
 
+    # INSERT de várias linhas com RETURNING, na ordem das linhas recebidas.
+    @staticmethod
+    def inserir_em_lote(linhas):
+        chaves = db.session.scalars(
+            insert(TB_Chave).returning(TB_Chave, sort_by_parameter_order=True),
+            linhas,
+            execution_options={ENTIDADES_REGISTRADAS: True}
+        ).all()
+
+        registrar_entidades(*chaves)
+
+        return chaves
+
+
     @staticmethod
     def update():
         db.session.commit()
@@ -1,29 +1,30 @@
 from helpers.database import db
+from helpers.entity_loader import carregar_entidade, registrar_relacoes_carregadas
 
 from models.Reserva import TB_Reserva
 from models.ReservaDia import TB_ReservaDia
 from sqlalchemy import select
+from sqlalchemy.orm import selectinload
 from datetime import datetime, UTC
 
+# Os dias da semana acompanham a reserva também quando ela é lida por id
+# (inclusive nas validações), pelo carregador de entidades da requisição.
+registrar_relacoes_carregadas(TB_Reserva, "tb_reserva_dia")
+
 
 class ReservaRepository:
 
     @staticmethod
-    def get_all(query):
-        query = (db.select(TB_Reserva).where(TB_Reserva.deleted_at.is_(None)))
-        return db.session.execute(query).scalars().all()
+    def get_all(spec):
+        # Os dias da semana são serializados junto de cada reserva: carrega
+        # todos em uma única consulta extra (IN) em vez de uma por reserva.
+        spec.carregar(selectinload(TB_Reserva.tb_reserva_dia))
+        return spec.executar(db.session)
 
 
     @staticmethod
     def get_by_id(reserva_id):
-        query = (
-            db.select(TB_Reserva)
-            .where(
-                TB_Reserva.reserva_id == reserva_id,
-                TB_Reserva.deleted_at.is_(None)
-            )
-        )
-        return db.session.execute(query).scalar_one_or_none()
+        return carregar_entidade(TB_Reserva, reserva_id)
 
 
     @staticmethod
@@ -63,6 +64,13 @@ class ReservaRepository:
             .delete()
 
 
+    @staticmethod
+    def recarregar_dias(reserva):
+        # Os dias são trocados por DELETE em lote + INSERT fora da coleção;
+        # expirar a relação faz o write-through do cache enxergar os novos.
+        db.session.expire(reserva, ["tb_reserva_dia"])
+
+
     @staticmethod
     def adicionar_dia(reserva_id, dia_semana):
         db.session.add(
@@ -1,40 +1,21 @@
 from helpers.database import db
-from helpers.auxiliaryFunctionsResources.helpFunctionsForSql import aplicar_ordenacao
+from helpers.entity_loader import carregar_entidade
 from datetime import datetime, UTC
 from models.Responsavel import TB_Responsavel
-from sqlalchemy import select
+from sqlalchemy import select, insert
+from helpers.cache_invalidation import registrar_entidades, ENTIDADES_REGISTRADAS
+from helpers.auxiliaryFunctionsResources.helpFunctionsForLote import valores_ja_cadastrados
 
 class ResponsavelRepository:
 
     @staticmethod
-    def get_all(query):
-
-        query = (db.select(TB_Responsavel).where(TB_Responsavel.deleted_at.is_(None)))
-
-        query = aplicar_ordenacao(
-            query,
-            {
-                "id": TB_Responsavel.responsavel_id,
-                "nome": TB_Responsavel.responsavel_nome,
-                "ativo": TB_Responsavel.ativo
-            },
-            "id"
-        )
-
-        return db.session.execute(query).scalars().all()
+    def get_all(spec):
+        return spec.executar(db.session)
 
 
     @staticmethod
     def get_by_id(responsavel_id: int):
-        query = (
-            db.select(TB_Responsavel)
-            .where(
-                TB_Responsavel.responsavel_id == responsavel_id,
-                TB_Responsavel.deleted_at.is_(None)
-            )
-        )
-
-        return db.session.execute(query).scalar_one_or_none()
+        return carregar_entidade(TB_Responsavel, responsavel_id)
 
 
     @staticmethod
@@ -50,6 +31,25 @@ class ResponsavelRepository:
         return responsavel
 
 
+    @staticmethod
+    def valores_ja_cadastrados(valores_por_campo):
+        return valores_ja_cadastrados(TB_Responsavel, valores_por_campo)
+
+
+    # INSERT de várias linhas com RETURNING, na ordem das linhas recebidas.
+    @staticmethod
+    def inserir_em_lote(linhas):
+        responsaveis = db.session.scalars(
+            insert(TB_Responsavel).returning(TB_Responsavel, sort_by_parameter_order=True),
+            linhas,
+            execution_options={ENTIDADES_REGISTRADAS: True}
+        ).all()
+
+        registrar_entidades(*responsaveis)
+
+        return responsaveis
+
+
     @staticmethod
     def update():
         db.session.commit()
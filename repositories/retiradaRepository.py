@@ -1,29 +1,26 @@
 from sqlalchemy import select
 
 from helpers.database import db
+from helpers.entity_loader import carregar_entidade
+from helpers.cache_invalidation import registrar_entidades, descartar_entidades, ENTIDADES_REGISTRADAS
 from models.Retirada import TB_Retirada
 from models.Chave import TB_Chave
-from sqlalchemy import select
+from models.Sala import TB_Sala
+from sqlalchemy import select, insert, update, literal, exists
 from datetime import datetime, UTC
 
+STATUS_ATIVOS = ("retirada", "atrasada")
+
 
 class RetiradaRepository:
 
     @staticmethod
-    def get_all(query):
-        query = (db.select(TB_Retirada).where(TB_Retirada.deleted_at.is_(None)))
-        return db.session.execute(query).scalars().all()
+    def get_all(spec):
+        return spec.executar(db.session)
 
     @staticmethod
     def get_by_id(retirada_id):
-        query = (
-            db.select(TB_Retirada)
-            .where(
-                TB_Retirada.retirada_id == retirada_id,
-                TB_Retirada.deleted_at.is_(None)
-            )
-        )
-        return db.session.execute(query).scalar_one_or_none()
+        return carregar_entidade(TB_Retirada, retirada_id)
 
     @staticmethod
     def save(retirada):
@@ -49,6 +46,79 @@ class RetiradaRepository:
     def rollback():
         db.session.rollback()
 
+    # Reserva a chave em um único comando: o UPDATE condicional só altera a
+    # chave se ela ainda estiver disponível (em duas retiradas simultâneas da
+    # mesma chave, a segunda espera o lock da linha, reavalia o WHERE e não
+    # altera nada) e, no mesmo comando, marca a sala como indisponível, o que
+    # mantém a linha da sala bloqueada até o commit. Devolve o sala_id, ou None
+    # se a chave não pôde ser reservada.
+    @staticmethod
+    def reservar_chave(chave_id, sala_id=None):
+        condicoes = [
+            TB_Chave.chave_id == chave_id,
+            TB_Chave.disponivel.is_(True),
+            TB_Chave.deleted_at.is_(None)
+        ]
+
+        if sala_id is not None:
+            condicoes.append(TB_Chave.sala_id == sala_id)
+
+        chave = (
+            update(TB_Chave)
+            .where(*condicoes)
+            .values(disponivel=False)
+            .returning(TB_Chave.chave_id, TB_Chave.sala_id)
+            .cte("chave_reservada")
+        )
+
+        sala = (
+            update(TB_Sala)
+            .where(
+                TB_Sala.sala_id == chave.c.sala_id,
+                TB_Sala.deleted_at.is_(None)
+            )
+            .values(disponivel=False)
+            .returning(TB_Sala.sala_id)
+            .cte("sala_bloqueada")
+        )
+
+        sala_id = db.session.scalar(select(sala.c.sala_id))
+
+        if sala_id is not None:
+            descartar_entidades(TB_Chave, chave_id)
+            descartar_entidades(TB_Sala, sala_id)
+
+        return sala_id
+
+    # INSERT ... SELECT ... WHERE NOT EXISTS: grava a retirada só se a sala não
+    # tiver outra retirada ativa. Executado depois de reservar_chave, já com o
+    # lock da sala, este comando tem um snapshot novo e enxerga as retiradas
+    # confirmadas por quem segurava o lock. Devolve None se a sala está ocupada.
+    @staticmethod
+    def inserir_se_sala_livre(dados, sala_id):
+        colunas = TB_Retirada.__table__.c
+
+        sala_ocupada = exists().where(
+            TB_Retirada.chave_id == TB_Chave.chave_id,
+            TB_Chave.sala_id == sala_id,
+            TB_Retirada.status.in_(STATUS_ATIVOS),
+            TB_Retirada.deleted_at.is_(None)
+        )
+
+        linha = select(
+            *(literal(valor, colunas[campo].type).label(campo) for campo, valor in dados.items())
+        ).where(~sala_ocupada)
+
+        retirada = db.session.scalars(
+            insert(TB_Retirada).from_select(list(dados), linha).returning(TB_Retirada),
+            execution_options={ENTIDADES_REGISTRADAS: True}
+        ).first()
+
+        if retirada is not None:
+            registrar_entidades(retirada)
+
+        return retirada
+
     @staticmethod
     def get_retirada_ativa_da_sala(sala_id):
         return (
@@ -56,7 +126,8 @@ class RetiradaRepository:
             .join(TB_Chave, TB_Retirada.chave_id == TB_Chave.chave_id)
             .filter(
                 TB_Chave.sala_id == sala_id,
-                TB_Retirada.status.in_(["retirada", "atrasada"])
+                TB_Retirada.status.in_(STATUS_ATIVOS),
+                TB_Retirada.deleted_at.is_(None)
             )
             .first()
         )
\ No newline at end of file
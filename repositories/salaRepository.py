@@ -1,37 +1,22 @@
 from datetime import datetime, UTC
 from helpers.database import db
-from helpers.auxiliaryFunctionsResources.helpFunctionsForSql import aplicar_ordenacao
+from helpers.entity_loader import carregar_entidade
 from models.Sala import TB_Sala
 from models.Chave import TB_Chave
-from sqlalchemy import select
+from sqlalchemy import select, insert, update, case, func, literal, cast, String
+from helpers.cache_invalidation import registrar_entidades, ENTIDADES_REGISTRADAS, SEM_INVALIDACAO
+from helpers.auxiliaryFunctionsResources.helpFunctionsForLote import valores_ja_cadastrados
 
 class SalaRepository:
     
     @staticmethod
-    def get_all(query):
-        query = (db.select(TB_Sala).where(TB_Sala.deleted_at.is_(None)))
-
-        query = aplicar_ordenacao(query,{
-            "id":TB_Sala.sala_id,
-            "nome":TB_Sala.sala_nome,
-            "disponivel":TB_Sala.disponivel
-        }, "id"
-        )
-
-        return db.session.execute(query).scalars().all()
+    def get_all(spec):
+        return spec.executar(db.session)
     
 
     @staticmethod
     def get_by_id(sala_id: int):
-        query = (
-            db.select(TB_Sala)
-            .where(
-                TB_Sala.sala_id == sala_id,
-                TB_Sala.deleted_at.is_(None)
-            )
-        )
-
-        return db.session.execute(query).scalar_one_or_none()
+        return carregar_entidade(TB_Sala, sala_id)
     
 
     @staticmethod
@@ -47,20 +32,108 @@ class SalaRepository:
         return sala
     
 
+    @staticmethod
+    def nomes_ja_cadastrados(nomes, exceto_sala_id=None):
+        filtros = [TB_Sala.deleted_at.is_(None)]
+
+        if exceto_sala_id is not None:
+            filtros.append(TB_Sala.sala_id != exceto_sala_id)
+
+        return valores_ja_cadastrados(
+            TB_Sala,
+            {"sala_nome": nomes},
+            *filtros
+        )["sala_nome"]
+
+
+    # Reserva números para as chaves novas: {sala_id: quantidade} ->
+    # {sala_id: (sala_nome, último número reservado)}, só para salas ativas.
+    # O UPDATE ... RETURNING incrementa o contador e bloqueia a linha da sala
+    # até o commit, então criações simultâneas nunca repetem um número.
+    @staticmethod
+    def reservar_numeros_de_chave(quantidades):
+        query = (
+            update(TB_Sala)
+            .where(
+                TB_Sala.sala_id.in_(quantidades),
+                TB_Sala.deleted_at.is_(None)
+            )
+            .values(
+                contador_chaves=TB_Sala.contador_chaves + case(quantidades, value=TB_Sala.sala_id)
+            )
+            .returning(TB_Sala.sala_id, TB_Sala.sala_nome, TB_Sala.contador_chaves)
+        )
+
+        linhas = db.session.execute(
+            query,
+            execution_options={SEM_INVALIDACAO: True, "synchronize_session": False}
+        )
+
+        return {
+            sala_id: (sala_nome, contador)
+            for sala_id, sala_nome, contador in linhas
+        }
+
+
+    # INSERT de várias linhas com RETURNING, na ordem das linhas recebidas.
+    @staticmethod
+    def inserir_em_lote(linhas):
+        salas = db.session.scalars(
+            insert(TB_Sala).returning(TB_Sala, sort_by_parameter_order=True),
+            linhas,
+            execution_options={ENTIDADES_REGISTRADAS: True}
+        ).all()
+
+        registrar_entidades(*salas)
+
+        return salas
+
+
     @staticmethod
     def update():
         db.session.commit()
 
 
+    # Renomeia todas as chaves da sala (inclusive removidas) em um único
+    # UPDATE, numerando-as por row_number() na ordem de chave_id, como
+    # gerar_nome_da_chave. O RETURNING traz as chaves já atualizadas para o
+    # write-through do cache, feito junto com o restante no commit.
     @staticmethod
-    def get_chaves_da_sala(sala_id):
-        return (
-            db.session.query(TB_Chave)
-            .filter(TB_Chave.sala_id == sala_id)
-            .order_by(TB_Chave.chave_id)
-            .all()
+    def renomear_chaves_da_sala(sala_id, sala_nome):
+        # A alteração da sala vai antes: a linha fica bloqueada e as chaves
+        # criadas em paralelo esperam o commit para ler o nome novo.
+        db.session.flush()
+
+        numeradas = (
+            select(
+                TB_Chave.chave_id,
+                func.row_number().over(order_by=TB_Chave.chave_id).label("numero")
+            )
+            .where(TB_Chave.sala_id == sala_id)
+            .subquery("numeradas")
         )
 
+        numero = numeradas.c.numero
+
+        # Mesmo formato de gerar_nome_da_chave ({numero:02d}).
+        nome = (
+            literal(f"Chave {sala_nome} ")
+            + case((numero < 10, "0"), else_="")
+            + cast(numero, String)
+        )
+
+        chaves = db.session.scalars(
+            update(TB_Chave)
+            .where(TB_Chave.chave_id == numeradas.c.chave_id)
+            .values(chave_nome=nome)
+            .returning(TB_Chave),
+            execution_options={ENTIDADES_REGISTRADAS: True, "synchronize_session": "fetch"}
+        ).all()
+
+        registrar_entidades(*chaves)
+
+        return chaves
+
 
     @staticmethod
     def soft_delete(sala: TB_Sala, deleted_by: int):
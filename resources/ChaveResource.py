@@ -1,10 +1,13 @@
-from flask import request, abort
+from flask import request, abort, Response
 from flask_restful import Resource, marshal
 from marshmallow import ValidationError
 from sqlalchemy.exc import SQLAlchemyError
 from werkzeug.exceptions import HTTPException
 
 from helpers.logging import logger, log_exception
+from helpers.query_counter import limite_de_consultas
+from helpers.database import leitura_em_replica
+from helpers.auxiliaryFunctionsResources.redisCacheFunctions import validacaoCondicional
 
 from models.Chave import (
     TB_ChaveSchema,
@@ -17,6 +20,9 @@ from services.chaveService import ChaveService
 
 class TB_ChavesResource(Resource):
 
+    @validacaoCondicional("chaves")
+    @limite_de_consultas(1)
+    @leitura_em_replica("chaves")
     def get(self):
 
         logger.info("GET ALL - Listagem de Chaves")
@@ -25,6 +31,9 @@ class TB_ChavesResource(Resource):
 
             resposta = ChaveService.listar()
 
+            if isinstance(resposta, Response):
+                return resposta
+
             return resposta, 200
 
         except SQLAlchemyError:
@@ -117,6 +126,9 @@ class TB_ChavesResource(Resource):
 
 class TB_ChaveResource(Resource):
 
+    @validacaoCondicional("chaves")
+    @limite_de_consultas(1)
+    @leitura_em_replica("chaves")
     def get(self, chave_id):
 
         logger.info(
@@ -129,6 +141,9 @@ class TB_ChaveResource(Resource):
                 chave_id
             )
 
+            if isinstance(resposta, Response):
+                return resposta
+
             return resposta, 200
 
         except SQLAlchemyError:
@@ -268,4 +283,44 @@ class TB_ChaveResource(Resource):
             abort(
                 500,
                 description="Erro interno inesperado."
-            )
\ No newline at end of file
+            )
+
+
+class TB_ChavesLoteResource(Resource):
+
+    def post(self):
+
+        logger.info("POST - Cadastro em lote de Chaves")
+
+        dados = request.get_json(silent=True)
+
+        try:
+
+            return ChaveService.criar_em_lote(dados)
+
+        except SQLAlchemyError:
+
+            log_exception(
+                "Erro SQLAlchemy ao inserir Chaves em lote"
+            )
+
+            ChaveRepository.rollback()
+
+            abort(
+                500,
+                description="Erro ao inserir Chaves em lote."
+            )
+
+        except HTTPException:
+            raise
+
+        except Exception:
+
+            log_exception(
+                "Erro inesperado ao inserir Chaves em lote"
+            )
+
+            abort(
+                500,
+                description="Erro interno inesperado."
+            )
@@ -1,57 +1,84 @@
 from flask_restful import Resource
 from sqlalchemy import text
 from flask import request, abort, jsonify
+from werkzeug.exceptions import HTTPException
 from helpers.database import db
 from helpers.logging import logger, log_exception
-import json
+from helpers.query_counter import limite_de_consultas
+from helpers.database import leitura_em_replica
 from helpers.redis_cache import redis_client
-from helpers.auxiliaryFunctionsResources.redisCacheFunctions import verificarRedisCache, preencherRedisCache
-from helpers.auxiliaryFunctionsResources.sqlRequestForHistory import sqlRequisicaoGetAll, sqlRequisicaoGetById
+from helpers.auxiliaryFunctionsResources.redisCacheFunctions import verificarRedisCache, preencherRedisCache, buscarComSingleFlight, montarChaveDeListagem, respostaDoCache, registrarAusenciaNoCache, validacaoCondicional
+from helpers.query_spec import EspecificacaoDeConsulta
+from helpers.auxiliaryFunctionsResources.sqlRequestForHistory import sqlRequisicaoGetAll, sqlRequisicaoGetById, sqlRequisicaoExport, especificacaoDoHistorico, CAMPOS_HISTORICO, FILTROS_HISTORICO
 
 class HistoricoResource(Resource):
+    @validacaoCondicional("historico")
+    @limite_de_consultas(1)
+    @leitura_em_replica("historico")
     def get(self):
         logger.info("GET ALL - Histórico de Retiradas")
 
         try:
-            cacheKey = f"historico:{json.dumps(request.args, sort_keys=True)}"
-            
-            cache = verificarRedisCache("Historico de Retiradas", cacheKey)
+            campos = EspecificacaoDeConsulta.campos_da_requisicao(CAMPOS_HISTORICO)
 
-            if cache:
-                logger.info("Retornando Historico de Retiradas do Redis")
-                return json.loads(cache), 200
+            spec = especificacaoDoHistorico(campos)
+
+            cacheKey = montarChaveDeListagem(
+                "historico",
+                spec,
+                filtros=EspecificacaoDeConsulta.parametros(FILTROS_HISTORICO),
+                projecao=campos
+            )
+
+            def consultar():
+                logger.info("Buscando Retiradas no Banco de Dados")
+                return sqlRequisicaoGetAll(spec, campos)
+
+            return buscarComSingleFlight("Historico de Retiradas", cacheKey, consultar)
+
+        except HTTPException:
+            raise
 
         except Exception:
-            log_exception("Erro ao retornar Historico de Retiradas do Redis Cache")
-            abort(500, "Erro ao retornar Historico de Retiradas do Redis Cache")
+            log_exception("Erro ao retornar Historico de Retiradas")
+            abort(500, "Erro ao retornar Historico de Retiradas")
 
-        try:
-            logger.info("Redis Cache vazio!")
-            logger.info("Buscando Retiradas no Banco de Dados")
 
-            resposta = sqlRequisicaoGetAll()
+class HistoricoExportResource(Resource):
+    # Sem validacaoCondicional nem limite_de_consultas: o anexo depende do
+    # formato, dos campos e dos filtros (a geração do namespace não serve de
+    # ETag), e as consultas rodam no gerador, depois do after_request que as
+    # contaria.
+    @leitura_em_replica("historico")
+    def get(self):
+        formato = request.args.get("format", "csv").strip().lower()
+        logger.info(f"GET EXPORT - Histórico de Retiradas ({formato})")
 
-            preencherRedisCache(cacheKey, resposta)
+        try:
+            return sqlRequisicaoExport(formato)
 
-            logger.info("Retornando o Historico de Retiradas do Banco de Dados")
-            return resposta, 200
+        except HTTPException:
+            raise
 
         except Exception:
-            log_exception("Erro ao retornar Historico de Retiradas do Banco de Dados")
-            abort(500, "Erro ao retornar Historico de Retiradas do Banco de Dados")
+            log_exception("Erro ao exportar Historico de Retiradas")
+            abort(500, "Erro ao exportar Historico de Retiradas")
 
 
 class HistoricoByIdResource(Resource):
+    @validacaoCondicional("historico")
+    @limite_de_consultas(1)
+    @leitura_em_replica("historico")
     def get(self, retirada_id):
         logger.info(f"GET - Histórico Retirada {retirada_id}")
 
         try:
-            cacheKey = f"historico:{retirada_id}"
+            cacheKey = redis_client.versioned_key("historico", retirada_id)
             cache = verificarRedisCache("Historico de Retiradas", cacheKey)
 
             if cache:
                 logger.info(f"Retornando Historico da Retirada {retirada_id} do Redis Cache")
-                return json.loads(cache), 200
+                return respostaDoCache(cache)
 
         except Exception:
             log_exception(f"Erro ao retornar o Historico da Retirada {retirada_id} do Redis Cache")
@@ -63,10 +90,14 @@ class HistoricoByIdResource(Resource):
 
             resposta = sqlRequisicaoGetById(retirada_id)
 
-            preencherRedisCache(cacheKey, resposta)
+            if isinstance(resposta, tuple):
+                registrarAusenciaNoCache(cacheKey, resposta[0])
+                return resposta
+
+            payload = preencherRedisCache(cacheKey, resposta)
 
             logger.info(f"Retornando o Historico da Retirada {retirada_id} do Banco de Dados")
-            return resposta, 200
+            return respostaDoCache(payload)
 
         except Exception:
             log_exception(f"Erro ao retornar o Historico da Retirada {retirada_id} do Banco de Dados")
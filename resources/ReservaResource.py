@@ -1,9 +1,12 @@
-from flask import request, abort
+from flask import request, abort, Response
 from flask_restful import Resource, marshal
 from marshmallow import ValidationError
 from sqlalchemy.exc import SQLAlchemyError
 from werkzeug.exceptions import HTTPException
 from helpers.logging import logger, log_exception
+from helpers.query_counter import limite_de_consultas
+from helpers.database import leitura_em_replica
+from helpers.auxiliaryFunctionsResources.redisCacheFunctions import validacaoCondicional
 from models.Reserva import (
     TB_ReservaSchema,
     tb_reserva_fields
@@ -14,6 +17,9 @@ from services.reservaService import ReservaService
 
 class TB_ReservasResource(Resource):
 
+    @validacaoCondicional("reservas")
+    @limite_de_consultas(2)
+    @leitura_em_replica("reservas")
     def get(self):
 
         logger.info("GET ALL - Listagem de Reservas")
@@ -22,6 +28,9 @@ class TB_ReservasResource(Resource):
 
             resposta = ReservaService.listar()
 
+            if isinstance(resposta, Response):
+                return resposta
+
             return resposta, 200
 
         except SQLAlchemyError:
@@ -115,6 +124,9 @@ class TB_ReservasResource(Resource):
 
 class TB_ReservaResource(Resource):
 
+    @validacaoCondicional("reservas")
+    @limite_de_consultas(2)
+    @leitura_em_replica("reservas")
     def get(self, reserva_id):
 
         logger.info(
@@ -127,6 +139,9 @@ class TB_ReservaResource(Resource):
                 reserva_id
             )
 
+            if isinstance(resposta, Response):
+                return resposta
+
             return resposta, 200
 
         except SQLAlchemyError:
@@ -1,10 +1,13 @@
-from flask import request, abort
+from flask import request, abort, Response
 from flask_restful import Resource, marshal
 from marshmallow import ValidationError
 from sqlalchemy.exc import SQLAlchemyError
 from werkzeug.exceptions import HTTPException
 
 from helpers.logging import logger, log_exception
+from helpers.query_counter import limite_de_consultas
+from helpers.database import leitura_em_replica
+from helpers.auxiliaryFunctionsResources.redisCacheFunctions import validacaoCondicional
 
 from models.Responsavel import (
     TB_ResponsavelSchema,
@@ -18,6 +21,9 @@ from services.responsavelService import ResponsavelService
 
 class TB_ResponsaveisResource(Resource):
 
+    @validacaoCondicional("responsaveis")
+    @limite_de_consultas(1)
+    @leitura_em_replica("responsaveis")
     def get(self):
         logger.info("GET ALL - Listagem de Responsáveis")
 
@@ -26,6 +32,9 @@ class TB_ResponsaveisResource(Resource):
         try:
             resposta = ResponsavelService.listar(text)
 
+            if isinstance(resposta, Response):
+                return resposta
+
             return resposta, 200
 
         except SQLAlchemyError:
@@ -107,6 +116,9 @@ class TB_ResponsaveisResource(Resource):
 
 class TB_ResponsavelResource(Resource):
 
+    @validacaoCondicional("responsaveis")
+    @limite_de_consultas(1)
+    @leitura_em_replica("responsaveis")
     def get(self, responsavel_id):
 
         logger.info(
@@ -119,6 +131,9 @@ class TB_ResponsavelResource(Resource):
                 responsavel_id
             )
 
+            if isinstance(resposta, Response):
+                return resposta
+
             return resposta, 200
 
         except SQLAlchemyError:
@@ -258,3 +273,43 @@ class TB_ResponsavelResource(Resource):
                 500,
                 description="Erro interno inesperado."
             )
+
+
+class TB_ResponsaveisLoteResource(Resource):
+
+    def post(self):
+
+        logger.info("POST - Cadastro em lote de Responsáveis")
+
+        dados = request.get_json(silent=True)
+
+        try:
+
+            return ResponsavelService.criar_em_lote(dados)
+
+        except SQLAlchemyError:
+
+            log_exception(
+                "Erro SQLAlchemy ao inserir Responsáveis em lote"
+            )
+
+            ResponsavelRepository.rollback()
+
+            abort(
+                500,
+                description="Erro ao inserir Responsáveis em lote."
+            )
+
+        except HTTPException:
+            raise
+
+        except Exception:
+
+            log_exception(
+                "Erro inesperado ao inserir Responsáveis em lote"
+            )
+
+            abort(
+                500,
+                description="Erro interno inesperado."
+            )
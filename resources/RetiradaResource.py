@@ -1,10 +1,13 @@
-from flask import request, abort
+from flask import request, abort, Response
 from flask_restful import Resource, marshal
 from marshmallow import ValidationError
 from sqlalchemy.exc import SQLAlchemyError
 from werkzeug.exceptions import HTTPException
 
 from helpers.logging import logger, log_exception
+from helpers.query_counter import limite_de_consultas
+from helpers.database import leitura_em_replica
+from helpers.auxiliaryFunctionsResources.redisCacheFunctions import validacaoCondicional
 
 from models.Retirada import (
     TB_RetiradaSchema,
@@ -17,6 +20,9 @@ from services.retiradaService import RetiradaService
 
 class TB_RetiradasResource(Resource):
 
+    @validacaoCondicional("retiradas")
+    @limite_de_consultas(1)
+    @leitura_em_replica("retiradas")
     def get(self):
 
         logger.info("GET ALL - Listagem de Retiradas")
@@ -25,6 +31,9 @@ class TB_RetiradasResource(Resource):
 
             resposta = RetiradaService.listar()
 
+            if isinstance(resposta, Response):
+                return resposta
+
             return resposta, 200
 
         except SQLAlchemyError:
@@ -118,6 +127,9 @@ class TB_RetiradasResource(Resource):
 
 class TB_RetiradaResource(Resource):
 
+    @validacaoCondicional("retiradas")
+    @limite_de_consultas(1)
+    @leitura_em_replica("retiradas")
     def get(self, retirada_id):
 
         logger.info(
@@ -130,6 +142,9 @@ class TB_RetiradaResource(Resource):
                 retirada_id
             )
 
+            if isinstance(resposta, Response):
+                return resposta
+
             return resposta, 200
 
         except SQLAlchemyError:
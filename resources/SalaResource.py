@@ -1,10 +1,13 @@
-from flask import request, abort
+from flask import request, abort, Response
 from flask_restful import Resource, marshal
 from marshmallow import ValidationError
 from sqlalchemy.exc import SQLAlchemyError
 from werkzeug.exceptions import HTTPException
 
 from helpers.logging import logger, log_exception
+from helpers.query_counter import limite_de_consultas
+from helpers.database import leitura_em_replica
+from helpers.auxiliaryFunctionsResources.redisCacheFunctions import validacaoCondicional
 
 from models.Sala import (
     TB_SalaSchema,
@@ -17,6 +20,9 @@ from services.salaService import SalaService
 
 class TB_SalasResource(Resource):
 
+    @validacaoCondicional("salas")
+    @limite_de_consultas(1)
+    @leitura_em_replica("salas")
     def get(self):
 
         logger.info("GET ALL - Listagem de Salas")
@@ -27,6 +33,9 @@ class TB_SalasResource(Resource):
 
             resposta = SalaService.listar(text)
 
+            if isinstance(resposta, Response):
+                return resposta
+
             return resposta, 200
 
         except SQLAlchemyError:
@@ -113,6 +122,9 @@ class TB_SalasResource(Resource):
 
 class TB_SalaResource(Resource):
 
+    @validacaoCondicional("salas")
+    @limite_de_consultas(1)
+    @leitura_em_replica("salas")
     def get(self, sala_id):
 
         logger.info(
@@ -125,6 +137,9 @@ class TB_SalaResource(Resource):
                 sala_id
             )
 
+            if isinstance(resposta, Response):
+                return resposta
+
             return resposta, 200
 
         except SQLAlchemyError:
@@ -263,4 +278,44 @@ class TB_SalaResource(Resource):
             abort(
                 500,
                 description="Erro interno inesperado."
-            )
\ No newline at end of file
+            )
+
+
+class TB_SalasLoteResource(Resource):
+
+    def post(self):
+
+        logger.info("POST - Cadastro em lote de Salas")
+
+        dados = request.get_json(silent=True)
+
+        try:
+
+            return SalaService.criar_em_lote(dados)
+
+        except SQLAlchemyError:
+
+            log_exception(
+                "Erro SQLAlchemy ao inserir Salas em lote"
+            )
+
+            SalaRepository.rollback()
+
+            abort(
+                500,
+                description="Erro ao inserir Salas em lote."
+            )
+
+        except HTTPException:
+            raise
+
+        except Exception:
+
+            log_exception(
+                "Erro inesperado ao inserir Salas em lote"
+            )
+
+            abort(
+                500,
+                description="Erro interno inesperado."
+            )
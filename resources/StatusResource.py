@@ -0,0 +1,11 @@
+from flask_restful import Resource
+from helpers.redis_cache import circuit_breaker
+from helpers.database_pool import status_do_banco
+
+class StatusResource(Resource):
+    def get(self):
+        status = {
+            "redis": circuit_breaker.status(),
+            "banco": status_do_banco()
+        }
+        return status, 200
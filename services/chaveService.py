@@ -1,14 +1,24 @@
-import json
 from flask import abort
 from flask_restful import marshal
-from helpers.database import db
 from helpers.logging import logger
 from helpers.redis_cache import redis_client
-from helpers.auxiliaryFunctionsResources.helpFunctionsForSql import aplicar_ordenacao
+from helpers.query_spec import EspecificacaoDeConsulta
 from helpers.auxiliaryFunctionsResources.helpFunctionsForChavesResources import gerar_nome_da_chave
 from helpers.auxiliaryFunctionsResources.redisCacheFunctions import (
     verificarRedisCache,
-    preencherRedisCache
+    preencherRedisCache,
+    buscarComSingleFlight,
+    montarChaveDeListagem,
+    respostaDoCache,
+    abortarNaoEncontrado
+)
+from helpers.cache_invalidation import registrar_escrita_direta
+from helpers.auxiliaryFunctionsResources.helpFunctionsForLote import (
+    validar_lote,
+    rejeitar_duplicados,
+    item_criado,
+    item_rejeitado,
+    resposta_do_lote
 )
 from helpers.auxiliaryFunctionsResources.genericValidationsForResource import (
     salaVerification,
@@ -17,9 +27,30 @@ from helpers.auxiliaryFunctionsResources.genericValidationsForResource import (
 )
 from models.Chave import (
     TB_Chave,
+    TB_ChaveSchema,
     tb_chave_fields
 )
 from repositories.chaveRepository import ChaveRepository
+from repositories.salaRepository import SalaRepository
+
+
+CAMPOS_ORDENACAO_CHAVE = {
+    "id": TB_Chave.chave_id,
+    "nome": TB_Chave.chave_nome,
+    "disponivel": TB_Chave.disponivel
+}
+
+
+FILTROS_CHAVE = {
+    "sala_id": TB_Chave.sala_id,
+    "disponivel": TB_Chave.disponivel
+}
+
+
+registrar_escrita_direta(
+    TB_Chave,
+    lambda chave: marshal(chave, tb_chave_fields)
+)
 
 
 class ChaveService:
@@ -27,49 +58,45 @@ class ChaveService:
     @staticmethod
     def listar():
 
-        cache_key = "chaves:*"
+        campos = EspecificacaoDeConsulta.campos_da_requisicao(tb_chave_fields)
 
-        cache = verificarRedisCache(
-            "Chaves",
-            cache_key
-        )
+        spec = EspecificacaoDeConsulta.da_requisicao(
+            TB_Chave,
+            TB_Chave.chave_id,
+            CAMPOS_ORDENACAO_CHAVE,
+            filtros=FILTROS_CHAVE
+        ).projetar_campos(campos)
 
-        if cache:
-            logger.info("Retornando Chaves do Redis.")
-            return json.loads(cache)
-
-        query = db.select(TB_Chave)
-
-        query = aplicar_ordenacao(
-            query,
-            {
-                "id": TB_Chave.chave_id,
-                "nome": TB_Chave.chave_nome,
-                "disponivel": TB_Chave.disponivel
-            },
-            "id"
+        cache_key = montarChaveDeListagem(
+            "chaves",
+            spec,
+            filtros=EspecificacaoDeConsulta.parametros(FILTROS_CHAVE),
+            projecao=campos
         )
 
-        chaves = ChaveRepository.get_all(query)
+        def consultar():
 
-        resposta = marshal(
-            chaves,
-            tb_chave_fields
-        )
+            chaves = ChaveRepository.get_all(spec)
+
+            resposta = spec.montar_pagina(
+                chaves,
+                lambda itens: marshal(itens, campos)
+            )
+
+            logger.info("Retornando Chaves do Banco de Dados.")
+            return resposta
 
-        preencherRedisCache(
+        return buscarComSingleFlight(
+            "Chaves",
             cache_key,
-            resposta
+            consultar
         )
 
-        logger.info("Retornando Chaves do Banco de Dados.")
-        return resposta
-
 
     @staticmethod
     def buscar_por_id(chave_id):
 
-        cache_key = f"chaves:{chave_id}"
+        cache_key = redis_client.entity_key("chaves", chave_id)
 
         cache = verificarRedisCache(
             "Chaves",
@@ -78,42 +105,43 @@ class ChaveService:
 
         if cache:
             logger.info("Retornando Chaves do Redis.")
-            return json.loads(cache)
+            return respostaDoCache(cache)
 
         chave = ChaveRepository.get_by_id(
             chave_id
         )
 
         if chave is None:
-            abort(404, description="Chave não encontrada.")
+            abortarNaoEncontrado(cache_key, "Chave não encontrada.")
 
         resposta = marshal(
             chave,
             tb_chave_fields
         )
 
-        preencherRedisCache(
+        payload = preencherRedisCache(
             cache_key,
             resposta
         )
 
         logger.info("Retornando Chaves do Banco de Dados.")
-        return resposta
+        return respostaDoCache(payload)
 
 
     @staticmethod
     def criar(validado):
 
-        salaVerification(
-            validado["sala_id"]
-        )
+        reservados = SalaRepository.reservar_numeros_de_chave({
+            validado["sala_id"]: 1
+        })
 
-        nome = gerar_nome_da_chave(
-            validado["sala_id"]
-        )
+        if validado["sala_id"] not in reservados:
+            abort(404, "Sala não encontrada")
+
+        sala_nome, numero = reservados[validado["sala_id"]]
 
         chave = TB_Chave(
-            chave_nome=nome,
+            chave_nome=gerar_nome_da_chave(sala_nome, numero),
             sala_id=validado["sala_id"],
             disponivel=validado["disponivel"]
         )
@@ -122,11 +150,66 @@ class ChaveService:
             chave
         )
 
-        redis_client.delete_pattern(
-            "chaves:*"
+        return chave
+
+
+    @staticmethod
+    def criar_em_lote(dados):
+
+        validos, resultados = validar_lote(
+            dados,
+            TB_ChaveSchema()
         )
 
-        return chave
+        quantidades = {}
+
+        for item in validos.values():
+            quantidades[item["sala_id"]] = quantidades.get(item["sala_id"], 0) + 1
+
+        # Um único UPDATE reserva os números de todas as salas do lote.
+        reservados = SalaRepository.reservar_numeros_de_chave(quantidades) if quantidades else {}
+
+        for indice, item in list(validos.items()):
+            if item["sala_id"] not in reservados:
+                resultados[indice] = item_rejeitado(
+                    indice,
+                    404,
+                    "Sala não encontrada"
+                )
+                del validos[indice]
+
+        if not validos:
+            return resposta_do_lote(len(dados), resultados)
+
+        # O contador devolve o último número reservado: o primeiro do lote é
+        # ultimo - quantidade + 1.
+        proximos = {
+            sala_id: (sala_nome, ultimo - quantidades[sala_id] + 1)
+            for sala_id, (sala_nome, ultimo) in reservados.items()
+        }
+        linhas = []
+
+        for item in validos.values():
+            sala_nome, numero = proximos[item["sala_id"]]
+            proximos[item["sala_id"]] = (sala_nome, numero + 1)
+
+            linhas.append({
+                "chave_nome": gerar_nome_da_chave(sala_nome, numero),
+                "sala_id": item["sala_id"],
+                "disponivel": item["disponivel"]
+            })
+
+        chaves = ChaveRepository.inserir_em_lote(linhas)
+
+        for indice, chave in zip(validos, chaves):
+            resultados[indice] = item_criado(
+                indice,
+                marshal(chave, tb_chave_fields)
+            )
+
+        ChaveRepository.update()
+
+        return resposta_do_lote(len(dados), resultados)
 
 
     @staticmethod
@@ -154,10 +237,6 @@ class ChaveService:
 
         ChaveRepository.update()
 
-        redis_client.delete_pattern(
-            "chaves:*"
-        )
-
         return chave
 
 
@@ -185,7 +264,3 @@ class ChaveService:
             chave,
             deleted_by
         )
-
-        redis_client.delete_pattern(
-            "chaves:*"
-        )
\ No newline at end of file
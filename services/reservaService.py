@@ -1,4 +1,3 @@
-import json
 from flask import abort
 from flask_restful import marshal
 from helpers.database import db
@@ -6,11 +5,14 @@ from helpers.redis_cache import redis_client
 from helpers.logging import logger
 from helpers.auxiliaryFunctionsResources.redisCacheFunctions import (
     verificarRedisCache,
-    preencherRedisCache
-)
-from helpers.auxiliaryFunctionsResources.helpFunctionsForSql import (
-    aplicar_ordenacao
+    preencherRedisCache,
+    buscarComSingleFlight,
+    montarChaveDeListagem,
+    respostaDoCache,
+    abortarNaoEncontrado
 )
+from helpers.cache_invalidation import registrar_escrita_direta
+from helpers.query_spec import EspecificacaoDeConsulta
 from helpers.auxiliaryFunctionsResources.helpFunctionsForReservaResources import (
     existe_conflito_reserva_raw,
     merge_reserva
@@ -29,57 +31,75 @@ from models.Reserva import (
 from repositories.reservaRepository import ReservaRepository
 from models.ReservaDia import TB_ReservaDia
 
+CAMPOS_ORDENACAO_RESERVA = {
+    "id": TB_Reserva.reserva_id,
+    "sala": TB_Reserva.sala_id,
+    "responsavel": TB_Reserva.responsavel_id,
+    "data": TB_Reserva.data_inicio,
+    "frequencia": TB_Reserva.frequencia,
+    "status": TB_Reserva.status
+}
+
+
+FILTROS_RESERVA = {
+    "sala_id": TB_Reserva.sala_id,
+    "responsavel_id": TB_Reserva.responsavel_id,
+    "status": TB_Reserva.status,
+    "frequencia": TB_Reserva.frequencia
+}
+
+
+registrar_escrita_direta(
+    TB_Reserva,
+    lambda reserva: marshal(reserva, tb_reserva_fields)
+)
+
+
 class ReservaService:
 
     @staticmethod
     def listar():
 
-        cache_key = "reservas:*"
-
-        cache = verificarRedisCache(
-            "Reservas",
-            cache_key
+        campos = EspecificacaoDeConsulta.campos_da_requisicao(tb_reserva_fields)
+
+        spec = EspecificacaoDeConsulta.da_requisicao(
+            TB_Reserva,
+            TB_Reserva.reserva_id,
+            CAMPOS_ORDENACAO_RESERVA,
+            filtros=FILTROS_RESERVA,
+            sempre_paginada=True
+        ).projetar_campos(campos)
+
+        cache_key = montarChaveDeListagem(
+            "reservas",
+            spec,
+            filtros=EspecificacaoDeConsulta.parametros(FILTROS_RESERVA),
+            projecao=campos
         )
 
-        if cache:
-            logger.info("Retornando Reservas do Redis.")
-            return json.loads(cache)
-
-        query = db.select(TB_Reserva)
-
-        query = aplicar_ordenacao(
-            query,
-            {
-                "id": TB_Reserva.reserva_id,
-                "sala": TB_Reserva.sala_id,
-                "responsavel": TB_Reserva.responsavel_id,
-                "data": TB_Reserva.data_inicio,
-                "frequencia": TB_Reserva.frequencia,
-                "status": TB_Reserva.status
-            },
-            "id"
-        )
+        def consultar():
 
-        reservas = ReservaRepository.get_all(query)
+            reservas = ReservaRepository.get_all(spec)
 
-        resposta = marshal(
-            reservas,
-            tb_reserva_fields
-        )
+            resposta = spec.montar_pagina(
+                reservas,
+                lambda itens: marshal(itens, campos)
+            )
 
-        preencherRedisCache(
+            logger.info("Retornando Reservas do Banco de Dados.")
+            return resposta
+
+        return buscarComSingleFlight(
+            "Reservas",
             cache_key,
-            resposta
+            consultar
         )
 
-        logger.info("Retornando Reservas do Banco de Dados.")
-        return resposta
-
 
     @staticmethod
     def buscar_por_id(reserva_id):
 
-        cache_key = f"reservas:{reserva_id}"
+        cache_key = redis_client.entity_key("reservas", reserva_id)
 
         cache = verificarRedisCache(
             "Reservas",
@@ -88,27 +108,27 @@ class ReservaService:
 
         if cache:
             logger.info("Retornando Reservas do Redis.")
-            return json.loads(cache)
+            return respostaDoCache(cache)
 
         reserva = ReservaRepository.get_by_id(
             reserva_id
         )
 
         if reserva is None:
-            abort(404, description="Reserva não encontrada.")
+            abortarNaoEncontrado(cache_key, "Reserva não encontrada.")
 
         resposta = marshal(
             reserva,
             tb_reserva_fields
         )
 
-        preencherRedisCache(
+        payload = preencherRedisCache(
             cache_key,
             resposta
         )
 
         logger.info("Retornando Reservas do Banco de Dados.")
-        return resposta
+        return respostaDoCache(payload)
 
 
     @staticmethod
@@ -160,10 +180,6 @@ class ReservaService:
 
         ReservaRepository.update()
 
-        redis_client.delete_pattern(
-            "reservas:*"
-        )
-
         return reserva
 
 
@@ -246,12 +262,12 @@ class ReservaService:
                 dia
             )
 
-        ReservaRepository.update()
-
-        redis_client.delete_pattern(
-            "reservas:*"
+        ReservaRepository.recarregar_dias(
+            reserva
         )
 
+        ReservaRepository.update()
+
         return reserva
 
 
@@ -278,7 +294,3 @@ class ReservaService:
             reserva,
             deleted_by
         )
-
-        redis_client.delete_pattern(
-            "reservas:*"
-        )
\ No newline at end of file
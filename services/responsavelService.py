@@ -1,14 +1,21 @@
-import json
+from concurrent.futures import ThreadPoolExecutor
 from flask import abort
 from flask_restful import marshal
 from helpers.redis_cache import redis_client
 from helpers.logging import logger
 from helpers.auxiliaryFunctionsResources.redisCacheFunctions import (
     preencherRedisCache,
-    verificarRedisCache
+    verificarRedisCache,
+    buscarComSingleFlight,
+    montarChaveDeListagem,
+    respostaDoCache,
+    abortarNaoEncontrado
 )
+from helpers.cache_invalidation import registrar_escrita_direta
 from helpers.auxiliaryFunctionsResources.solrFunctions import (
     adicionarResponsavel,
+    adicionarDocumentos,
+    documentoResponsavel,
     deletarResponsavel,
     solrVerificationResponsavel
 )
@@ -16,17 +23,66 @@ from helpers.auxiliaryFunctionsResources.mascararCampos import (
     mascarar_campos,
     mascarar_campos_item
 )
-from helpers.auxiliaryFunctionsResources.helpFunctionsForSql import aplicar_ordenacao
+from helpers.query_spec import EspecificacaoDeConsulta
+from helpers.auxiliaryFunctionsResources.helpFunctionsForLote import (
+    validar_lote,
+    rejeitar_duplicados,
+    item_criado,
+    item_rejeitado,
+    resposta_do_lote
+)
+from helpers.validation_functions.responsavelSchemaValidation import MENSAGENS_UNICIDADE_RESPONSAVEL
 from helpers.auxiliaryFunctionsResources.genericValidationsForResource import (
     responsavelVerification,
     responsavelIsActive
 )
-from helpers.database import db
 from models.Responsavel import (
     TB_Responsavel,
-    tb_responsavel_fields
+    TB_ResponsavelLoteSchema,
+    tb_responsavel_fields,
+    ph
 )
 from repositories.responsavelRepository import ResponsavelRepository
+import os
+
+
+CAMPOS_MASCARADOS = [
+    "responsavel_cpf",
+    "responsavel_siap",
+    "responsavel_matricula"
+]
+
+# O argon2 libera o GIL: no cadastro em lote as senhas são processadas em
+# paralelo.
+LOTE_THREADS_HASH = int(os.getenv("LOTE_THREADS_HASH", 4))
+
+CAMPOS_ORDENACAO_RESPONSAVEL = {
+    "id": TB_Responsavel.responsavel_id,
+    "nome": TB_Responsavel.responsavel_nome,
+    "ativo": TB_Responsavel.ativo
+}
+
+
+FILTROS_RESPONSAVEL = {
+    "ativo": TB_Responsavel.ativo,
+    "funcao": TB_Responsavel.funcao
+}
+
+
+def serializar_responsavel(responsavel):
+    return mascarar_campos_item(
+        marshal(
+            responsavel,
+            tb_responsavel_fields
+        ),
+        CAMPOS_MASCARADOS
+    )
+
+
+registrar_escrita_direta(
+    TB_Responsavel,
+    serializar_responsavel
+)
 
 
 class ResponsavelService:
@@ -37,58 +93,48 @@ class ResponsavelService:
         if text and text != "*":
             return solrVerificationResponsavel(text)
 
-        cache_key = "responsaveis:*"
+        campos = EspecificacaoDeConsulta.campos_da_requisicao(tb_responsavel_fields)
 
-        cache = verificarRedisCache(
-            "Responsaveis",
-            cache_key
-        )
-
-        if cache:
-            logger.info("Retornando responsáveis do Redis.")
-            return json.loads(cache)
+        spec = EspecificacaoDeConsulta.da_requisicao(
+            TB_Responsavel,
+            TB_Responsavel.responsavel_id,
+            CAMPOS_ORDENACAO_RESPONSAVEL,
+            filtros=FILTROS_RESPONSAVEL
+        ).projetar_campos(campos)
 
-        query = db.select(TB_Responsavel)
-
-        query = aplicar_ordenacao(
-            query,
-            {
-                "id": TB_Responsavel.responsavel_id,
-                "nome": TB_Responsavel.responsavel_nome,
-                "ativo": TB_Responsavel.ativo
-            },
-            "id"
+        cache_key = montarChaveDeListagem(
+            "responsaveis",
+            spec,
+            filtros=EspecificacaoDeConsulta.parametros(FILTROS_RESPONSAVEL),
+            projecao=campos
         )
 
-        responsaveis = ResponsavelRepository.get_all(query)
+        def consultar():
 
-        resposta = marshal(
-            responsaveis,
-            tb_responsavel_fields
-        )
+            responsaveis = ResponsavelRepository.get_all(spec)
 
-        mascarar_campos(
-            resposta,
-            [
-                "responsavel_cpf",
-                "responsavel_siap",
-                "responsavel_matricula"
-            ]
-        )
+            resposta = spec.montar_pagina(
+                responsaveis,
+                lambda itens: mascarar_campos(
+                    marshal(itens, campos),
+                    CAMPOS_MASCARADOS
+                )
+            )
+
+            logger.info("Retornando responsáveis do Banco de Dados.")
+            return resposta
 
-        preencherRedisCache(
+        return buscarComSingleFlight(
+            "Responsaveis",
             cache_key,
-            resposta
+            consultar
         )
 
-        logger.info("Retornando responsáveis do Banco de Dados.")
-        return resposta
-
 
     @staticmethod
     def buscar_por_id(responsavel_id):
 
-        cache_key = f"responsaveis:{responsavel_id}"
+        cache_key = redis_client.entity_key("responsaveis", responsavel_id)
 
         cache = verificarRedisCache(
             "Responsavel",
@@ -97,35 +143,25 @@ class ResponsavelService:
 
         if cache:
             logger.info("Retornando responsáveis do Redis.")
-            return json.loads(cache)
+            return respostaDoCache(cache)
 
         responsavel = ResponsavelRepository.get_by_id(
             responsavel_id
         )
 
         if responsavel is None:
-            abort(404, description="Responsavel não encontrado.")
-
-        resposta = marshal(
-            responsavel,
-            tb_responsavel_fields
-        )
+            abortarNaoEncontrado(cache_key, "Responsavel não encontrado.")
 
-        mascarar_campos_item(
-            resposta,
-            [
-                "responsavel_cpf",
-                "responsavel_siap",
-                "responsavel_matricula"
-            ]
+        resposta = serializar_responsavel(
+            responsavel
         )
 
-        preencherRedisCache(
+        payload = preencherRedisCache(
             cache_key,
             resposta
         )
         logger.info("Retornando responsáveis do Banco de Dados.")
-        return resposta
+        return respostaDoCache(payload)
 
 
     @staticmethod
@@ -148,11 +184,71 @@ class ResponsavelService:
 
         adicionarResponsavel(responsavel)
 
-        redis_client.delete_pattern("responsaveis:*")
-
         return responsavel
 
 
+    @staticmethod
+    def criar_em_lote(dados):
+
+        validos, resultados = validar_lote(
+            dados,
+            TB_ResponsavelLoteSchema()
+        )
+
+        existentes = ResponsavelRepository.valores_ja_cadastrados({
+            campo: [
+                item[campo]
+                for item in validos.values()
+                if item.get(campo) is not None
+            ]
+            for campo in MENSAGENS_UNICIDADE_RESPONSAVEL
+        })
+
+        rejeitar_duplicados(
+            validos,
+            resultados,
+            existentes,
+            MENSAGENS_UNICIDADE_RESPONSAVEL
+        )
+
+        if not validos:
+            return resposta_do_lote(len(dados), resultados)
+
+        indices = list(validos)
+
+        with ThreadPoolExecutor(max_workers=LOTE_THREADS_HASH) as executor:
+            senhas = list(executor.map(
+                ph.hash,
+                [validos[indice].pop("senha") for indice in indices]
+            ))
+
+        primeiro = ResponsavelRepository.first() is None
+
+        responsaveis = ResponsavelRepository.inserir_em_lote([
+            {
+                **validos[indice],
+                "senha": senha,
+                "funcao": "admin" if primeiro and posicao == 0 else "responsavel"
+            }
+            for posicao, (indice, senha) in enumerate(zip(indices, senhas))
+        ])
+
+        documentos = []
+
+        for indice, responsavel in zip(indices, responsaveis):
+            resultados[indice] = item_criado(
+                indice,
+                marshal(responsavel, tb_responsavel_fields)
+            )
+            documentos.append(documentoResponsavel(responsavel))
+
+        ResponsavelRepository.update()
+
+        adicionarDocumentos(documentos, "responsáveis")
+
+        return resposta_do_lote(len(dados), resultados)
+
+
     @staticmethod
     def atualizar(responsavel_id, atualizados):
 
@@ -175,8 +271,6 @@ class ResponsavelService:
 
         adicionarResponsavel(responsavel)
 
-        redis_client.delete_pattern("responsaveis:*")
-
         return responsavel
 
 
@@ -207,6 +301,3 @@ class ResponsavelService:
         deletarResponsavel(
             responsavel_id
         )
-
-        redis_client.delete_pattern("responsaveis:*")
-        
\ No newline at end of file
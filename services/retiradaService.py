@@ -1,17 +1,19 @@
 from datetime import date, datetime, timedelta, UTC
-import json
 from flask import abort
 from flask_restful import marshal
-from helpers.database import db
+from sqlalchemy import select
 from helpers.redis_cache import redis_client
 from helpers.logging import logger
 from helpers.auxiliaryFunctionsResources.redisCacheFunctions import (
     verificarRedisCache,
-    preencherRedisCache
-)
-from helpers.auxiliaryFunctionsResources.helpFunctionsForSql import (
-    aplicar_ordenacao
+    preencherRedisCache,
+    buscarComSingleFlight,
+    montarChaveDeListagem,
+    respostaDoCache,
+    abortarNaoEncontrado
 )
+from helpers.cache_invalidation import registrar_escrita_direta
+from helpers.query_spec import EspecificacaoDeConsulta
 from helpers.auxiliaryFunctionsResources.genericValidationsForResource import (
     chaveIsDisponivel,
     chaveVerification,
@@ -24,6 +26,7 @@ from helpers.auxiliaryFunctionsResources.genericValidationsForResource import (
     retiradaVerification,
     retiradaStatus
 )
+from models.Chave import TB_Chave
 from models.Retirada import (
     TB_Retirada,
     tb_retirada_fields
@@ -34,77 +37,116 @@ from repositories.reservaRepository import ReservaRepository
 from repositories.retiradaRepository import RetiradaRepository
 from repositories.salaRepository import SalaRepository
 
+CAMPOS_ORDENACAO_RETIRADA = {
+    "id": TB_Retirada.retirada_id,
+    "chave": TB_Retirada.chave_id,
+    "responsavel": TB_Retirada.responsavel_id,
+    "reserva": TB_Retirada.reserva_id,
+    "data": TB_Retirada.data_retirada,
+    "status": TB_Retirada.status,
+}
+
+
+# sala_id não é coluna de tb_retirada: filtra pelas chaves da sala.
+FILTROS_RETIRADA = {
+    "status": TB_Retirada.status,
+    "chave_id": TB_Retirada.chave_id,
+    "responsavel_id": TB_Retirada.responsavel_id,
+    "reserva_id": TB_Retirada.reserva_id,
+    "data": TB_Retirada.data_retirada,
+    "sala_id": lambda sala_id: TB_Retirada.chave_id.in_(
+        select(TB_Chave.chave_id).where(TB_Chave.sala_id == int(sala_id))
+    )
+}
+
+
+registrar_escrita_direta(
+    TB_Retirada,
+    lambda retirada: marshal(retirada, tb_retirada_fields)
+)
+
+
+def abortar_retirada_recusada(chave_id, sala_da_reserva):
+    # Motivo pelo qual reservar_chave não alterou nenhuma linha.
+    chaveVerification(chave_id)
+    chaveIsDisponivel(chave_id)
+
+    chave = ChaveRepository.get_by_id(chave_id)
+
+    if sala_da_reserva is not None and chave.sala_id != sala_da_reserva:
+        abort(
+            409,
+            description="Reserva não pertence à sala da chave."
+        )
+
+    abort(404, description="Sala não encontrada")
+
+
 class RetiradaService:
     @staticmethod
     def listar():
-        cache_key = "retiradas:*"
-
-        cache = verificarRedisCache("Retiradas", cache_key)
-        if cache:
-            logger.info("Retornando Retiradas do Redis.")
-            return json.loads(cache)
-
-        query = db.select(TB_Retirada)
-
-        query = aplicar_ordenacao(
-            query,
-            {
-                "id": TB_Retirada.retirada_id,
-                "chave": TB_Retirada.chave_id,
-                "responsavel": TB_Retirada.responsavel_id,
-                "reserva": TB_Retirada.reserva_id,
-                "data": TB_Retirada.data_retirada,
-                "status": TB_Retirada.status,
-            },
-            "id"
+        campos = EspecificacaoDeConsulta.campos_da_requisicao(tb_retirada_fields)
+
+        spec = EspecificacaoDeConsulta.da_requisicao(
+            TB_Retirada,
+            TB_Retirada.retirada_id,
+            CAMPOS_ORDENACAO_RETIRADA,
+            filtros=FILTROS_RETIRADA,
+            sempre_paginada=True
+        ).projetar_campos(campos)
+
+        cache_key = montarChaveDeListagem(
+            "retiradas",
+            spec,
+            filtros=EspecificacaoDeConsulta.parametros(FILTROS_RETIRADA),
+            projecao=campos
         )
 
-        retiradas = RetiradaRepository.get_all(query)
+        def consultar():
 
-        resposta = marshal(retiradas, tb_retirada_fields)
+            retiradas = RetiradaRepository.get_all(spec)
 
-        preencherRedisCache(cache_key, resposta)
+            resposta = spec.montar_pagina(retiradas, lambda itens: marshal(itens, campos))
 
-        logger.info("Retornando Retiradas do Banco de Dados.")
-        return resposta
+            logger.info("Retornando Retiradas do Banco de Dados.")
+            return resposta
+
+        return buscarComSingleFlight("Retiradas", cache_key, consultar)
     
 
     @staticmethod
     def buscar_por_id(retirada_id):
-        cache_key = f"retiradas:{retirada_id}"
+        cache_key = redis_client.entity_key("retiradas", retirada_id)
 
         cache = verificarRedisCache("Retiradas", cache_key)
 
         if cache:
             logger.info("Retornando Retiradas do Redis.")
-            return json.loads(cache)
+            return respostaDoCache(cache)
 
         retirada = RetiradaRepository.get_by_id(retirada_id)
 
         if retirada is None:
-            abort(404, description="Retirada não encontrada.")
+            abortarNaoEncontrado(cache_key, "Retirada não encontrada.")
 
         retiradaVerification(retirada_id)
 
         resposta = marshal(retirada, tb_retirada_fields)
 
-        preencherRedisCache(cache_key, resposta)
+        payload = preencherRedisCache(cache_key, resposta)
 
         logger.info("Retornando Retiradas do Banco de Dados.")
-        return resposta
+        return respostaDoCache(payload)
     
 
     @staticmethod
     def criar(validado):
         hoje = date.today()
 
-        chaveVerification(validado["chave_id"])
-
-        chave = ChaveRepository.get_by_id(validado["chave_id"])
-
-        chaveIsDisponivel(validado["chave_id"])
+        responsavelVerification(validado["responsavel_id"])
+        responsavelNotActive(validado["responsavel_id"])
 
-        sala = SalaRepository.get_by_id(chave.sala_id)
+        sala_da_reserva = None
 
         if validado.get("reserva_id") is not None:
 
@@ -146,32 +188,32 @@ class RetiradaService:
                     description="Retirada fora do intervalo permitido."
                 )
 
-            if reserva.sala_id != chave.sala_id:
-                abort(
-                    409,
-                    description="Reserva não pertence à sala da chave."
-                )
+            sala_da_reserva = reserva.sala_id
 
-        if RetiradaRepository.get_retirada_ativa_da_sala(
-            chave.sala_id
-        ):
+        # A disponibilidade da chave é verificada e garantida no próprio UPDATE
+        # que a reserva; as consultas de diagnóstico só rodam quando ele falha.
+        sala_id = RetiradaRepository.reservar_chave(
+            validado["chave_id"],
+            sala_da_reserva
+        )
+
+        if sala_id is None:
+            RetiradaRepository.rollback()
+            abortar_retirada_recusada(validado["chave_id"], sala_da_reserva)
+
+        retirada = RetiradaRepository.inserir_se_sala_livre(
+            validado,
+            sala_id
+        )
+
+        if retirada is None:
+            RetiradaRepository.rollback()
             abort(
                 409,
                 description="Já existe uma retirada ativa para esta sala."
             )
 
-        responsavelVerification(validado["responsavel_id"])
-        responsavelNotActive(validado["responsavel_id"])
-
-        retirada = TB_Retirada(**validado)
-
-        chave.disponivel = False
-        sala.disponivel = False
-
-        RetiradaRepository.save(retirada)
-
-        redis_client.delete_pattern("retiradas:*")
-        redis_client.delete_pattern("historicos:*")
+        RetiradaRepository.update()
 
         return retirada
     
@@ -212,9 +254,6 @@ class RetiradaService:
 
         RetiradaRepository.update()
 
-        redis_client.delete_pattern("retiradas:*")
-        redis_client.delete_pattern("historicos:*")
-
         return retirada
     
 
@@ -232,6 +271,3 @@ class RetiradaService:
         )
 
         RetiradaRepository.soft_delete(retirada, deleted_by)
-
-        redis_client.delete_pattern("retiradas:*")
-        redis_client.delete_pattern("historicos:*")
\ No newline at end of file
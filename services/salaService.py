@@ -1,19 +1,32 @@
-import json
 from flask import abort
 from flask_restful import marshal
-from helpers.database import db
 from helpers.redis_cache import redis_client
 from helpers.logging import logger
-from helpers.auxiliaryFunctionsResources.helpFunctionsForSql import aplicar_ordenacao
+from helpers.query_spec import EspecificacaoDeConsulta
 from helpers.auxiliaryFunctionsResources.redisCacheFunctions import (
     verificarRedisCache,
-    preencherRedisCache
+    preencherRedisCache,
+    buscarComSingleFlight,
+    montarChaveDeListagem,
+    respostaDoCache,
+    abortarNaoEncontrado
+)
+from helpers.cache_invalidation import registrar_escrita_direta
+from helpers.auxiliaryFunctionsResources.helpFunctionsForLote import (
+    validar_lote,
+    rejeitar_duplicados,
+    item_criado,
+    item_rejeitado,
+    resposta_do_lote
 )
 from helpers.auxiliaryFunctionsResources.solrFunctions import (
     adicionarSala,
+    adicionarDocumentos,
+    documentoSala,
     deletarSala,
     solrVerificationSala
 )
+from helpers.auxiliaryFunctionsResources.helpFunctionsForChavesResources import gerar_nome_da_chave
 from helpers.auxiliaryFunctionsResources.genericValidationsForResource import (
     salaVerification
 )
@@ -22,10 +35,42 @@ from helpers.auxiliaryFunctionsResources.genericValidationsForResource import (
 )
 from models.Sala import (
     TB_Sala,
+    TB_SalaSchema,
     tb_sala_fields
 )
 from models.Chave import TB_Chave
 from repositories.salaRepository import SalaRepository
+from repositories.chaveRepository import ChaveRepository
+
+
+CAMPOS_ORDENACAO_SALA = {
+    "id": TB_Sala.sala_id,
+    "nome": TB_Sala.sala_nome,
+    "disponivel": TB_Sala.disponivel
+}
+
+
+FILTROS_SALA = {
+    "disponivel": TB_Sala.disponivel
+}
+
+
+MENSAGENS_UNICIDADE_SALA = {
+    "sala_nome": "Já existe uma Sala cadastrada com esse nome."
+}
+
+
+registrar_escrita_direta(
+    TB_Sala,
+    lambda sala: marshal(sala, tb_sala_fields)
+)
+
+
+# O nome da sala compõe o nome das chaves: ele precisa ser único entre as
+# salas ativas, no cadastro (individual ou em lote) e na renomeação.
+def _verificar_nome_disponivel(sala_nome, sala_id=None):
+    if SalaRepository.nomes_ja_cadastrados([sala_nome], sala_id):
+        abort(409, description=MENSAGENS_UNICIDADE_SALA["sala_nome"])
 
 
 class SalaService:
@@ -36,49 +81,45 @@ class SalaService:
         if text and text != "*":
             return solrVerificationSala(text)
 
-        cache_key = "salas:*"
+        campos = EspecificacaoDeConsulta.campos_da_requisicao(tb_sala_fields)
 
-        cache = verificarRedisCache(
-            "Salas",
-            cache_key
+        spec = EspecificacaoDeConsulta.da_requisicao(
+            TB_Sala,
+            TB_Sala.sala_id,
+            CAMPOS_ORDENACAO_SALA,
+            filtros=FILTROS_SALA
+        ).projetar_campos(campos)
+
+        cache_key = montarChaveDeListagem(
+            "salas",
+            spec,
+            filtros=EspecificacaoDeConsulta.parametros(FILTROS_SALA),
+            projecao=campos
         )
 
-        if cache:
-            logger.info("Retornando salas do Redis.")
-            return json.loads(cache)
+        def consultar():
 
-        query = db.select(TB_Sala)
+            salas = SalaRepository.get_all(spec)
 
-        query = aplicar_ordenacao(
-            query,
-            {
-                "id": TB_Sala.sala_id,
-                "nome": TB_Sala.sala_nome,
-                "disponivel": TB_Sala.disponivel
-            },
-            "id"
-        )
-
-        salas = SalaRepository.get_all(query)
+            resposta = spec.montar_pagina(
+                salas,
+                lambda itens: marshal(itens, campos)
+            )
 
-        resposta = marshal(
-            salas,
-            tb_sala_fields
-        )
+            logger.info("Retornando salas do Banco de Dados.")
+            return resposta
 
-        preencherRedisCache(
+        return buscarComSingleFlight(
+            "Salas",
             cache_key,
-            resposta
+            consultar
         )
 
-        logger.info("Retornando salas do Banco de Dados.")
-        return resposta
-
 
     @staticmethod
     def buscar_por_id(sala_id):
 
-        cache_key = f"salas:{sala_id}"
+        cache_key = redis_client.entity_key("salas", sala_id)
 
         cache = verificarRedisCache(
             "Salas",
@@ -87,36 +128,39 @@ class SalaService:
 
         if cache:
             logger.info("Retornando salas do Redis.")
-            return json.loads(cache)
+            return respostaDoCache(cache)
 
         sala = SalaRepository.get_by_id(sala_id)
 
         
         if sala is None:
-            abort(404, description="Sala não encontrada.")
+            abortarNaoEncontrado(cache_key, "Sala não encontrada.")
 
         resposta = marshal(
             sala,
             tb_sala_fields
         )
 
-        preencherRedisCache(
+        payload = preencherRedisCache(
             cache_key,
             resposta
         )
 
         logger.info("Retornando salas do Banco de Dados.")
-        return resposta
+        return respostaDoCache(payload)
 
 
     @staticmethod
     def criar(validado):
 
-        sala = TB_Sala(**validado)
+        _verificar_nome_disponivel(validado["sala_nome"])
+
+        # A sala já nasce com a chave 01.
+        sala = TB_Sala(**validado, contador_chaves=1)
         SalaRepository.save(sala)
 
         chave = TB_Chave(
-            chave_nome=f"Chave {sala.sala_nome} 01",
+            chave_nome=gerar_nome_da_chave(sala.sala_nome, 1),
             sala_id=sala.sala_id,
             disponivel=True
         )
@@ -125,11 +169,66 @@ class SalaService:
 
         adicionarSala(sala)
 
-        redis_client.delete_pattern("salas:*")
-
         return sala
 
 
+    @staticmethod
+    def criar_em_lote(dados):
+
+        validos, resultados = validar_lote(
+            dados,
+            TB_SalaSchema()
+        )
+
+        existentes = {
+            "sala_nome": SalaRepository.nomes_ja_cadastrados([
+                item["sala_nome"]
+                for item in validos.values()
+            ])
+        }
+
+        rejeitar_duplicados(
+            validos,
+            resultados,
+            existentes,
+            MENSAGENS_UNICIDADE_SALA
+        )
+
+        if not validos:
+            return resposta_do_lote(len(dados), resultados)
+
+        indices = list(validos)
+
+        salas = SalaRepository.inserir_em_lote([
+            {**validos[indice], "contador_chaves": 1}
+            for indice in indices
+        ])
+
+        ChaveRepository.inserir_em_lote([
+            {
+                "chave_nome": gerar_nome_da_chave(sala.sala_nome, 1),
+                "sala_id": sala.sala_id,
+                "disponivel": True
+            }
+            for sala in salas
+        ])
+
+        documentos = []
+
+        for indice, sala in zip(indices, salas):
+            resultados[indice] = item_criado(
+                indice,
+                marshal(sala, tb_sala_fields)
+            )
+            documentos.append(documentoSala(sala))
+
+        SalaRepository.update()
+
+        adicionarDocumentos(documentos, "salas")
+
+        return resposta_do_lote(len(dados), resultados)
+
+
     @staticmethod
     def atualizar(sala_id, atualizados):
 
@@ -139,6 +238,9 @@ class SalaService:
 
         nome_antigo = sala.sala_nome
 
+        if atualizados.get("sala_nome", nome_antigo) != nome_antigo:
+            _verificar_nome_disponivel(atualizados["sala_nome"], sala_id)
+
         for campo, valor in atualizados.items():
             setattr(
                 sala,
@@ -151,22 +253,15 @@ class SalaService:
             and nome_antigo != sala.sala_nome
         ):
 
-            chaves = SalaRepository.get_chaves_da_sala(
-                sala.sala_id
+            SalaRepository.renomear_chaves_da_sala(
+                sala.sala_id,
+                sala.sala_nome
             )
 
-            for indice, chave in enumerate(chaves, start=1):
-
-                chave.chave_nome = (
-                    f"Chave {sala.sala_nome} {indice:02d}"
-                )
-
         SalaRepository.update()
 
         adicionarSala(sala)
 
-        redis_client.delete_pattern("salas:*")
-
         return sala
 
 
@@ -193,7 +288,3 @@ class SalaService:
         deletarSala(
             sala_id
         )
-
-        redis_client.delete_pattern(
-            "salas:*"
-        )
\ No newline at end of file
@@ -0,0 +1,271 @@
+"""Fixtures dos testes: a aplicação sobre um sqlite temporário, sem Redis.
+
+As variáveis de ambiente são lidas na importação dos módulos, então precisam
+estar definidas antes do primeiro ``import app``. O Redis e o Solr apontam
+para uma porta fechada: o circuit breaker abre e toda leitura vai para o
+banco, e a indexação falha (só registrada no log) sem esperar timeout. Os
+testes do cache usam a fixture ``redis_falso`` (fakeredis).
+
+Com TESTES_DATABASE_URL os testes usam esse Postgres, que deve ser
+descartável: as tabelas são apagadas e recriadas a cada execução. Os testes
+de SQL exclusivo do Postgres (fixture ``postgres``) só rodam nele.
+"""
+import os
+import sys
+import tempfile
+import time as relogio
+from datetime import date, time
+
+DIRETORIO_TEMPORARIO = tempfile.mkdtemp(prefix="keycontrol-testes-")
+
+os.environ["DATABASE_URL"] = (
+    os.getenv("TESTES_DATABASE_URL")
+    or f"sqlite:///{os.path.join(DIRETORIO_TEMPORARIO, 'keycontrol.db')}"
+)
+os.environ.pop("DATABASE_REPLICA_URLS", None)
+os.environ["SQL_CONTAGEM_MODO"] = "assert"
+os.environ["REDIS_HOST"] = "127.0.0.1"
+os.environ["REDIS_PORT"] = "1"
+# A sondagem não fecha o circuito no meio de um teste com o Redis falso.
+os.environ["REDIS_INTERVALO_SONDAGEM"] = "3600"
+os.environ["SOLR_URL"] = "http://127.0.0.1:1/solr/keycontrol"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import event, insert, text
+
+import app as aplicacao
+from helpers.database import db
+from helpers.local_cache import local_cache
+from models.Sala import TB_Sala
+from models.Chave import TB_Chave
+from models.Responsavel import TB_Responsavel
+from models.Reserva import TB_Reserva
+from models.ReservaDia import TB_ReservaDia
+from models.Retirada import TB_Retirada
+from models.HistoricoRetiradas import TB_HistoricoRetirada
+
+# Quantas linhas de cada tabela: o bastante para que uma consulta por linha
+# (N+1) estoure qualquer limite de rota.
+QUANTIDADE = 5
+
+# A view do histórico é criada pela migração com SQL do Postgres.
+TABELAS_FORA_DO_SQLITE = ("vw_historico_retiradas",)
+
+
+def _popular():
+    responsaveis = [
+        {
+            "responsavel_id": i,
+            "responsavel_nome": f"Responsável {i}",
+            "responsavel_cpf": f"000.000.000-{i:02d}",
+            "email": f"responsavel{i}@example.com",
+            "senha": "x",
+            "funcao": "responsavel",
+            "ativo": True
+        }
+        for i in range(1, QUANTIDADE + 1)
+    ]
+    salas = [
+        {"sala_id": i, "sala_nome": f"Sala {i}", "disponivel": True, "contador_chaves": 1}
+        for i in range(1, QUANTIDADE + 1)
+    ]
+    chaves = [
+        {"chave_id": i, "chave_nome": f"Sala {i} 01", "sala_id": i, "disponivel": True}
+        for i in range(1, QUANTIDADE + 1)
+    ]
+    reservas = [
+        {
+            "reserva_id": i,
+            "sala_id": i,
+            "responsavel_id": i,
+            "hora_inicio": time(8),
+            "hora_fim": time(10),
+            "data_inicio": date(2026, 1, 1),
+            "data_fim": date(2026, 6, 30),
+            "frequencia": "semanal",
+            "status": "ativa"
+        }
+        for i in range(1, QUANTIDADE + 1)
+    ]
+    dias = [
+        {"reserva_id": i, "dia_semana": dia}
+        for i in range(1, QUANTIDADE + 1)
+        for dia in (1, 3, 5)
+    ]
+    retiradas = [
+        {
+            "retirada_id": i,
+            "chave_id": i,
+            "responsavel_id": i,
+            "reserva_id": i,
+            "data_retirada": date(2026, 1, i),
+            "hora_retirada": time(8),
+            "hora_prevista_devolucao": time(10),
+            "status": "pendente"
+        }
+        for i in range(1, QUANTIDADE + 1)
+    ]
+    historico = [
+        {
+            "retirada_id": i,
+            "data_retirada": date(2026, 1, i),
+            "hora_retirada": time(8),
+            "hora_prevista_devolucao": time(10),
+            "status": "pendente",
+            "sala_id": i,
+            "sala_nome": f"Sala {i}",
+            "chave_id": i,
+            "chave_nome": f"Sala {i} 01",
+            "responsavel_id": i,
+            "responsavel_nome": f"Responsável {i}"
+        }
+        for i in range(1, QUANTIDADE + 1)
+    ]
+
+    for modelo, linhas in (
+        (TB_Responsavel, responsaveis),
+        (TB_Sala, salas),
+        (TB_Chave, chaves),
+        (TB_Reserva, reservas),
+        (TB_ReservaDia, dias),
+        (TB_Retirada, retiradas),
+        (TB_HistoricoRetirada, historico)
+    ):
+        db.session.execute(insert(modelo), linhas)
+
+    # Os ids foram informados: as sequências do Postgres seguem do maior.
+    if db.engine.dialect.name == "postgresql":
+        for tabela in db.metadata.sorted_tables:
+            if tabela.name in TABELAS_FORA_DO_SQLITE or len(tabela.primary_key.columns) != 1:
+                continue
+
+            coluna = next(iter(tabela.primary_key.columns)).name
+            db.session.execute(
+                text(f"SELECT setval(pg_get_serial_sequence(:tabela, :coluna), (SELECT max({coluna}) FROM {tabela.name}))"),
+                {"tabela": tabela.name, "coluna": coluna}
+            )
+
+    db.session.commit()
+
+
+def _preparar_extensoes(tabelas):
+    with db.engine.begin() as conexao:
+        disponivel = conexao.scalar(
+            text("SELECT count(*) FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        )
+
+        if disponivel:
+            conexao.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            return
+
+    # Sem pg_trgm no servidor de testes, os índices de trigramas (que só
+    # aceleram a busca por trecho do nome) ficam de fora.
+    for tabela in tabelas:
+        for indice in list(tabela.indexes):
+            if "gin_trgm_ops" in (indice.dialect_options["postgresql"]["ops"] or {}).values():
+                tabela.indexes.discard(indice)
+
+
+@pytest.fixture(scope="session")
+def app():
+    flask_app = aplicacao.app
+    flask_app.config["TESTING"] = True
+
+    tabelas = [
+        tabela
+        for nome, tabela in db.metadata.tables.items()
+        if nome not in TABELAS_FORA_DO_SQLITE
+    ]
+
+    with flask_app.app_context():
+        if db.engine.dialect.name == "postgresql":
+            _preparar_extensoes(tabelas)
+
+        db.metadata.drop_all(db.engine, tables=tabelas)
+        db.metadata.create_all(db.engine, tables=tabelas)
+        _popular()
+        db.session.remove()
+
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    # Sem cache entre os testes: cada requisição tem de chegar ao banco.
+    local_cache.clear()
+    return app.test_client()
+
+
+@pytest.fixture
+def consultas_sql(app):
+    # Comandos SQL emitidos durante o teste (respostas do cache não emitem).
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+
+    event.listen(engine, "before_cursor_execute", registrar)
+    yield consultas
+    event.remove(engine, "before_cursor_execute", registrar)
+
+
+@pytest.fixture
+def postgres(app):
+    with app.app_context():
+        if db.engine.dialect.name != "postgresql":
+            pytest.skip("SQL exclusivo do Postgres: defina TESTES_DATABASE_URL")
+
+
+@pytest.fixture(scope="session")
+def servidor_redis():
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def redis_falso(app, servidor_redis, monkeypatch):
+    # Troca só o pool de conexões dos clientes: os módulos que importaram
+    # redis_client e redis_binary_client passam a falar com o fakeredis.
+    import fakeredis
+    from helpers import redis_cache
+
+    for cliente in (
+        redis_cache.redis_client,
+        redis_cache.redis_binary_client,
+        redis_cache.redis_pubsub_client
+    ):
+        falso = fakeredis.FakeRedis(
+            server=servidor_redis,
+            decode_responses=cliente.get_encoder().decode_responses
+        )
+        monkeypatch.setattr(cliente, "connection_pool", falso.connection_pool)
+
+    breaker = redis_cache.circuit_breaker
+    monkeypatch.setattr(breaker, "estado", breaker.FECHADO)
+    monkeypatch.setattr(breaker, "falhas_consecutivas", 0)
+    monkeypatch.setattr(breaker, "aberto_desde", None)
+
+    redis_cache.redis_client.flushall()
+    redis_cache._pending_invalidations.clear()
+
+    # O listener de invalidação assina o canal uma vez no servidor falso e
+    # continua nele nos testes seguintes (o servidor é o mesmo da sessão).
+    if not getattr(servidor_redis, "listener_iniciado", False):
+        redis_cache._listener_pid = None
+        redis_cache.start_invalidation_listener()
+        servidor_redis.listener_iniciado = True
+
+    prazo = relogio.monotonic() + 2
+
+    while not redis_cache.redis_client.pubsub_numsub(redis_cache.CANAL_INVALIDACAO)[0][1]:
+        assert relogio.monotonic() < prazo, "listener de invalidação não assinou o canal"
+        relogio.sleep(0.01)
+
+    local_cache.clear()
+    yield redis_cache.redis_binary_client
+    local_cache.clear()
@@ -0,0 +1,51 @@
+"""Payloads do cache: bytes finais, comprimidos acima do limite."""
+import json
+import zlib
+
+from helpers.auxiliaryFunctionsResources.redisCacheFunctions import respostaDoCache, serializarResposta
+from helpers.cache_policy import POLITICAS
+
+GRANDE = [{"sala_id": i, "sala_nome": f"Sala {i}"} for i in range(200)]
+
+
+def test_formato_pelo_tamanho():
+    pequeno = serializarResposta([{"sala_nome": "Sala ç"}])
+
+    assert pequeno == b"j" + '[{"sala_nome":"Sala ç"}]'.encode()
+
+    grande = serializarResposta(GRANDE)
+
+    assert grande[:1] == b"z"
+    assert json.loads(zlib.decompress(grande[1:])) == GRANDE
+
+
+def test_deflate_enviado_sem_descomprimir(app):
+    payload = serializarResposta(GRANDE)
+
+    with app.test_request_context("/", headers={"Accept-Encoding": "gzip, deflate"}):
+        resposta = respostaDoCache(payload)
+
+    assert resposta.headers["Content-Encoding"] == "deflate"
+    assert "Accept-Encoding" in resposta.headers["Vary"]
+    assert resposta.get_data() == payload[1:]
+
+
+def test_cliente_sem_deflate_recebe_json(app):
+    with app.test_request_context("/", headers={"Accept-Encoding": "gzip"}):
+        resposta = respostaDoCache(serializarResposta(GRANDE))
+
+    assert "Content-Encoding" not in resposta.headers
+    assert json.loads(resposta.get_data()) == GRANDE
+
+
+def test_listagem_do_cache_comprimida(client, redis_falso, monkeypatch):
+    monkeypatch.setattr(POLITICAS["salas"], "compressao_minima", 1)
+    cabecalhos = {"Accept-Encoding": "deflate"}
+
+    client.get("/salas", headers=cabecalhos)
+    resposta = client.get("/salas", headers=cabecalhos)
+    (chave,) = redis_falso.keys("salas:v0:lista:*")
+
+    assert resposta.headers["Content-Encoding"] == "deflate"
+    assert redis_falso.get(chave) == b"z" + resposta.get_data()
+    assert json.loads(zlib.decompress(resposta.get_data())) == client.get("/salas").get_json()
@@ -0,0 +1,44 @@
+"""Gerações dos namespaces: uma escrita troca as chaves das listagens."""
+from helpers.redis_cache import (
+    generation_key,
+    invalidate_namespace,
+    namespace_version,
+    versioned_key
+)
+
+
+def test_chave_versionada_segue_a_geracao(redis_falso):
+    assert namespace_version("salas") == 0
+    assert versioned_key("salas", "lista:x") == "salas:v0:lista:x"
+
+    assert invalidate_namespace("salas")
+
+    assert redis_falso.get(generation_key("salas")) == b"1"
+    assert versioned_key("salas", "lista:x") == "salas:v1:lista:x"
+    assert namespace_version("chaves") == 0
+
+
+def test_listagem_servida_do_cache_ate_a_escrita(client, redis_falso, consultas_sql):
+    primeira = client.get("/salas")
+    assert primeira.status_code == 200
+    assert redis_falso.keys("salas:v0:lista:*")
+
+    del consultas_sql[:]
+    segunda = client.get("/salas")
+
+    assert segunda.get_json() == primeira.get_json()
+    assert consultas_sql == []
+
+    criada = client.post("/salas", json={"sala_nome": "Sala Geração", "disponivel": True})
+    assert criada.status_code == 201
+
+    del consultas_sql[:]
+    depois = client.get("/salas")
+    nomes = [sala["sala_nome"] for sala in depois.get_json()]
+
+    assert "Sala Geração" in nomes
+    assert consultas_sql != []
+    assert redis_falso.get(generation_key("salas")) == b"1"
+    # A listagem antiga não é apagada: só deixa de ser lida e expira.
+    assert redis_falso.keys("salas:v0:lista:*")
+    assert redis_falso.keys("salas:v1:lista:*")
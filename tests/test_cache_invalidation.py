@@ -0,0 +1,137 @@
+"""Invalidação e write-through do cache disparados pelos commits do ORM."""
+import json
+from datetime import date, time
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from helpers import cache_invalidation
+from helpers.database import db
+from models.Reserva import TB_Reserva
+from models.ReservaDia import TB_ReservaDia
+import services.reservaService  # registra o write-through de reservas
+
+
+class RedisGravador:
+
+    def __init__(self):
+        self.chamadas = []
+
+    def invalidate_namespace(self, *namespaces, entities=None):
+        self.chamadas.append((set(namespaces), dict(entities or {})))
+        return True
+
+
+@pytest.fixture
+def gravador(monkeypatch):
+    gravador = RedisGravador()
+    monkeypatch.setattr(cache_invalidation, "redis_client", gravador)
+    monkeypatch.setattr(cache_invalidation, "entity_key", lambda namespace, entidade_id: f"{namespace}:entidades:v1:{entidade_id}")
+    return gravador
+
+
+@pytest.fixture
+def consultas_no_flush(app):
+    # SELECTs emitidos enquanto o flush está em andamento.
+    estado = {"no_flush": False, "consultas": []}
+
+    def inicio(session, flush_context, instances):
+        estado["no_flush"] = True
+
+    def fim(session, flush_context):
+        estado["no_flush"] = False
+
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        if estado["no_flush"] and statement.lstrip().upper().startswith("SELECT"):
+            estado["consultas"].append(statement)
+
+    with app.app_context():
+        event.listen(Session, "before_flush", inicio)
+        event.listen(Session, "after_flush_postexec", fim)
+        event.listen(db.engine, "before_cursor_execute", contar)
+
+        try:
+            yield estado["consultas"]
+        finally:
+            event.remove(Session, "before_flush", inicio)
+            event.remove(Session, "after_flush_postexec", fim)
+            event.remove(db.engine, "before_cursor_execute", contar)
+            db.session.remove()
+
+
+def _payload(gravacao):
+    payload, ttl = gravacao
+    assert payload[:1] == b"j"
+    return json.loads(payload[1:])
+
+
+def test_write_through_serializa_fora_do_flush(gravador, consultas_no_flush):
+    reserva = TB_Reserva(
+        sala_id=1,
+        responsavel_id=1,
+        hora_inicio=time(14),
+        hora_fim=time(16),
+        data_inicio=date(2026, 3, 1),
+        data_fim=date(2026, 3, 31),
+        frequencia="semanal",
+        status="ativa"
+    )
+    db.session.add(reserva)
+    db.session.flush()
+    db.session.add_all([
+        TB_ReservaDia(reserva_id=reserva.reserva_id, dia_semana=2),
+        TB_ReservaDia(reserva_id=reserva.reserva_id, dia_semana=4)
+    ])
+    db.session.commit()
+
+    namespaces, entidades = gravador.chamadas[-1]
+    gravado = _payload(entidades[f"reservas:entidades:v1:{reserva.reserva_id}"])
+
+    assert consultas_no_flush == []
+    assert {"reservas"} <= namespaces
+    assert sorted(gravado["dias_semana"]) == [2, 4]
+
+
+def test_alteracao_com_relacao_nao_carregada(gravador, consultas_no_flush):
+    # tb_reserva_dia não está carregada: o marshal a busca, mas só depois
+    # do flush.
+    reserva = db.session.get(TB_Reserva, 2)
+    reserva.hora_fim = time(11)
+    db.session.commit()
+
+    namespaces, entidades = gravador.chamadas[-1]
+    gravado = _payload(entidades["reservas:entidades:v1:2"])
+
+    assert consultas_no_flush == []
+    assert gravado["hora_fim"] == "11:00"
+    assert sorted(gravado["dias_semana"]) == [1, 3, 5]
+
+
+def test_rollback_descarta_as_anotacoes(gravador, consultas_no_flush):
+    reserva = db.session.get(TB_Reserva, 3)
+    reserva.hora_fim = time(12)
+    db.session.flush()
+    db.session.rollback()
+
+    db.session.commit()
+
+    assert gravador.chamadas == []
+
+
+def test_entidade_sobrescrita_no_cache(client, redis_falso, consultas_sql):
+    criada = client.post("/salas", json={"sala_nome": "Sala Write-through", "disponivel": True}).get_json()
+    sala_id = criada["sala_id"]
+
+    # A criação já deixou a entidade no cache.
+    del consultas_sql[:]
+    assert client.get(f"/salas/{sala_id}").get_json() == criada
+    assert consultas_sql == []
+
+    alterada = client.put(f"/salas/{sala_id}", json={"disponivel": False}).get_json()
+    assert alterada["disponivel"] is False
+
+    del consultas_sql[:]
+    assert client.get(f"/salas/{sala_id}").get_json() == alterada
+    assert consultas_sql == []
+    assert redis_falso.get(f"salas:entidades:v0:{sala_id}")[:1] == b"j"
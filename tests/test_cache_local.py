@@ -0,0 +1,68 @@
+"""Cache local (L1) por worker, invalidado por pub/sub."""
+import time
+
+from helpers.auxiliaryFunctionsResources.redisCacheFunctions import preencherRedisCache, verificarRedisCache
+from helpers.local_cache import LocalCache, local_cache
+from helpers.redis_cache import CANAL_INVALIDACAO, generation_key, invalidate_namespace, namespace_version, redis_client
+
+CHAVE = "salas:v0:lista:teste"
+
+
+def _aguardar(condicao, prazo=2.0):
+    limite = time.monotonic() + prazo
+
+    while not condicao():
+        assert time.monotonic() < limite
+        time.sleep(0.01)
+
+
+def test_lru_e_ttl():
+    cache = LocalCache(max_itens=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+    # O TTL pedido nunca passa do TTL do cache local.
+    cache.set("d", 4, ttl=60)
+    time.sleep(0.06)
+
+    assert cache.get("d") is None
+
+
+def test_leitura_repetida_nao_vai_ao_redis(redis_falso):
+    payload = preencherRedisCache(CHAVE, [{"sala_id": 1}])
+    redis_falso.delete(CHAVE)
+
+    assert verificarRedisCache("Salas", CHAVE) == payload
+
+
+def test_miss_local_preenchido_pelo_redis(redis_falso):
+    redis_falso.set(CHAVE, b"j[]")
+
+    assert verificarRedisCache("Salas", CHAVE) == b"j[]"
+    assert local_cache.get(CHAVE) == b"j[]"
+
+
+def test_invalidacao_local_imediata(redis_falso):
+    assert namespace_version("salas") == 0
+    preencherRedisCache(CHAVE, [])
+    assert local_cache.get(generation_key("salas")) == (0, None)
+
+    invalidate_namespace("salas")
+
+    assert local_cache.get(CHAVE) is None
+    assert local_cache.get(generation_key("salas")) is None
+
+
+def test_invalidacao_de_outro_worker_pelo_pubsub(redis_falso):
+    preencherRedisCache(CHAVE, [])
+    local_cache.set("chaves:v0:lista:teste", b"j[]")
+
+    # Mensagem publicada por outro worker após a própria invalidação.
+    redis_client.publish(CANAL_INVALIDACAO, "salas,historico")
+
+    _aguardar(lambda: local_cache.get(CHAVE) is None)
+    assert local_cache.get("chaves:v0:lista:teste") == b"j[]"
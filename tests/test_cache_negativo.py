@@ -0,0 +1,51 @@
+"""Cache negativo: ids inexistentes respondem 404 do cache por pouco tempo."""
+from sqlalchemy import update
+
+from helpers.cache_policy import POLITICAS
+from helpers.database import db
+from models.Sala import TB_Sala
+
+# Fora do alcance das sequências, para não colidir com os ids gerados.
+SALA_ID = 900001
+
+
+def test_404_servido_do_cache(client, redis_falso, consultas_sql):
+    primeira = client.get(f"/salas/{SALA_ID}")
+
+    del consultas_sql[:]
+    segunda = client.get(f"/salas/{SALA_ID}")
+
+    assert (primeira.status_code, segunda.status_code) == (404, 404)
+    assert segunda.get_json()["message"] == "Sala não encontrada."
+    assert consultas_sql == []
+
+    chave = f"salas:entidades:v0:{SALA_ID}"
+    assert redis_falso.get(chave)[:1] == b"n"
+    assert 0 < redis_falso.ttl(chave) <= POLITICAS["salas"].ttl_negativo
+
+
+def test_criacao_sobrescreve_a_marca(app, client, redis_falso, consultas_sql):
+    assert client.get(f"/salas/{SALA_ID + 1}").status_code == 404
+
+    with app.app_context():
+        db.session.add(TB_Sala(sala_id=SALA_ID + 1, sala_nome="Sala Ressurgida", disponivel=True, contador_chaves=0))
+        db.session.commit()
+
+    del consultas_sql[:]
+    resposta = client.get(f"/salas/{SALA_ID + 1}")
+
+    assert resposta.status_code == 200
+    assert resposta.get_json()["sala_nome"] == "Sala Ressurgida"
+    assert consultas_sql == []
+
+
+def test_escrita_em_lote_descarta_as_marcas(app, client, redis_falso, consultas_sql):
+    assert client.get(f"/salas/{SALA_ID + 2}").status_code == 404
+
+    with app.app_context():
+        db.session.execute(update(TB_Sala).where(TB_Sala.sala_id == -1).values(disponivel=True))
+        db.session.commit()
+
+    del consultas_sql[:]
+    assert client.get(f"/salas/{SALA_ID + 2}").status_code == 404
+    assert consultas_sql != []
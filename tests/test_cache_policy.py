@@ -0,0 +1,87 @@
+"""Políticas de cache por namespace e limite de variantes das listagens."""
+from helpers.auxiliaryFunctionsResources.redisCacheFunctions import gravarVarianteDeListagem, preencherRedisCache
+from helpers.cache_policy import (
+    POLITICAS,
+    TTL_PADRAO,
+    PoliticaDeCache,
+    _montar_politica,
+    politica_da_chave,
+    politica_do_namespace
+)
+from helpers.local_cache import local_cache
+
+
+def _politica(max_variantes=2, stale_while_revalidate=True):
+    return PoliticaDeCache(
+        ttl=60,
+        ttl_negativo=5,
+        max_variantes=max_variantes,
+        compressao_minima=1024,
+        stale_while_revalidate=stale_while_revalidate
+    )
+
+
+def test_politica_pela_chave():
+    assert politica_da_chave("salas:v3:lista:abc") is POLITICAS["salas"]
+    assert politica_da_chave("retiradas:entidades:v0:1") is POLITICAS["retiradas"]
+    assert POLITICAS["retiradas"].stale_while_revalidate is False
+
+
+def test_variaveis_de_ambiente(monkeypatch):
+    monkeypatch.setenv("CACHE_SALAS_TTL", "42")
+    monkeypatch.setenv("CACHE_SALAS_STALE", "false")
+    monkeypatch.setenv("CACHE_SALAS_MAX_VARIANTES", " ")
+
+    politica = _montar_politica("salas")
+
+    assert (politica.ttl, politica.stale_while_revalidate, politica.max_variantes) == (42, False, 16)
+
+
+def test_namespace_sem_padrao(monkeypatch):
+    monkeypatch.delitem(POLITICAS, "relatorios", raising=False)
+    politica = politica_do_namespace("relatorios")
+
+    assert politica.ttl == TTL_PADRAO
+    assert politica_do_namespace("relatorios") is politica
+
+
+def test_ttl_da_entidade(redis_falso):
+    preencherRedisCache("retiradas:entidades:v0:1", {"retirada_id": 1})
+
+    assert 0 < redis_falso.ttl("retiradas:entidades:v0:1") <= POLITICAS["retiradas"].ttl
+
+
+def test_limite_de_variantes(redis_falso):
+    politica = _politica(max_variantes=2)
+
+    for resumo in ("a", "b", "c"):
+        gravarVarianteDeListagem(f"salas:v0:lista:{resumo}", b"j[]", politica)
+
+    assert redis_falso.exists("salas:v0:lista:a", "salas:v0:lista:b") == 2
+    assert redis_falso.get("salas:v0:lista:c") is None
+    assert local_cache.get("salas:v0:lista:c") is None
+    assert redis_falso.smembers("salas:v0:variantes") == {b"a", b"b"}
+
+    # Uma variante já contada continua sendo regravada.
+    gravarVarianteDeListagem("salas:v0:lista:a", b"j[1]", politica)
+    assert redis_falso.get("salas:v0:lista:a") == b"j[1]"
+
+    # A nova geração começa com o limite zerado.
+    gravarVarianteDeListagem("salas:v1:lista:c", b"j[]", politica)
+    assert redis_falso.get("salas:v1:lista:c") == b"j[]"
+
+
+def test_ttls_da_variante_e_da_copia_stale(redis_falso):
+    gravarVarianteDeListagem("salas:v0:lista:a", b"j[]", _politica())
+
+    assert 60 - 2 <= redis_falso.ttl("salas:v0:lista:a") <= 60
+    assert 120 - 2 <= redis_falso.ttl("stale:salas:v0:lista:a") <= 120
+    assert 120 - 2 <= redis_falso.ttl("salas:v0:variantes") <= 120
+
+
+def test_sem_copia_stale(redis_falso):
+    gravarVarianteDeListagem("retiradas:v0:lista:a", b"j[]", _politica(stale_while_revalidate=False))
+
+    assert redis_falso.exists("retiradas:v0:lista:a") == 1
+    assert redis_falso.exists("stale:retiradas:v0:lista:a") == 0
+    assert 60 - 2 <= redis_falso.ttl("retiradas:v0:variantes") <= 60
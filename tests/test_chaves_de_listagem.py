@@ -0,0 +1,70 @@
+"""Chaves canônicas das listagens: uma por variante de fato diferente."""
+from helpers.auxiliaryFunctionsResources.redisCacheFunctions import montarChaveDeListagem
+from helpers.query_spec import EspecificacaoDeConsulta
+from models.Sala import TB_Sala, tb_sala_fields
+from services.salaService import CAMPOS_ORDENACAO_SALA, FILTROS_SALA
+
+
+def _chave(app, url):
+    # Mesma montagem de SalaService.listar.
+    with app.test_request_context(url):
+        campos = EspecificacaoDeConsulta.campos_da_requisicao(tb_sala_fields)
+        spec = EspecificacaoDeConsulta.da_requisicao(
+            TB_Sala,
+            TB_Sala.sala_id,
+            CAMPOS_ORDENACAO_SALA,
+            filtros=FILTROS_SALA
+        ).projetar_campos(campos)
+
+        return montarChaveDeListagem(
+            "salas",
+            spec,
+            filtros=EspecificacaoDeConsulta.parametros(FILTROS_SALA),
+            projecao=campos
+        )
+
+
+def test_valores_padrao_e_parametros_irrelevantes(app, redis_falso):
+    padrao = _chave(app, "/salas")
+
+    assert padrao.startswith("salas:v0:lista:")
+    assert _chave(app, "/salas?sort=id&order=asc") == padrao
+    assert _chave(app, "/salas?sort=inexistente&order=qualquer") == padrao
+    assert _chave(app, "/salas?pagina=3&_=123") == padrao
+    assert _chave(app, "/salas?disponivel=") == padrao
+
+
+def test_variantes_distintas(app, redis_falso):
+    chaves = {
+        _chave(app, url)
+        for url in (
+            "/salas",
+            "/salas?order=desc",
+            "/salas?sort=nome",
+            "/salas?disponivel=true",
+            "/salas?limit=10",
+            "/salas?limit=20",
+            "/salas?fields=sala_nome"
+        )
+    }
+
+    assert len(chaves) == 7
+
+
+def test_normalizacao_dos_valores(app, redis_falso):
+    assert _chave(app, "/salas?order=DESC") == _chave(app, "/salas?order=desc")
+    assert _chave(app, "/salas?disponivel=%20true%20") == _chave(app, "/salas?disponivel=true")
+    assert (
+        _chave(app, "/salas?fields=sala_nome,sala_id")
+        == _chave(app, "/salas?fields=sala_id,%20sala_nome")
+    )
+
+
+def test_paginacao_faz_parte_da_chave(app, redis_falso):
+    # Com ?limit= a resposta é uma página (envelope), sem ele a lista simples.
+    assert _chave(app, "/salas") != _chave(app, "/salas?limit=50")
+    assert _chave(app, "/salas?limit=10&cursor=") == _chave(app, "/salas?limit=10")
+
+
+def test_sem_redis_nao_ha_chave(app):
+    assert _chave(app, "/salas") is None
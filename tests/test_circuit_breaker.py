@@ -0,0 +1,108 @@
+"""Circuit breaker do Redis: falha aberta para o banco e recuperação."""
+import time
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from helpers import redis_cache
+from helpers.redis_cache import INDISPONIVEL, CircuitBreaker, circuit_breaker, invalidate_namespace, run_guarded
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def _aguardar(condicao, prazo=2.0):
+    limite = time.monotonic() + prazo
+
+    while not condicao():
+        assert time.monotonic() < limite
+        time.sleep(0.01)
+
+
+def test_abre_sonda_e_fecha():
+    sondagens = []
+    recuperacoes = []
+
+    def sondar():
+        sondagens.append(1)
+
+        if len(sondagens) < 3:
+            raise RedisConnectionError("ainda fora")
+
+    breaker = CircuitBreaker("teste", 2, 0.01, sondar)
+    breaker.ao_fechar(lambda: recuperacoes.append(1))
+
+    breaker.registrar_falha(RedisConnectionError("fora"))
+    assert breaker.disponivel()
+
+    breaker.registrar_falha(RedisConnectionError("fora"))
+    assert not breaker.disponivel()
+    assert breaker.status()["aberturas"] == 1
+
+    _aguardar(lambda: recuperacoes)
+
+    assert breaker.disponivel()
+    assert len(sondagens) == 3
+    assert recuperacoes == [1]
+    assert breaker.status()["falhas_consecutivas"] == 0
+    assert breaker.status()["aberto_desde"] is None
+
+
+def test_sucesso_zera_as_falhas():
+    breaker = CircuitBreaker("teste", 2, 3600, lambda: None)
+
+    breaker.registrar_falha(RedisConnectionError("fora"))
+    breaker.registrar_sucesso()
+    breaker.registrar_falha(RedisConnectionError("fora"))
+
+    assert breaker.disponivel()
+
+
+def test_circuito_aberto_nao_chega_ao_redis(redis_falso):
+    chamadas = []
+
+    def falhar():
+        chamadas.append(1)
+        raise RedisConnectionError("fora")
+
+    for _ in range(circuit_breaker.limite_falhas):
+        assert run_guarded(falhar, None) is None
+
+    assert not circuit_breaker.disponivel()
+    assert run_guarded(falhar) is INDISPONIVEL
+    assert len(chamadas) == circuit_breaker.limite_falhas
+
+
+@pytest.fixture
+def redis_fora_do_ar(redis_falso, monkeypatch):
+    servidor = fakeredis.FakeServer()
+    servidor.connected = False
+
+    for cliente in (redis_cache.redis_client, redis_cache.redis_binary_client):
+        falso = fakeredis.FakeRedis(server=servidor, decode_responses=cliente.get_encoder().decode_responses)
+        monkeypatch.setattr(cliente, "connection_pool", falso.connection_pool)
+
+
+def test_requisicoes_seguem_sem_cache(client, redis_fora_do_ar, consultas_sql):
+    respostas = [client.get("/salas") for _ in range(circuit_breaker.limite_falhas + 1)]
+
+    assert [resposta.status_code for resposta in respostas] == [200] * len(respostas)
+    assert not circuit_breaker.disponivel()
+    assert consultas_sql != []
+    assert "ETag" not in respostas[-1].headers
+
+
+def test_invalidacao_adiada_reaplicada_ao_fechar(redis_falso, monkeypatch):
+    monkeypatch.setattr(circuit_breaker, "intervalo_sondagem", 0.01)
+    monkeypatch.setattr(circuit_breaker, "estado", circuit_breaker.ABERTO)
+
+    assert not invalidate_namespace("salas", entities={"salas:entidades:v0:1": (b"j{}", 60)})
+    assert redis_cache._pending_invalidations == {"salas", "salas:entidades"}
+
+    # A sondagem (PING no Redis, agora de volta) fecha o circuito.
+    circuit_breaker._sondar_ate_recuperar()
+
+    assert circuit_breaker.disponivel()
+    assert redis_cache._pending_invalidations == set()
+    assert redis_falso.get("geracao:salas") == b"1"
+    assert redis_falso.get("geracao:salas:entidades") == b"1"
+    assert redis_falso.get("salas:entidades:v0:1") is None
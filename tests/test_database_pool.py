@@ -0,0 +1,69 @@
+"""Métricas de checkout do pool, separadas por engine."""
+import pytest
+from sqlalchemy import create_engine, text
+
+from helpers import database_pool
+from helpers.database_pool import QueuePoolMonitorado, configurar_engine, status_do_banco
+
+
+@pytest.fixture
+def metricas(monkeypatch):
+    metricas = {}
+    monkeypatch.setattr(database_pool, "metricas_dos_pools", metricas)
+    return metricas
+
+
+def _engine(tmp_path, nome):
+    return create_engine(
+        f"sqlite:///{tmp_path / nome}.db",
+        poolclass=QueuePoolMonitorado,
+        pool_size=2,
+        max_overflow=0
+    )
+
+
+def _consultar(engine, vezes):
+    for _ in range(vezes):
+        with engine.connect() as conexao:
+            conexao.execute(text("SELECT 1"))
+
+
+def test_primario_e_replica_tem_metricas_proprias(tmp_path, metricas):
+    primario = _engine(tmp_path, "primario")
+    replica = _engine(tmp_path, "replica")
+
+    configurar_engine(primario)
+    configurar_engine(replica, "replica_0")
+
+    _consultar(primario, 3)
+    _consultar(replica, 1)
+
+    with replica.connect():
+        pools = status_do_banco()["pools"]
+
+    assert set(pools) == {"primario", "replica_0"}
+    assert pools["primario"]["checkouts"] == 3
+    assert pools["replica_0"]["checkouts"] == 2
+    assert pools["primario"]["em_uso"] == 0
+    assert pools["replica_0"]["em_uso"] == 1
+
+
+def test_pool_recriado_mantem_as_metricas(tmp_path, metricas):
+    engine = _engine(tmp_path, "primario")
+    configurar_engine(engine)
+
+    _consultar(engine, 1)
+    engine.dispose()
+    _consultar(engine, 2)
+
+    with engine.connect():
+        status = status_do_banco()["pools"]["primario"]
+
+    assert status["checkouts"] == 4
+    assert status["em_uso"] == 1
+
+
+def test_status_da_aplicacao(client):
+    banco = client.get("/status").get_json()["banco"]
+
+    assert "primario" in banco["pools"]
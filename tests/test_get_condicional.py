@@ -0,0 +1,106 @@
+"""GET condicional: ETag e Last-Modified a partir das gerações do cache."""
+import time
+from types import SimpleNamespace
+
+from werkzeug.http import http_date
+
+from helpers.auxiliaryFunctionsResources import redisCacheFunctions
+from helpers.redis_cache import forget_local_namespace, modified_key, redis_client
+
+AGORA = 1_800_000_000
+
+
+def _escrita_em(instante):
+    redis_client.set(modified_key("salas"), instante)
+    forget_local_namespace("salas")
+
+
+def _relogio(monkeypatch, agora):
+    monkeypatch.setattr(
+        redisCacheFunctions,
+        "time",
+        SimpleNamespace(time=lambda: agora, monotonic=time.monotonic, sleep=time.sleep)
+    )
+
+
+def test_etag_igual_responde_304_sem_consultar(client, redis_falso, consultas_sql):
+    primeira = client.get("/salas")
+    etag = primeira.headers["ETag"]
+
+    assert etag == 'W/"salas.v0"'
+    assert primeira.headers["Cache-Control"] == "no-cache"
+
+    del consultas_sql[:]
+    resposta = client.get("/salas", headers={"If-None-Match": etag})
+
+    assert resposta.status_code == 304
+    assert resposta.headers["ETag"] == etag
+    assert consultas_sql == []
+
+
+def test_escrita_muda_o_etag(client, redis_falso):
+    etag = client.get("/salas").headers["ETag"]
+    client.post("/salas", json={"sala_nome": "Sala Condicional", "disponivel": True})
+
+    resposta = client.get("/salas", headers={"If-None-Match": etag})
+
+    assert resposta.status_code == 200
+    assert resposta.headers["ETag"] == 'W/"salas.v1"'
+
+
+def test_sem_redis_nao_ha_validadores(client):
+    resposta = client.get("/salas", headers={"If-None-Match": 'W/"salas.v0"'})
+
+    assert resposta.status_code == 200
+    assert "ETag" not in resposta.headers
+
+
+def test_last_modified_arredondado_para_cima(client, redis_falso, monkeypatch):
+    _relogio(monkeypatch, AGORA + 10)
+    _escrita_em(AGORA + 0.2)
+
+    resposta = client.get("/salas")
+    anterior = client.get("/salas", headers={"If-Modified-Since": http_date(AGORA)})
+    atual = client.get("/salas", headers={"If-Modified-Since": http_date(AGORA + 1)})
+
+    assert resposta.headers["Last-Modified"] == http_date(AGORA + 1)
+    assert anterior.status_code == 200
+    assert atual.status_code == 304
+
+
+def test_sem_304_indevido_no_segundo_da_escrita(client, redis_falso, monkeypatch):
+    # Regressão: com o Last-Modified truncado para AGORA, uma segunda escrita
+    # no mesmo segundo respondia 304 a quem tinha a versão da primeira.
+    _relogio(monkeypatch, AGORA + 0.5)
+    _escrita_em(AGORA + 0.2)
+
+    resposta = client.get("/salas")
+    assert "Last-Modified" not in resposta.headers
+    assert "ETag" in resposta.headers
+
+    _escrita_em(AGORA + 0.4)
+    depois = client.get("/salas", headers={"If-Modified-Since": http_date(AGORA)})
+
+    assert depois.status_code == 200
+
+    _relogio(monkeypatch, AGORA + 1)
+    assert client.get("/salas").headers["Last-Modified"] == http_date(AGORA + 1)
+
+
+def test_if_none_match_tem_precedencia(client, redis_falso, monkeypatch):
+    _relogio(monkeypatch, AGORA + 10)
+    _escrita_em(AGORA)
+
+    resposta = client.get("/salas", headers={
+        "If-None-Match": 'W/"salas.v9"',
+        "If-Modified-Since": http_date(AGORA + 5)
+    })
+
+    assert resposta.status_code == 200
+
+
+def test_erro_nao_recebe_validadores(client, redis_falso):
+    resposta = client.get("/salas/900100")
+
+    assert resposta.status_code == 404
+    assert "ETag" not in resposta.headers
@@ -0,0 +1,93 @@
+"""Grafo de invalidação: cada escrita invalida os namespaces que dependem dela."""
+from datetime import date, time
+
+from sqlalchemy import update
+
+from helpers.cache_invalidation import SEM_INVALIDACAO, registrar_invalidacao
+from helpers.database import db
+from models.Chave import TB_Chave
+from models.Reserva import TB_Reserva
+from models.ReservaDia import TB_ReservaDia
+from models.Sala import TB_Sala
+
+
+def _invalidados(redis):
+    return {
+        chave.decode().removeprefix("geracao:")
+        for chave in redis.keys("geracao:*")
+        if not chave.endswith(b":modificado")
+    }
+
+
+def test_sala_invalida_salas_e_historico(app, redis_falso):
+    with app.app_context():
+        sala = TB_Sala(sala_nome="Sala Grafo", disponivel=True, contador_chaves=0)
+        db.session.add(sala)
+        db.session.commit()
+
+        assert _invalidados(redis_falso) == {"salas", "historico"}
+
+        sala.disponivel = False
+        db.session.commit()
+
+    assert redis_falso.get("geracao:salas") == b"2"
+    assert redis_falso.get("geracao:historico") == b"2"
+
+
+def test_reserva_e_dias_invalidam_so_reservas(app, redis_falso):
+    with app.app_context():
+        reserva = TB_Reserva(
+            sala_id=1,
+            responsavel_id=1,
+            hora_inicio=time(18),
+            hora_fim=time(19),
+            data_inicio=date(2026, 4, 1),
+            data_fim=date(2026, 4, 30),
+            frequencia="semanal",
+            status="ativa"
+        )
+        db.session.add(reserva)
+        db.session.commit()
+
+        db.session.add(TB_ReservaDia(reserva_id=reserva.reserva_id, dia_semana=6))
+        db.session.commit()
+
+    assert _invalidados(redis_falso) == {"reservas"}
+    assert redis_falso.get("geracao:reservas") == b"2"
+
+
+def test_escrita_em_lote_descarta_as_entidades(app, redis_falso):
+    with app.app_context():
+        db.session.execute(update(TB_Chave).where(TB_Chave.chave_id == -1).values(disponivel=True))
+        db.session.commit()
+
+    assert _invalidados(redis_falso) == {"chaves", "chaves:entidades", "historico"}
+
+
+def test_escrita_sem_invalidacao(app, redis_falso):
+    with app.app_context():
+        db.session.execute(
+            update(TB_Sala).where(TB_Sala.sala_id == -1).values(contador_chaves=TB_Sala.contador_chaves),
+            execution_options={SEM_INVALIDACAO: True}
+        )
+        db.session.commit()
+
+    assert _invalidados(redis_falso) == set()
+
+
+def test_sql_textual_registrado_pelo_chamador(app, redis_falso):
+    with app.app_context():
+        registrar_invalidacao("tb_retirada")
+        db.session.commit()
+
+    assert _invalidados(redis_falso) == {"retiradas", "historico"}
+
+
+def test_rollback_nao_invalida(app, redis_falso):
+    with app.app_context():
+        db.session.add(TB_Sala(sala_nome="Sala Descartada", disponivel=True, contador_chaves=0))
+        db.session.flush()
+        db.session.rollback()
+        db.session.commit()
+
+    assert _invalidados(redis_falso) == set()
@@ -0,0 +1,51 @@
+"""Exportação do histórico em streaming (/historico/export)."""
+from sqlalchemy import event, func, select
+
+from helpers.database import db
+from helpers.auxiliaryFunctionsResources import sqlRequestForHistory
+from helpers.auxiliaryFunctionsResources.sqlRequestForHistory import sqlRequisicaoExport
+from models.HistoricoRetiradas import TB_HistoricoRetirada
+
+
+def test_exportacao_completa(app, client):
+    with app.app_context():
+        total = db.session.scalar(select(func.count()).select_from(TB_HistoricoRetirada))
+
+    resposta = client.get("/historico/export?format=csv&fields=retirada_id,sala_nome")
+    linhas = resposta.get_data(as_text=True).splitlines()
+
+    assert resposta.status_code == 200
+    assert resposta.headers["Content-Disposition"] == "attachment; filename=historico.csv"
+    assert "ETag" not in resposta.headers
+    assert linhas[0] == "retirada_id,sala_nome"
+    assert len(linhas) == total + 1
+
+
+def test_exportacao_interrompida_devolve_a_conexao(app, monkeypatch):
+    # O cliente desconecta no meio da exportação: o gerador recebe
+    # GeneratorExit e precisa fechar o cursor e desfazer a transação ali
+    # mesmo, antes do teardown da requisição.
+    monkeypatch.setattr(sqlRequestForHistory, "HISTORICO_EXPORT_LOTE", 1)
+
+    rollbacks = []
+
+    def registrar_rollback(conexao):
+        rollbacks.append(conexao)
+
+    with app.test_request_context("/historico/export?format=ndjson"):
+        pool = db.engine.pool
+        event.listen(db.engine, "rollback", registrar_rollback)
+
+        try:
+            corpo = iter(sqlRequisicaoExport("ndjson").response)
+
+            assert next(corpo).count("\n") == 1
+            assert pool.checkedout() == 1
+
+            corpo.close()
+
+            assert rollbacks
+            assert pool.checkedout() == 0
+
+        finally:
+            event.remove(db.engine, "rollback", registrar_rollback)
@@ -0,0 +1,158 @@
+"""Cadastro em lote (/salas/bulk, /chaves/bulk, /responsavel/bulk)."""
+from sqlalchemy import event, select
+
+from helpers.database import db
+from models.Chave import TB_Chave
+from models.Responsavel import TB_ResponsavelLoteSchema
+from repositories.responsavelRepository import ResponsavelRepository
+
+
+def _status_por_indice(resposta):
+    return [(item["indice"], item["status"]) for item in resposta.get_json()["resultados"]]
+
+
+def _responsavel(sufixo, **extra):
+    return {
+        "responsavel_nome": f"Responsável lote {sufixo}",
+        "responsavel_cpf": f"111.222.{sufixo:03d}-00",
+        "responsavel_data_nascimento": "1990-05-10",
+        "email": f"lote{sufixo}@example.com",
+        "senha": "senha-segura",
+        "ativo": True,
+        **extra
+    }
+
+
+def test_salas_todas_criadas(app, client):
+    resposta = client.post("/salas/bulk", json=[
+        {"sala_nome": "Lote A", "disponivel": True},
+        {"sala_nome": "Lote B", "disponivel": False}
+    ])
+    corpo = resposta.get_json()
+
+    assert resposta.status_code == 201
+    assert (corpo["criados"], corpo["rejeitados"]) == (2, 0)
+    assert _status_por_indice(resposta) == [(0, 201), (1, 201)]
+    assert [item["dados"]["sala_nome"] for item in corpo["resultados"]] == ["Lote A", "Lote B"]
+
+    with app.app_context():
+        for item in corpo["resultados"]:
+            nomes = db.session.scalars(
+                select(TB_Chave.chave_nome).where(TB_Chave.sala_id == item["dados"]["sala_id"])
+            ).all()
+            assert nomes == [f"Chave {item['dados']['sala_nome']} 01"]
+
+
+def test_salas_resultado_parcial(client):
+    resposta = client.post("/salas/bulk", json=[
+        {"sala_nome": "Lote C", "disponivel": True},
+        {"sala_nome": "Sala 1", "disponivel": True},
+        {"sala_nome": "Lote D"},
+        {"sala_nome": "Lote C", "disponivel": False},
+        {"sala_nome": "Lote E", "disponivel": True}
+    ])
+    corpo = resposta.get_json()
+
+    assert resposta.status_code == 207
+    assert (corpo["criados"], corpo["rejeitados"]) == (2, 3)
+    assert _status_por_indice(resposta) == [(0, 201), (1, 409), (2, 422), (3, 409), (4, 201)]
+    assert "disponivel" in corpo["resultados"][2]["detalhes"]
+    assert "sala_nome" in corpo["resultados"][3]["detalhes"]
+
+
+def test_salas_nenhuma_criada(client):
+    resposta = client.post("/salas/bulk", json=[{"disponivel": True}, {"sala_nome": "Sala 2", "disponivel": True}])
+
+    assert resposta.status_code == 422
+    assert _status_por_indice(resposta) == [(0, 422), (1, 409)]
+
+
+def test_lote_vazio_ou_invalido(client):
+    assert client.post("/salas/bulk", json=[]).status_code == 400
+    assert client.post("/salas/bulk", json={"sala_nome": "X"}).status_code == 400
+
+
+def test_nome_de_sala_unico_tambem_no_cadastro_individual(client):
+    assert client.post("/salas", json={"sala_nome": "Sala 3", "disponivel": True}).status_code == 409
+
+    criada = client.post("/salas", json={"sala_nome": "Lote F", "disponivel": True})
+    sala_id = criada.get_json()["sala_id"]
+
+    assert criada.status_code == 201
+    assert client.put(f"/salas/{sala_id}", json={"sala_nome": "Sala 3"}).status_code == 409
+    assert client.put(f"/salas/{sala_id}", json={"sala_nome": "Lote F", "disponivel": False}).status_code == 200
+
+
+def test_chaves_sala_inexistente_e_invalida(client):
+    resposta = client.post("/chaves/bulk", json=[
+        {"sala_id": 4, "disponivel": True},
+        {"sala_id": 9999, "disponivel": True},
+        {"sala_id": 4},
+        {"sala_id": 4, "disponivel": False}
+    ])
+    corpo = resposta.get_json()
+
+    assert resposta.status_code == 207
+    assert _status_por_indice(resposta) == [(0, 201), (1, 404), (2, 422), (3, 201)]
+    assert [corpo["resultados"][i]["dados"]["sala_id"] for i in (0, 3)] == [4, 4]
+
+
+def test_chaves_nenhuma_criada(client):
+    resposta = client.post("/chaves/bulk", json=[{"sala_id": 9999, "disponivel": True}])
+
+    assert resposta.status_code == 422
+    assert _status_por_indice(resposta) == [(0, 404)]
+
+
+def test_responsaveis_duplicados_no_lote_e_no_banco(client):
+    resposta = client.post("/responsavel/bulk", json=[
+        _responsavel(1),
+        _responsavel(2, responsavel_cpf="111.222.001-00"),
+        _responsavel(3, email="responsavel1@example.com"),
+        _responsavel(4, senha="curta"),
+        _responsavel(5)
+    ])
+    corpo = resposta.get_json()
+
+    assert resposta.status_code == 207
+    assert _status_por_indice(resposta) == [(0, 201), (1, 409), (2, 409), (3, 422), (4, 201)]
+    assert "responsavel_cpf" in corpo["resultados"][1]["detalhes"]
+    assert "email" in corpo["resultados"][2]["detalhes"]
+    assert all("senha" not in item.get("dados", {}) for item in corpo["resultados"])
+
+
+def test_responsaveis_sem_admin_quando_ja_ha_cadastro(client):
+    resposta = client.post("/responsavel/bulk", json=[_responsavel(10), _responsavel(11)])
+
+    assert resposta.status_code == 201
+    assert [item["dados"]["funcao"] for item in resposta.get_json()["resultados"]] == ["responsavel", "responsavel"]
+
+
+def test_primeiro_responsavel_do_banco_vazio_e_admin(client, monkeypatch):
+    monkeypatch.setattr(ResponsavelRepository, "first", staticmethod(lambda: None))
+
+    resposta = client.post("/responsavel/bulk", json=[
+        _responsavel(20, senha="curta"),
+        _responsavel(21),
+        _responsavel(22)
+    ])
+
+    assert resposta.status_code == 207
+    assert [item.get("dados", {}).get("funcao") for item in resposta.get_json()["resultados"]] == [None, "admin", "responsavel"]
+
+
+def test_schema_do_lote_nao_consulta_o_banco(app):
+    consultas = []
+
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", contar)
+
+        try:
+            TB_ResponsavelLoteSchema().load(_responsavel(1))
+        finally:
+            event.remove(db.engine, "before_cursor_execute", contar)
+
+    assert consultas == []
@@ -0,0 +1,165 @@
+"""Numeração das chaves pelo contador da sala (tb_sala.contador_chaves)."""
+import contextlib
+import importlib.util
+import os
+import uuid
+
+from sqlalchemy import func, select, text
+
+from helpers.database import db
+from models.Chave import TB_Chave
+from models.Sala import TB_Sala
+
+MIGRACAO = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "migrations",
+    "versions",
+    "b3f81d6c0e27_adicao_do_contador_de_chaves_em_sala.py"
+)
+
+
+def _nova_sala(client):
+    nome = f"Numeracao {uuid.uuid4().hex[:8]}"
+    resposta = client.post("/salas", json={"sala_nome": nome, "disponivel": True})
+    assert resposta.status_code == 201
+    return resposta.get_json()["sala_id"], nome
+
+
+def _numeros(app, sala_id):
+    with app.app_context():
+        nomes = db.session.scalars(
+            select(TB_Chave.chave_nome).where(TB_Chave.sala_id == sala_id).order_by(TB_Chave.chave_id)
+        ).all()
+        db.session.remove()
+
+    return [int(nome.rsplit(" ", 1)[1]) for nome in nomes]
+
+
+def _contador(app, sala_id):
+    with app.app_context():
+        contador = db.session.get(TB_Sala, sala_id).contador_chaves
+        db.session.remove()
+
+    return contador
+
+
+def test_chaves_individuais_consecutivas(app, client):
+    sala_id, nome = _nova_sala(client)
+
+    nomes = [
+        client.post("/chaves", json={"sala_id": sala_id, "disponivel": True}).get_json()["chave_nome"]
+        for _ in range(2)
+    ]
+
+    assert nomes == [f"Chave {nome} 02", f"Chave {nome} 03"]
+    assert _numeros(app, sala_id) == [1, 2, 3]
+    assert _contador(app, sala_id) == 3
+
+
+def test_chaves_em_lote_continuam_a_numeracao_de_cada_sala(app, client):
+    sala_a, nome_a = _nova_sala(client)
+    sala_b, nome_b = _nova_sala(client)
+
+    client.post("/chaves", json={"sala_id": sala_a, "disponivel": True})
+
+    resposta = client.post("/chaves/bulk", json=[
+        {"sala_id": sala_a, "disponivel": True},
+        {"sala_id": sala_b, "disponivel": True},
+        {"sala_id": sala_a, "disponivel": False},
+        {"sala_id": sala_a, "disponivel": True}
+    ])
+    nomes = [item["dados"]["chave_nome"] for item in resposta.get_json()["resultados"]]
+
+    assert resposta.status_code == 201
+    assert nomes == [
+        f"Chave {nome_a} 03",
+        f"Chave {nome_b} 02",
+        f"Chave {nome_a} 04",
+        f"Chave {nome_a} 05"
+    ]
+    assert _numeros(app, sala_a) == [1, 2, 3, 4, 5]
+    assert (_contador(app, sala_a), _contador(app, sala_b)) == (5, 2)
+
+
+def test_chaves_removidas_continuam_ocupando_o_numero(app, client):
+    sala_id, nome = _nova_sala(client)
+    segunda = client.post("/chaves", json={"sala_id": sala_id, "disponivel": True}).get_json()
+    client.post("/chaves", json={"sala_id": sala_id, "disponivel": True})
+
+    assert client.delete(f"/chaves/{segunda['chave_id']}", json={"deleted_by": 1}).status_code == 200
+
+    nova = client.post("/chaves", json={"sala_id": sala_id, "disponivel": True}).get_json()
+
+    assert nova["chave_nome"] == f"Chave {nome} 04"
+    assert _contador(app, sala_id) == 4
+
+    # O contador é o total de chaves já criadas, removidas inclusive: a
+    # mesma conta do preenchimento da migração.
+    with app.app_context():
+        total = db.session.scalar(
+            select(func.count()).select_from(TB_Chave).where(TB_Chave.sala_id == sala_id)
+        )
+        db.session.remove()
+
+    assert total == 4
+
+
+def test_sala_removida_nao_recebe_chaves(client):
+    sala_id, _ = _nova_sala(client)
+
+    assert client.delete(f"/salas/{sala_id}", json={"deleted_by": 1}).status_code == 200
+    assert client.post("/chaves", json={"sala_id": sala_id, "disponivel": True}).status_code == 404
+
+
+def _sql_do_preenchimento():
+    spec = importlib.util.spec_from_file_location("migracao_contador_de_chaves", MIGRACAO)
+    migracao = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migracao)
+
+    comandos = []
+
+    class Operacoes:
+
+        @staticmethod
+        @contextlib.contextmanager
+        def batch_alter_table(*args, **kwargs):
+            yield Operacoes
+
+        @staticmethod
+        def add_column(*args, **kwargs):
+            pass
+
+        @staticmethod
+        def execute(sql):
+            comandos.append(sql)
+
+    migracao.op = Operacoes
+    migracao.upgrade()
+
+    return comandos
+
+
+def test_preenchimento_da_migracao_bate_com_o_contador(app, client, postgres):
+    sala_id, _ = _nova_sala(client)
+    chaves = [
+        client.post("/chaves", json={"sala_id": sala_id, "disponivel": True}).get_json()["chave_id"]
+        for _ in range(3)
+    ]
+    client.delete(f"/chaves/{chaves[0]}", json={"deleted_by": 1})
+
+    contadores = {}
+
+    with app.app_context():
+        for sala in db.session.scalars(select(TB_Sala)):
+            contadores[sala.sala_id] = sala.contador_chaves
+
+        # Refaz o preenchimento da migração e compara, sem gravar.
+        for sql in _sql_do_preenchimento():
+            db.session.execute(text(sql))
+
+        recalculados = dict(db.session.execute(select(TB_Sala.sala_id, TB_Sala.contador_chaves)).all())
+        db.session.rollback()
+        db.session.remove()
+
+    assert contadores[sala_id] == 4
+    assert recalculados[sala_id] == contadores[sala_id]
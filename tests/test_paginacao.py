@@ -0,0 +1,49 @@
+"""Paginação padrão das listagens e teto da lista simples."""
+from helpers import query_spec
+from helpers.auxiliaryFunctionsResources import helpFunctionsForSql
+
+
+def test_tabelas_que_crescem_sao_sempre_paginadas(client, monkeypatch):
+    monkeypatch.setattr(helpFunctionsForSql, "LIMITE_PADRAO_PAGINA", 2)
+
+    for rota in ("/retiradas", "/reservas", "/historico"):
+        pagina = client.get(rota).get_json()
+
+        assert len(pagina["itens"]) == 2, rota
+        assert pagina["next_cursor"], rota
+
+
+def test_cursor_da_pagina_padrao_continua_a_listagem(client, monkeypatch):
+    monkeypatch.setattr(helpFunctionsForSql, "LIMITE_PADRAO_PAGINA", 2)
+
+    ids = []
+    cursor = None
+
+    while True:
+        pagina = client.get("/retiradas", query_string={"cursor": cursor} if cursor else {}).get_json()
+        ids.extend(item["retirada_id"] for item in pagina["itens"])
+        cursor = pagina["next_cursor"]
+
+        if cursor is None:
+            break
+
+    assert ids == sorted(ids)
+    assert len(ids) == len(set(ids)) >= 5
+
+
+def test_lista_simples_limitada_ao_teto(client, monkeypatch):
+    monkeypatch.setattr(query_spec, "LIMITE_SEM_PAGINACAO", 3)
+
+    salas = client.get("/salas").get_json()
+
+    assert isinstance(salas, list)
+    assert len(salas) == 3
+
+
+def test_exportacao_ignora_pagina_e_teto(client, monkeypatch):
+    monkeypatch.setattr(helpFunctionsForSql, "LIMITE_PADRAO_PAGINA", 2)
+    monkeypatch.setattr(query_spec, "LIMITE_SEM_PAGINACAO", 2)
+
+    linhas = client.get("/historico/export?format=csv").get_data(as_text=True).splitlines()
+
+    assert len(linhas) > 3
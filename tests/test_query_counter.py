@@ -0,0 +1,67 @@
+"""Limites de @limite_de_consultas nas rotas GET, com SQL_CONTAGEM_MODO=assert.
+
+No modo assert a requisição que passa do limite da rota responde 500; as
+demais trazem o total de comandos no cabeçalho X-Consultas-SQL.
+"""
+import pytest
+
+from helpers import query_counter
+from helpers.database import db
+from repositories.reservaRepository import ReservaRepository
+
+# (rota, limite declarado no resource)
+ROTAS = [
+    ("/salas", 1),
+    ("/salas?limit=2", 1),
+    ("/salas/1", 1),
+    ("/chaves", 1),
+    ("/chaves/1", 1),
+    ("/responsavel", 1),
+    ("/responsavel/1", 1),
+    ("/reservas", 2),
+    ("/reservas?limit=2", 2),
+    ("/reservas/1", 2),
+    ("/retiradas", 1),
+    ("/retiradas/1", 1),
+    ("/historico", 1),
+    ("/historico?limit=2", 1),
+    ("/historico/1", 1)
+]
+
+
+def test_modo_assert_ativo():
+    assert query_counter.MODO == "assert"
+
+
+@pytest.mark.parametrize("rota, limite", ROTAS)
+def test_rota_dentro_do_limite(client, rota, limite):
+    resposta = client.get(rota)
+
+    assert resposta.status_code == 200, resposta.get_json()
+    assert 1 <= int(resposta.headers["X-Consultas-SQL"]) <= limite
+
+
+def test_reservas_com_dias_sem_n_mais_1(client):
+    resposta = client.get("/reservas")
+    itens = resposta.get_json()["itens"]
+
+    assert resposta.status_code == 200
+    assert len(itens) > 2
+    assert all(item["dias_semana"] for item in itens)
+    assert int(resposta.headers["X-Consultas-SQL"]) == 2
+
+
+def test_reservas_sem_carga_dos_dias_estoura_o_limite(client, monkeypatch):
+    # Regressão do N+1: sem o selectinload, cada reserva serializada busca os
+    # seus dias da semana em uma consulta própria.
+    monkeypatch.setattr(
+        ReservaRepository,
+        "get_all",
+        staticmethod(lambda spec: spec.executar(db.session))
+    )
+
+    resposta = client.get("/reservas")
+
+    assert resposta.status_code == 500
+    assert int(resposta.headers["X-Consultas-SQL"]) > 2
+    assert "limite da rota: 2" in resposta.get_json()["message"]
@@ -0,0 +1,88 @@
+"""Renomeação das chaves junto com a sala (renomear_chaves_da_sala)."""
+import uuid
+
+from sqlalchemy import select
+
+from helpers.database import db
+from models.Chave import TB_Chave
+from models.Sala import TB_Sala
+from repositories.salaRepository import SalaRepository
+
+
+def _sala_com_chaves(client, quantidade):
+    nome = f"Renomear {uuid.uuid4().hex[:8]}"
+    sala_id = client.post("/salas", json={"sala_nome": nome, "disponivel": True}).get_json()["sala_id"]
+
+    for _ in range(quantidade - 1):
+        client.post("/chaves", json={"sala_id": sala_id, "disponivel": True})
+
+    return sala_id
+
+
+def _chaves(sala_id):
+    return db.session.execute(
+        select(TB_Chave.chave_id, TB_Chave.chave_nome, TB_Chave.deleted_at)
+        .where(TB_Chave.sala_id == sala_id)
+        .order_by(TB_Chave.chave_id)
+    ).all()
+
+
+def test_renomear_sala_renumera_todas_as_chaves(app, client):
+    sala_id = _sala_com_chaves(client, 4)
+
+    with app.app_context():
+        ids = [chave_id for chave_id, _, _ in _chaves(sala_id)]
+        db.session.remove()
+
+    # Remove uma chave do meio: ela continua sendo renomeada e numerada.
+    assert client.delete(f"/chaves/{ids[1]}", json={"deleted_by": 1}).status_code == 200
+
+    novo = f"Novo {uuid.uuid4().hex[:8]}"
+    resposta = client.put(f"/salas/{sala_id}", json={"sala_nome": novo})
+
+    assert resposta.status_code == 200
+
+    with app.app_context():
+        chaves = _chaves(sala_id)
+        db.session.remove()
+
+    assert [chave_id for chave_id, _, _ in chaves] == ids
+    assert [nome for _, nome, _ in chaves] == [f"Chave {novo} {numero:02d}" for numero in range(1, 5)]
+    assert chaves[1].deleted_at is not None
+
+
+def test_renomear_nao_mexe_nas_chaves_de_outras_salas(app, client):
+    sala_id = _sala_com_chaves(client, 2)
+    outra_id = _sala_com_chaves(client, 2)
+
+    with app.app_context():
+        antes = _chaves(outra_id)
+        db.session.remove()
+
+    client.put(f"/salas/{sala_id}", json={"sala_nome": f"Novo {uuid.uuid4().hex[:8]}"})
+
+    with app.app_context():
+        assert _chaves(outra_id) == antes
+        db.session.remove()
+
+
+def test_chaves_carregadas_na_sessao_sao_atualizadas(app, client):
+    sala_id = _sala_com_chaves(client, 3)
+    novo = f"Novo {uuid.uuid4().hex[:8]}"
+
+    with app.app_context():
+        carregadas = db.session.scalars(
+            select(TB_Chave).where(TB_Chave.sala_id == sala_id).order_by(TB_Chave.chave_id)
+        ).all()
+
+        sala = db.session.get(TB_Sala, sala_id)
+        sala.sala_nome = novo
+        devolvidas = SalaRepository.renomear_chaves_da_sala(sala_id, novo)
+
+        # synchronize_session="fetch": os objetos já carregados recebem o nome
+        # novo sem precisar de refresh (nem commit).
+        assert [chave.chave_nome for chave in carregadas] == [f"Chave {novo} {numero:02d}" for numero in range(1, 4)]
+        assert {id(chave) for chave in devolvidas} == {id(chave) for chave in carregadas}
+
+        db.session.rollback()
+        db.session.remove()
@@ -0,0 +1,144 @@
+"""Retirada atômica da chave (RetiradaService.criar).
+
+reservar_chave usa UPDATE ... RETURNING dentro de CTEs, que só o Postgres
+executa: estes testes rodam com TESTES_DATABASE_URL.
+"""
+import threading
+import uuid
+from datetime import date, time
+
+import pytest
+from sqlalchemy import func, select
+
+from helpers.database import db
+from models.Chave import TB_Chave
+from models.Reserva import TB_Reserva
+from models.Retirada import TB_Retirada
+from models.Sala import TB_Sala
+
+
+@pytest.fixture
+def sala(app, postgres):
+    # Sala nova com duas chaves disponíveis, isolada dos dados dos outros testes.
+    with app.app_context():
+        sala = TB_Sala(sala_nome=f"Retirada {uuid.uuid4().hex[:8]}", disponivel=True, contador_chaves=2)
+        db.session.add(sala)
+        db.session.flush()
+
+        chaves = [
+            TB_Chave(chave_nome=f"Chave {sala.sala_nome} {numero:02d}", sala_id=sala.sala_id, disponivel=True)
+            for numero in (1, 2)
+        ]
+        db.session.add_all(chaves)
+        db.session.commit()
+
+        dados = {"sala_id": sala.sala_id, "chaves": [chave.chave_id for chave in chaves]}
+        db.session.remove()
+
+    return dados
+
+
+def _retirada(chave_id, **extra):
+    return {
+        "chave_id": chave_id,
+        "responsavel_id": 1,
+        "data_retirada": date.today().isoformat(),
+        "hora_retirada": "12:00",
+        "hora_prevista_devolucao": "13:00",
+        "status": "retirada",
+        **extra
+    }
+
+
+def _estado(app, sala):
+    with app.app_context():
+        disponiveis = db.session.scalars(
+            select(TB_Chave.disponivel).where(TB_Chave.chave_id.in_(sala["chaves"])).order_by(TB_Chave.chave_id)
+        ).all()
+        retiradas = db.session.scalar(
+            select(func.count()).select_from(TB_Retirada).where(TB_Retirada.chave_id.in_(sala["chaves"]))
+        )
+        sala_disponivel = db.session.get(TB_Sala, sala["sala_id"]).disponivel
+        db.session.remove()
+
+    return disponiveis, retiradas, sala_disponivel
+
+
+def test_retirada_reserva_chave_e_sala(app, client, sala):
+    resposta = client.post("/retiradas", json=_retirada(sala["chaves"][0]))
+
+    assert resposta.status_code == 201, resposta.get_json()
+    assert resposta.get_json()["chave_id"] == sala["chaves"][0]
+    assert _estado(app, sala) == ([False, True], 1, False)
+
+
+def test_chave_indisponivel_e_recusada(app, client, sala):
+    assert client.post("/retiradas", json=_retirada(sala["chaves"][0])).status_code == 201
+
+    resposta = client.post("/retiradas", json=_retirada(sala["chaves"][0]))
+
+    assert resposta.status_code == 404
+    assert "Chave não está disponivel" in resposta.get_json()["message"]
+    assert _estado(app, sala) == ([False, True], 1, False)
+
+
+def test_segunda_retirada_ativa_da_mesma_sala(app, client, sala):
+    assert client.post("/retiradas", json=_retirada(sala["chaves"][0])).status_code == 201
+
+    resposta = client.post("/retiradas", json=_retirada(sala["chaves"][1]))
+
+    assert resposta.status_code == 409
+    assert resposta.get_json()["message"] == "Já existe uma retirada ativa para esta sala."
+    # A reserva da segunda chave foi desfeita junto com a recusa.
+    assert _estado(app, sala) == ([False, True], 1, False)
+
+
+def test_reserva_de_outra_sala(app, client, sala):
+    with app.app_context():
+        reserva = TB_Reserva(
+            sala_id=1,
+            responsavel_id=1,
+            hora_inicio=time(8),
+            hora_fim=time(23, 59),
+            data_inicio=date.today(),
+            data_fim=date.today(),
+            frequencia="única",
+            status="ativa"
+        )
+        db.session.add(reserva)
+        db.session.commit()
+        reserva_id = reserva.reserva_id
+        db.session.remove()
+
+    resposta = client.post("/retiradas", json=_retirada(sala["chaves"][0], reserva_id=reserva_id))
+
+    assert resposta.status_code == 409
+    assert resposta.get_json()["message"] == "Reserva não pertence à sala da chave."
+    assert _estado(app, sala) == ([True, True], 0, True)
+
+
+def test_retiradas_simultaneas_da_mesma_sala(app, sala):
+    # Duas chaves da mesma sala ao mesmo tempo: o lock da linha da sala faz a
+    # segunda esperar o commit da primeira e ser recusada.
+    barreira = threading.Barrier(2)
+    status = []
+
+    def retirar(chave_id):
+        cliente = app.test_client()
+        barreira.wait()
+        status.append(cliente.post("/retiradas", json=_retirada(chave_id)).status_code)
+
+    threads = [threading.Thread(target=retirar, args=(chave_id,)) for chave_id in sala["chaves"]]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join(timeout=30)
+
+    assert sorted(status) == [201, 409]
+
+    disponiveis, retiradas, sala_disponivel = _estado(app, sala)
+
+    assert sorted(disponiveis) == [False, True]
+    assert (retiradas, sala_disponivel) == (1, False)
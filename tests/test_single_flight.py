@@ -0,0 +1,85 @@
+"""Single-flight das listagens: um recálculo por chave expirada."""
+import json
+import threading
+import time
+
+from helpers.auxiliaryFunctionsResources import redisCacheFunctions
+from helpers.auxiliaryFunctionsResources.redisCacheFunctions import buscarComSingleFlight, serializarResposta
+from helpers.redis_cache import redis_client
+
+CHAVE = "salas:v0:lista:teste"
+
+
+def _buscar(app, chave, consultar):
+    with app.test_request_context("/"):
+        resposta = buscarComSingleFlight("Salas", chave, consultar)
+        return json.loads(resposta.get_data())
+
+
+def test_misses_simultaneos_consultam_o_banco_uma_vez(app, redis_falso):
+    chamadas = []
+    barreira = threading.Barrier(5)
+    respostas = []
+
+    def consultar():
+        chamadas.append(1)
+        time.sleep(0.2)
+        return [{"sala_id": 1}]
+
+    def worker():
+        barreira.wait()
+        respostas.append(_buscar(app, CHAVE, consultar))
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert len(chamadas) == 1
+    assert respostas == [[{"sala_id": 1}]] * 5
+    assert redis_client.get(f"lock:{CHAVE}") is None
+    assert redis_falso.get(f"stale:{CHAVE}") == serializarResposta([{"sala_id": 1}])
+
+
+def test_devolve_a_copia_stale_durante_o_recalculo(app, redis_falso):
+    redis_client.set(f"lock:{CHAVE}", "outro-worker")
+    redis_falso.set(f"stale:{CHAVE}", serializarResposta(["antiga"]))
+
+    def consultar():
+        raise AssertionError("o banco não deveria ser consultado")
+
+    assert _buscar(app, CHAVE, consultar) == ["antiga"]
+
+
+def test_sem_stale_aguarda_o_valor_novo(app, redis_falso):
+    # retiradas não mantém cópia stale: quem não tem o lock espera.
+    chave = "retiradas:v0:lista:teste"
+    redis_client.set(f"lock:{chave}", "outro-worker")
+    redis_falso.set(f"stale:{chave}", serializarResposta(["antiga"]))
+
+    def recalcular():
+        time.sleep(0.1)
+        redis_falso.set(chave, serializarResposta(["nova"]))
+
+    def consultar():
+        raise AssertionError("o banco não deveria ser consultado")
+
+    recalculo = threading.Thread(target=recalcular)
+    recalculo.start()
+
+    try:
+        assert _buscar(app, chave, consultar) == ["nova"]
+    finally:
+        recalculo.join()
+
+
+def test_espera_esgotada_consulta_o_banco(app, redis_falso, monkeypatch):
+    monkeypatch.setattr(redisCacheFunctions, "ESPERA_MAXIMA", 0.1)
+    chave = "retiradas:v0:lista:teste"
+    redis_client.set(f"lock:{chave}", "outro-worker")
+
+    assert _buscar(app, chave, lambda: ["do banco"]) == ["do banco"]
+    assert redis_client.get(f"lock:{chave}") == "outro-worker"